@@ -0,0 +1,151 @@
+# admission.py
+# Admission control for the CPU-heavy endpoints.
+#
+# Text extraction and MiniLM inference saturate the cores, so letting every upload and
+# screening request run at once only makes all of them (and the cheap endpoints sharing
+# the worker) slow. Each workload class runs at most `concurrency` requests per worker
+# process; up to `max_queue` more wait their turn in arrival order, and the rest are
+# turned away straight away with 429 and a Retry-After. A request is also refused up front
+# when the expected wait (queue position x recent service time) is longer than
+# `max_wait`, and a queued request that is still waiting after `max_wait` gives up with
+# 429 as well, instead of holding a connection until the client times out.
+#
+# Queued requests hold a server thread while they wait, so GUNICORN_THREADS should leave
+# room for them plus the cheap endpoints (see gunicorn.conf.py).
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from flask import jsonify
+
+import metrics
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Smoothing for the per-class service time estimate
+SERVICE_TIME_ALPHA = 0.2
+
+QUEUE_DEPTH = metrics.gauge('talentify_admission_queue_depth', 'Requests waiting for admission, by workload.')
+IN_FLIGHT = metrics.gauge('talentify_admission_in_flight', 'Requests admitted and running, by workload.')
+WAIT_SECONDS = metrics.histogram('talentify_admission_wait_seconds',
+                                 'Time admitted requests spent queued, by workload.')
+REJECTED_TOTAL = metrics.counter('talentify_admission_rejected_total', 'Requests refused with 429, by workload and reason.')
+
+
+class Workload:
+    def __init__(self, name, concurrency, max_queue, max_wait):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.running = 0
+        self.service_seconds = None  # moving average of admitted request duration
+        self._waiters = deque()      # one Event per queued request, oldest first
+        self._lock = threading.Lock()
+
+    def estimated_wait(self, position):
+        # Seconds until the request at 1-based queue `position` starts; None until a
+        # request of this class has finished
+        if self.service_seconds is None:
+            return None
+        return math.ceil(position / self.concurrency) * self.service_seconds
+
+    def _retry_after(self, estimate=None):
+        return max(1, math.ceil(estimate if estimate is not None else (self.service_seconds or self.max_wait)))
+
+    def _gauges(self):
+        metrics.set_gauge(QUEUE_DEPTH, len(self._waiters), workload=self.name)
+        metrics.set_gauge(IN_FLIGHT, self.running, workload=self.name)
+
+    def _reject(self, reason, retry_after):
+        metrics.inc(REJECTED_TOTAL, workload=self.name, reason=reason)
+        return retry_after
+
+    def acquire(self):
+        """
+        Wait for a slot. Returns None once admitted (call release() when done), otherwise
+        the number of seconds the client should wait before retrying.
+        """
+        started = time.monotonic()
+        with self._lock:
+            if self.running < self.concurrency and not self._waiters:
+                self.running += 1
+                self._gauges()
+                metrics.observe(WAIT_SECONDS, 0.0, workload=self.name)
+                return None
+            position = len(self._waiters) + 1
+            estimate = self.estimated_wait(position)
+            if position > self.max_queue:
+                return self._reject('queue_full', self._retry_after(estimate))
+            if estimate is not None and estimate > self.max_wait:
+                return self._reject('deadline', self._retry_after(estimate))
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self._gauges()
+
+        waiter.wait(self.max_wait)
+        with self._lock:
+            # release() sets the event under the lock, so this check cannot race with it
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+                self._gauges()
+                return self._reject('timeout', self._retry_after())
+        metrics.observe(WAIT_SECONDS, time.monotonic() - started, workload=self.name)
+        return None
+
+    def release(self, seconds):
+        with self._lock:
+            if self.service_seconds is None:
+                self.service_seconds = seconds
+            else:
+                self.service_seconds += SERVICE_TIME_ALPHA * (seconds - self.service_seconds)
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter so nobody can jump the queue
+                self._waiters.popleft().set()
+            else:
+                self.running -= 1
+            self._gauges()
+
+
+def _workload_from_env(name, concurrency, max_queue, max_wait):
+    prefix = f"ADMISSION_{name.upper()}_"
+    return Workload(
+        name,
+        concurrency=int(os.environ.get(prefix + "CONCURRENCY", concurrency)),
+        max_queue=int(os.environ.get(prefix + "QUEUE", max_queue)),
+        max_wait=float(os.environ.get(prefix + "MAX_WAIT", max_wait)),
+    )
+
+
+# Per worker process. Uploads are extraction bound, screening is inference bound.
+WORKLOADS = {
+    'ingest': _workload_from_env('ingest', concurrency=1, max_queue=2, max_wait=10),
+    'screen': _workload_from_env('screen', concurrency=1, max_queue=2, max_wait=15),
+}
+
+
+def admit(workload_name):
+    # View decorator: run the view inside a slot of the named workload, or answer 429
+    workload = WORKLOADS[workload_name]
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not ADMISSION_ENABLED:
+                return view(*args, **kwargs)
+            retry_after = workload.acquire()
+            if retry_after is not None:
+                response = jsonify({"message": f"Server is busy with other {workload_name} requests. "
+                                               f"Retry in {retry_after} seconds."})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            started = time.monotonic()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                workload.release(time.monotonic() - started)
+        return wrapper
+    return decorator
@@ -0,0 +1,158 @@
+# analytics.py
+# Dashboard aggregates (score summary and histogram, category distribution, skill
+# frequencies) for one job or for all jobs of one recruiter.
+#
+# Each scope is held as a compact columnar snapshot of its screening results: float32
+# scores, int32 category codes and the matched skills as codes in one flat array with
+# per-row offsets. Aggregates are a few NumPy passes over those arrays. A resume screened
+# again for the same job replaces its earlier result (latest wins, as in re-ranking).
+#
+# Snapshots are cached per process. screen_resumes appends the rows it writes to the
+# cached snapshots of the job and its owner instead of dropping them, so the next read
+# only recomputes aggregates over arrays already in memory. Writes made by other worker
+# processes show up when the snapshot expires (ANALYTICS_TTL).
+import os
+import threading
+from array import array
+
+import numpy as np
+
+from cache import TTLCache
+from metrics import STAGE_SECONDS, timed
+
+ANALYTICS_TTL = int(os.environ.get("ANALYTICS_TTL", 60))
+ANALYTICS_CACHE_SIZE = int(os.environ.get("ANALYTICS_CACHE_SIZE", 256))
+SCORE_RANGE = (0.0, 100.0)
+UNCATEGORIZED = 'Uncategorized'
+
+
+class ResultSnapshot:
+    def __init__(self, job_ids=()):
+        self.job_ids = set(job_ids)
+        self._scores = array('f')
+        self._categories = array('i')
+        self._resumes = array('i')
+        self._skills = array('i')
+        self._skill_offsets = array('q', [0])
+        self._alive = bytearray()
+        self._rows = {}          # (job_id, resume_id) -> row number of its latest result
+        self._category_codes = {}
+        self._skill_codes = {}
+        self._resume_codes = {}
+        self._aggregates = {}    # (bins, top_skills) -> result, cleared on every append
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _code(codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def append(self, rows):
+        # rows: screening_results dicts in the order they were written
+        with self._lock:
+            for row in rows:
+                key = (str(row.get('job_id')), str(row.get('resume_id')))
+                previous = self._rows.get(key)
+                if previous is not None:
+                    self._alive[previous] = 0
+                self._rows[key] = len(self._alive)
+                self._alive.append(1)
+                self._scores.append(float(row.get('match_score') or 0.0))
+                self._categories.append(self._code(self._category_codes, row.get('categorized_field') or UNCATEGORIZED))
+                self._resumes.append(self._code(self._resume_codes, key[1]))
+                skills = row.get('matched_skills') or []
+                self._skills.extend(self._code(self._skill_codes, skill) for skill in skills)
+                self._skill_offsets.append(len(self._skills))
+                self.job_ids.add(key[0])
+            self._aggregates.clear()
+
+    def aggregates(self, bins=10, top_skills=20):
+        with self._lock:
+            cached = self._aggregates.get((bins, top_skills))
+            if cached is None:
+                with timed(STAGE_SECONDS, stage='analytics_aggregate'):
+                    cached = self._aggregates[(bins, top_skills)] = self._compute(bins, top_skills)
+            return cached
+
+    def _compute(self, bins, top_skills):
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        scores = np.frombuffer(self._scores, dtype=np.float32)[alive].astype(np.float64)
+        categories = np.frombuffer(self._categories, dtype=np.int32)[alive]
+        n = int(scores.size)
+
+        counts, edges = np.histogram(scores, bins=bins, range=SCORE_RANGE)
+        category_names = list(self._category_codes)
+        category_counts = np.bincount(categories, minlength=len(category_names))
+        category_sums = np.bincount(categories, weights=scores, minlength=len(category_names))
+
+        # Skill codes of live rows only: repeat each row's flag over its skills
+        offsets = np.frombuffer(self._skill_offsets, dtype=np.int64)
+        skill_alive = np.repeat(alive, np.diff(offsets))
+        skill_names = list(self._skill_codes)
+        skill_counts = np.bincount(np.frombuffer(self._skills, dtype=np.int32)[skill_alive],
+                                   minlength=len(skill_names))
+        top = np.argsort(-skill_counts, kind='stable')[:top_skills]
+
+        return {
+            'results': n,
+            'candidates': int(np.unique(np.frombuffer(self._resumes, dtype=np.int32)[alive]).size),
+            'jobs': len(self.job_ids),
+            'score': {
+                'mean': round(float(scores.mean()), 2) if n else None,
+                'median': round(float(np.median(scores)), 2) if n else None,
+                'p90': round(float(np.percentile(scores, 90)), 2) if n else None,
+                'min': float(scores.min()) if n else None,
+                'max': float(scores.max()) if n else None,
+            },
+            'score_histogram': {'edges': [round(float(e), 2) for e in edges], 'counts': counts.tolist()},
+            'categories': [
+                {'category': category_names[c], 'count': int(category_counts[c]),
+                 'mean_score': round(float(category_sums[c] / category_counts[c]), 2)}
+                for c in np.argsort(-category_counts, kind='stable') if category_counts[c]
+            ],
+            'skills': [{'skill': skill_names[s], 'count': int(skill_counts[s])} for s in top if skill_counts[s]],
+        }
+
+
+class Analytics:
+    def __init__(self, repo, ttl=ANALYTICS_TTL, maxsize=ANALYTICS_CACHE_SIZE):
+        self.repo = repo
+        self.snapshots = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def _load(self, job_ids):
+        snapshot = ResultSnapshot(job_ids)
+        with timed(STAGE_SECONDS, stage='analytics_load'):
+            rows = self.repo.get_results_for_analytics(job_ids) if job_ids else []
+            rows.sort(key=lambda r: r.get('created_at') or '')
+            snapshot.append(rows)
+        return snapshot
+
+    def for_job(self, job_id, bins=10, top_skills=20):
+        snapshot = self.snapshots.get_or_load(('job', str(job_id)), lambda: self._load([str(job_id)]))
+        return snapshot.aggregates(bins, top_skills)
+
+    def for_user(self, user_id, bins=10, top_skills=20):
+        def load():
+            return self._load([str(job['id']) for job in self.repo.list_jobs(user_id)])
+        snapshot = self.snapshots.get_or_load(('user', str(user_id)), load)
+        return snapshot.aggregates(bins, top_skills)
+
+    def record_results(self, rows, owners):
+        """
+        Fold freshly written screening rows into the cached snapshots they belong to.
+        `owners` maps job id -> owning user id. Scopes that are not cached are left alone;
+        they load everything, these rows included, on their next read.
+        """
+        by_job = {}
+        for row in rows:
+            by_job.setdefault(str(row.get('job_id')), []).append(row)
+        for job_id, job_rows in by_job.items():
+            snapshot = self.snapshots.get(('job', job_id))
+            if snapshot is not None:
+                snapshot.append(job_rows)
+            owner = owners.get(job_id)
+            snapshot = self.snapshots.get(('user', str(owner))) if owner else None
+            if snapshot is not None:
+                snapshot.append(job_rows)
@@ -1,18 +1,21 @@
-from flask import Flask, request, jsonify, send_from_directory, make_response, render_template
+from flask import Flask, Response, g, request, jsonify, make_response, render_template
 from flask_cors import CORS
 import os
 import json
 import uuid
-import zipfile
-from io import BytesIO
+import hashlib
+import base64
+import itertools
+import time
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from werkzeug.security import generate_password_hash, check_password_hash
-import smtplib
 import secrets
-from email.message import EmailMessage
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from mimetypes import guess_type
 from datetime import datetime
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
 # Load environment variables from .env file
@@ -24,13 +27,34 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-from text_extractor import extract_text_from_file
+from text_extractor import extract_text_from_file, extract_text_from_bytes
 from text_processor import preprocess_text, \
-    extract_skills_from_text, categorize_resume
-from resume_matcher import calculate_match_score_enhanced
+    extract_skills_from_text, categorize_resume, normalize_term, PIPELINE_VERSIONS
+from resume_matcher import calculate_match_components, calculate_match_matrix, combine_scores, \
+    apply_department_bonus, parse_experience_required, prefetch_embeddings, chunk_encoder, \
+    DEFAULT_WEIGHTS, DEPARTMENT_BONUS
+from zip_stream import stream_zip
+from zip_ingest import ArchiveError, ZIP_MAX_ARCHIVE_BYTES, iter_members, open_archive, spool
+from results_export import EXPORT_FORMATS, EXPORT_PAGE_SIZE, iter_pages, parquet_available, stream_export
+from compression import init_compression
+from admission import admit
+from repository import create_repository, JOB_SCREENING_COLUMNS, JOB_MATRIX_COLUMNS, RESUME_SCREENING_COLUMNS, \
+    PAGE_SIZE as DB_PAGE_SIZE
+from notification_buffer import NotificationBuffer
+from cache import TTLCache
+from mailer import Outbox
+from storage import create_storage, is_valid_key
+import metrics
+from metrics import ITEMS_TOTAL, REQUEST_SECONDS
+from profiling import profile_request
+from search_index import SearchIndex, QueryError, highlight
+from skill_index import SkillIndex, parse_skill_list
+from dedup_index import DuplicateIndex
+from analytics import Analytics
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
+init_compression(app)
 
 # Set Secret Key for Session Security
 app.secret_key = os.environ.get("SECRET_KEY", secrets.token_hex(32))
@@ -40,26 +64,115 @@ UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Let a fronting nginx/Apache send files itself when configured for it
+app.config['USE_X_SENDFILE'] = os.environ.get("USE_X_SENDFILE", "false").lower() in ("1", "true", "yes")
+
+# Content-addressed, sharded file storage (see storage.py)
+storage = create_storage(UPLOAD_FOLDER)
 
 # === Database Integration ===
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 HF_API_KEY = os.environ.get("HF_API_KEY")
 
 if not HF_API_KEY:
     print("WARNING: HF_API_KEY not set. Resume matching may fail.")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("WARNING: SUPABASE_URL and SUPABASE_KEY environment variables are not set. Supabase features will not work.")
-    # Set dummy values for local testing if you don't have Supabase set up
-    SUPABASE_URL = "http://localhost:8000"
-    SUPABASE_KEY = "dummy_key"
-
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-except Exception as e:
-    print(f"Could not connect to Supabase: {e}. Supabase features will be disabled.")
-    supabase = None
+# All table access goes through the repository (see repository.py)
+repo = create_repository()
+
+# Full-text search over processed resume text (see search_index.py)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+search_index = SearchIndex(repo, normalize=normalize_term) if repo else None
+# Skill -> resume postings for skill filters (see skill_index.py)
+skill_index = SkillIndex(repo) if repo else None
+# MinHash/LSH signatures for near-duplicate resumes (see dedup_index.py)
+dedup_index = DuplicateIndex(repo) if repo else None
+# Per-job and per-recruiter dashboard aggregates (see analytics.py)
+analytics = Analytics(repo) if repo else None
+# Default for screen_resumes' "collapse_duplicates"
+SCREEN_COLLAPSE_DUPLICATES = os.environ.get("SCREEN_COLLAPSE_DUPLICATES", "false").lower() in ("1", "true", "yes")
+
+# === Notifications ===
+NOTIFICATION_PAGE_SIZE = 50
+NOTIFICATION_MAX_PAGE_SIZE = 200
+unread_count_cache = TTLCache(ttl=int(os.environ.get("UNREAD_COUNT_TTL", 10)))
+
+def _invalidate_unread_counts(rows):
+    for user_id in {row.get('user_id') for row in rows}:
+        unread_count_cache.invalidate(user_id)
+
+# Notification inserts are written behind the request in batches
+notification_buffer = NotificationBuffer(repo, on_flush=_invalidate_unread_counts) if repo else None
+
+# === Read-through cache for dashboard lookups ===
+# Per worker process: a write invalidates only the cache of the worker that handled it,
+# so the other gunicorn workers can serve the old profile or job list until the TTL runs
+# out. Keep both TTLs short.
+JOBS_CACHE_TTL = int(os.environ.get("JOBS_CACHE_TTL", 30))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 30))
+read_cache = TTLCache(ttl=JOBS_CACHE_TTL, maxsize=int(os.environ.get("READ_CACHE_SIZE", 2048)))
+
+def cached_json_response(key, loader, ttl=None):
+    # Serve `loader()` as JSON through read_cache. The encoded body and its ETag are cached
+    # together so a matching If-None-Match is answered with 304 without touching the database.
+    def load():
+        data = loader()
+        if data is None:
+            return None
+        body = app.json.dumps(data).encode('utf-8')
+        return body, hashlib.sha1(body).hexdigest()
+
+    entry = read_cache.get_or_load(key, load, ttl)
+    if entry is None:
+        return None
+    body, etag = entry
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(body)
+        response.mimetype = 'application/json'
+    # Weak: the body may be sent compressed, so only semantic equivalence is promised
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+metrics.register_cache('read_cache', read_cache)
+metrics.register_cache('unread_count', unread_count_cache)
+if chunk_encoder is not None:
+    metrics.register_cache('embedding_chunks', chunk_encoder.cache)
+if analytics is not None:
+    metrics.register_cache('analytics', analytics.snapshots)
+
+# === Request metrics ===
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe(REQUEST_SECONDS, time.perf_counter() - started,
+                        endpoint=request.endpoint or 'unknown', method=request.method, status=response.status_code)
+    return response
+
+# Hooks are only installed when metrics are on, so a disabled exporter costs nothing per request
+if metrics.ENABLED:
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    if not metrics.ENABLED:
+        return jsonify({"message": "Metrics are disabled. Set METRICS_ENABLED=true."}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def invalidate_user_cache(users):
+    for user in users or []:
+        if user.get('id'):
+            read_cache.invalidate(f"user:{user['id']}")
+
+def invalidate_jobs_cache(user_id):
+    read_cache.invalidate("jobs:all")
+    read_cache.invalidate(f"jobs:user:{user_id}")
 
 def generate_id():
     return str(uuid.uuid4())
@@ -68,16 +181,21 @@ def generate_otp():
     # Cryptographically secure OTP generation
     return ''.join([str(secrets.randbelow(10)) for _ in range(6)])
 
-def send_otp_email(to_email, otp):
+# Outbound mail is sent by background threads over pooled SMTP connections (see mailer.py)
+SMTP_USER = os.environ.get("SMTP_USER")
+SMTP_PASS = os.environ.get("SMTP_PASS")
+# Delivery status is kept in the database when there is one, so any worker can report it
+outbox = Outbox(username=SMTP_USER, password=SMTP_PASS, status_store=repo) if SMTP_USER else None
+
+def send_otp_email(to_email, otp, user_id=None):
     from email.mime.multipart import MIMEMultipart
     from email.mime.text import MIMEText
 
-    sender_email = os.environ.get("SMTP_USER")
-    sender_pass = os.environ.get("SMTP_PASS")
+    sender_email = SMTP_USER
 
-    if not sender_email or not sender_pass:
-        print("SMTP_USER or SMTP_PASS environment variables not set. Email sending skipped.")
-        return
+    if not outbox:
+        print("SMTP_USER environment variable not set. Email sending skipped.")
+        return None
 
     # Create message
     msg = MIMEMultipart("alternative")
@@ -124,17 +242,23 @@ Resume Screening Team
     msg.attach(part1)
     msg.attach(part2)
 
-    try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_pass)
-            server.send_message(msg)
-        print(f"✅ OTP sent to {to_email}")
-    except Exception as e:
-        print(f"❌ Failed to send OTP email to {to_email}: {e}")
+    message_id = outbox.submit(msg, user_id=user_id)
+    print(f"OTP email to {to_email} queued as {message_id}")
+    return message_id
 
 #===API endpoints===
 
+@app.route('/api/email_status/<email_id>', methods=['GET'])
+def get_email_status(email_id):
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"message": "user_id is required"}), 400
+    status = outbox.status(email_id) if outbox else None
+    # Someone else's message is reported exactly like a missing one
+    if not status or str(status.get('user_id')) != str(user_id):
+        return jsonify({"message": "Email not found"}), 404
+    return jsonify(status), 200
+
 @app.route('/api/signup', methods=['POST'])
 def signup():
     data = request.json
@@ -145,13 +269,12 @@ def signup():
     if not email or not password:
         return jsonify({"message": "Email and password are required"}), 400
 
-    if not supabase:
+    if not repo:
         return jsonify({"message": "Database not connected. Signup is unavailable."}), 500
 
     try:
         # Check if user already exists in Supabase 'users' table
-        response = supabase.table('users').select('id', 'is_verified').eq('email', email).execute()
-        existing_user = response.data[0] if response.data else None
+        existing_user = repo.get_user_by_email(email, 'id, is_verified')
 
         if existing_user:
             if existing_user.get('is_verified'):
@@ -160,10 +283,10 @@ def signup():
                 # User exists but not verified, resend OTP
                 otp = generate_otp()
                 # Update OTP in Supabase
-                supabase.table('users').update({'otp': otp}).eq('email', email).execute()
-                send_otp_email(email, otp)
+                repo.update_user_by_email(email, {'otp': otp})
+                email_id = send_otp_email(email, otp, existing_user['id'])
                 return jsonify(
-                    {"message": "User exists but not verified. OTP resent for email verification.", "user_id": existing_user['id']}), 200
+                    {"message": "User exists but not verified. OTP resent for email verification.", "user_id": existing_user['id'], "email_id": email_id}), 200
 
         hashed_password = generate_password_hash(password)
         otp = generate_otp()
@@ -177,14 +300,14 @@ def signup():
             'is_verified': False
         }
 
-        response = supabase.table('users').insert(insert_data).execute()
+        new_user = repo.create_user(insert_data)
 
-        if response.data:
-            user_id = response.data[0]['id']
+        if new_user:
+            user_id = new_user['id']
             print(f"User {email} registered with ID {user_id} in Supabase.")
-            send_otp_email(email, otp)
+            email_id = send_otp_email(email, otp, user_id)
             create_notification(user_id, "Welcome to Talentify!", "Get started by setting up a new job requirement.")
-            return jsonify({"message": "User registered successfully. OTP sent for email verification.", "user_id": user_id}), 201
+            return jsonify({"message": "User registered successfully. OTP sent for email verification.", "user_id": user_id, "email_id": email_id}), 201
         else:
             return jsonify({"message": "Failed to register user."}), 500
 
@@ -198,7 +321,7 @@ def signup():
 
 @app.route('/api/update_profile', methods=['POST'])
 def update_profile():
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     data = request.json
@@ -213,12 +336,13 @@ def update_profile():
 
     try:
         # Update user in Supabase
-        response = supabase.table('users').update({
+        updated = repo.update_user_by_email(email, {
             'full_name': full_name,
             'hr_id': hr_id,
             'position': position,
             'department': department
-        }).eq('email', email).execute()
+        })
+        invalidate_user_cache(updated)
         
         return jsonify({"message": "Profile updated successfully"}), 200
     except Exception as e:
@@ -235,12 +359,11 @@ def login():
     if not email or not password:
         return jsonify({"message": "Email and password are required"}), 400
 
-    if not supabase:
+    if not repo:
         return jsonify({"message": "Database not connected. Login is unavailable."}), 500
 
     try:
-        response = supabase.table('users').select('*').eq('email', email).execute()
-        user = response.data[0] if response.data else None
+        user = repo.get_user_for_login(email)
 
         if not user or not check_password_hash(user['password_hash'], password):
             return jsonify({"message": "Invalid email or password"}), 401
@@ -249,7 +372,7 @@ def login():
             return jsonify({"message": "Please verify your email via OTP first."}), 403
 
         # Clear OTP from Supabase after successful login (if it was still there)
-        supabase.table('users').update({'otp': None}).eq('email', email).execute()
+        repo.update_user_by_email(email, {'otp': None})
 
         role_set = user.get('role') is not None
         return jsonify({
@@ -277,13 +400,14 @@ def get_current_profile():
 
 @app.route('/api/user/<user_id>', methods=['GET'])
 def get_user_profile(user_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
     try:
-        response = supabase.table('users').select('*').eq('id', user_id).execute()
-        user = response.data[0] if response.data else None
-        if user:
-            return jsonify({
+        def load_profile():
+            user = repo.get_user_profile(user_id)
+            if not user:
+                return None
+            return {
                 "id": user['id'],
                 "email": user['email'],
                 "name": user.get('full_name', user['email'].split('@')[0]),
@@ -291,7 +415,11 @@ def get_user_profile(user_id):
                 "role": user.get('role'),
                 "department": user.get('department'),
                 "position": user.get('position')
-            }), 200
+            }
+
+        response = cached_json_response(f"user:{user_id}", load_profile, ttl=USER_CACHE_TTL)
+        if response is not None:
+            return response
         return jsonify({"message": "User not found"}), 404
     except Exception as e:
         print(f"Error fetching user profile: {e}")
@@ -299,21 +427,19 @@ def get_user_profile(user_id):
 
 @app.route('/api/jobs', methods=['GET'])
 def get_all_jobs():
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
     try:
-        response = supabase.table('jobs').select('*').execute()
-        return jsonify(response.data if response.data else []), 200
+        return cached_json_response("jobs:all", repo.list_jobs)
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @app.route('/api/jobs/<user_id>', methods=['GET'])
 def get_user_jobs(user_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
     try:
-        response = supabase.table('jobs').select('*').eq('user_id', user_id).execute()
-        return jsonify(response.data if response.data else []), 200
+        return cached_json_response(f"jobs:user:{user_id}", lambda: repo.list_jobs(user_id))
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
@@ -327,12 +453,11 @@ def verify_otp():
     otp = data.get('otp')
     action = data.get('action', 'signup')
 
-    if not supabase:
+    if not repo:
         return jsonify({"message": "Database not connected. OTP verification is unavailable."}), 500
 
     try:
-        response = supabase.table('users').select('id', 'otp', 'is_verified', 'role', 'full_name', 'hr_id', 'department', 'position').eq('email', email).execute()
-        user = response.data[0] if response.data else None
+        user = repo.get_user_for_otp(email)
 
         if not user or user['otp'] != otp:
             return jsonify({"message": "Invalid OTP"}), 401
@@ -342,7 +467,7 @@ def verify_otp():
         if action == 'signup':
             update_data['is_verified'] = True
 
-        supabase.table('users').update(update_data).eq('email', email).execute()
+        repo.update_user_by_email(email, update_data)
 
         if action == 'signup':
             role_set = user.get('role') is not None
@@ -372,23 +497,22 @@ def forgot_password():
     data = request.json
     email = data.get('email')
 
-    if not supabase:
+    if not repo:
         return jsonify({"message": "Database not connected. Forgot password is unavailable."}), 500
 
     try:
-        response = supabase.table('users').select('id').eq('email', email).execute()
-        user = response.data[0] if response.data else None
+        user = repo.get_user_by_email(email)
 
         if not user:
             return jsonify({"message": "User not found"}), 404
 
         otp = generate_otp()
         # Store OTP in Supabase for the user
-        supabase.table('users').update({'otp': otp}).eq('email', email).execute()
+        repo.update_user_by_email(email, {'otp': otp})
 
-        send_otp_email(email, otp)
+        email_id = send_otp_email(email, otp, user['id'])
         print(f"Demo OTP for password reset for {email}: {otp}")
-        return jsonify({"message": "OTP sent to your email for password reset"}), 200
+        return jsonify({"message": "OTP sent to your email for password reset", "email_id": email_id}), 200
 
     except Exception as e:
         print(f"Supabase forgot password error: {e}")
@@ -401,19 +525,18 @@ def reset_password():
     email = data.get('email')
     new_password = data.get('new_password')
 
-    if not supabase:
+    if not repo:
         return jsonify({"message": "Database not connected. Password reset is unavailable."}), 500
 
     try:
-        response = supabase.table('users').select('id').eq('email', email).execute()
-        user = response.data[0] if response.data else None
+        user = repo.get_user_by_email(email)
 
         if not user:
             return jsonify({"message": "User not found"}), 404
 
         hashed_new_password = generate_password_hash(new_password)
         # Update password_hash in Supabase
-        supabase.table('users').update({'password_hash': hashed_new_password, 'otp': None}).eq('email', email).execute()
+        repo.update_user_by_email(email, {'password_hash': hashed_new_password, 'otp': None})
 
         return jsonify({"message": "Password reset successfully"}), 200
 
@@ -435,7 +558,7 @@ def select_role():
     if not email:
         return jsonify({"message": "User ID is required"}), 400
 
-    if not supabase:
+    if not repo:
         return jsonify({"message": "Database not connected. Role selection is unavailable."}), 500
 
     try:
@@ -447,9 +570,10 @@ def select_role():
             'position': position,
             'department': department
         }
-        response = supabase.table('users').update(update_data).eq('email', email).execute()
+        updated = repo.update_user_by_email(email, update_data)
+        invalidate_user_cache(updated)
 
-        if response.data:
+        if updated:
             return jsonify({"message": f"Role '{role}' and HR info updated for {email}"}), 200
         else:
             return jsonify({"message": "User not found or failed to update"}), 404
@@ -474,11 +598,11 @@ def save_job_requirements():
         location = data.get('location')
         job_type = data.get('job_type')
 
-        if not user_id or not job_description or not skills:
+        if not user_id or not job_title or not job_description or not skills:
             print("Missing required fields")
-            return jsonify({"message": "User ID, job description, and skills are required"}), 400
+            return jsonify({"message": "User ID, job title, job description, and skills are required"}), 400
 
-        if not supabase:
+        if not repo:
              return jsonify({"message": "Database not connected."}), 500
 
         # Insert into Supabase 'jobs' table
@@ -493,10 +617,11 @@ def save_job_requirements():
             'job_type': job_type
         }
         
-        response = supabase.table('jobs').insert(insert_data).execute()
+        job = repo.create_job(insert_data)
         
-        if response.data:
-            job_id = response.data[0]['id']
+        if job:
+            job_id = job['id']
+            invalidate_jobs_cache(user_id)
             print(f"Job requirements saved to DB with ID: {job_id}")
             
             try:
@@ -516,33 +641,54 @@ def save_job_requirements():
 # notifications_db replaced by Supabase 'notifications' table
 
 def create_notification(user_id, title, message, type='info'):
-    if not supabase:
+    if not notification_buffer:
         print("Supabase not connected. Skipping notification.")
         return
 
+    notification = {
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'type': type,
+        'read': False
+        # 'created_at' is handled by default in DB
+    }
+    notification_buffer.enqueue(notification)
+    print(f"Notification queued for user {user_id}: {title}")
+
+def encode_cursor(created_at, row_id):
+    # Opaque ?cursor= token for a (created_at, id) keyset position
+    return base64.urlsafe_b64encode(json.dumps([created_at, str(row_id)]).encode('utf-8')).decode('ascii')
+
+def decode_cursor(token):
+    # Returns the (created_at, id) pair, or None if the token is malformed
     try:
-        notification = {
-            'user_id': user_id,
-            'title': title,
-            'message': message,
-            'type': type,
-            'read': False
-            # 'created_at' is handled by default in DB
-        }
-        supabase.table('notifications').insert(notification).execute()
-        print(f"Notification created for user {user_id}: {title}")
-    except Exception as e:
-        print(f"Error creating notification in DB: {e}")
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    return (created_at, row_id) if isinstance(created_at, str) and isinstance(row_id, str) else None
 
 @app.route('/api/notifications/<user_id>', methods=['GET'])
 def get_notifications(user_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     try:
-        # Fetch notifications for user, sorted by newest first
-        response = supabase.table('notifications').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
-        user_notifications = response.data if response.data else []
+        # Without limit or cursor the whole list is returned, as before paging existed
+        limit = None
+        if 'limit' in request.args or 'cursor' in request.args:
+            limit = max(1, min(request.args.get('limit', NOTIFICATION_PAGE_SIZE, type=int), NOTIFICATION_MAX_PAGE_SIZE))
+        cursor = None
+        if request.args.get('cursor'):
+            cursor = decode_cursor(request.args['cursor'])
+            if cursor is None:
+                return jsonify({"message": "Invalid cursor"}), 400
+
+        # Fetch one page of notifications for user, sorted by newest first.
+        # One extra row tells us whether there is a next page.
+        user_notifications = repo.list_notifications(user_id, limit=None if limit is None else limit + 1, after=cursor)
+        has_more = limit is not None and len(user_notifications) > limit
+        user_notifications = user_notifications[:limit]
         
         # Map DB fields to frontend expected format if needed (e.g. created_at -> timestamp)
         formatted_notifications = []
@@ -556,18 +702,39 @@ def get_notifications(user_id):
                 'timestamp': n['created_at']
             })
             
-        return jsonify(formatted_notifications), 200
+        response = jsonify(formatted_notifications)
+        if has_more and formatted_notifications:
+            # Pass back as ?cursor= to fetch the next (older) page
+            last = formatted_notifications[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last['timestamp'], last['id'])
+        return response, 200
     except Exception as e:
         print(f"Error fetching notifications: {e}")
         return jsonify({"message": f"Error fetching notifications: {str(e)}"}), 500
 
+@app.route('/api/notifications/<user_id>/unread_count', methods=['GET'])
+def get_unread_notification_count(user_id):
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+
+    try:
+        count = unread_count_cache.get(user_id)
+        if count is None:
+            count = repo.count_unread_notifications(user_id)
+            unread_count_cache.set(user_id, count)
+        return jsonify({"unread_count": count}), 200
+    except Exception as e:
+        print(f"Error counting unread notifications: {e}")
+        return jsonify({"message": f"Error counting notifications: {str(e)}"}), 500
+
 @app.route('/api/notifications/<user_id>/<notification_id>/read', methods=['POST'])
 def mark_notification_read(user_id, notification_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     try:
-        supabase.table('notifications').update({'read': True}).eq('id', notification_id).eq('user_id', user_id).execute()
+        repo.mark_notification_read(user_id, notification_id)
+        unread_count_cache.invalidate(user_id)
         return jsonify({"message": "Notification marked as read"}), 200
     except Exception as e:
         print(f"Error marking notification as read: {e}")
@@ -575,17 +742,20 @@ def mark_notification_read(user_id, notification_id):
 
 @app.route('/api/notifications/<user_id>/read_all', methods=['POST'])
 def mark_all_notifications_read(user_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     try:
-        supabase.table('notifications').update({'read': True}).eq('user_id', user_id).execute()
+        repo.mark_all_notifications_read(user_id)
+        unread_count_cache.invalidate(user_id)
         return jsonify({"message": "All notifications marked as read"}), 200
     except Exception as e:
         print(f"Error marking all notifications as read: {e}")
         return jsonify({"message": f"Error updating notifications: {str(e)}"}), 500
 
 @app.route('/api/upload_resumes', methods=['POST'])
+@admit('ingest')
+@profile_request('upload_resumes')
 def upload_resumes():
     try:
         if 'files' not in request.files:
@@ -598,7 +768,7 @@ def upload_resumes():
         
         print(f"Received {len(files)} files for upload from user {user_id}")
         
-        if not supabase:
+        if not repo:
              return jsonify({"message": "Database not connected."}), 500
 
         for file in files:
@@ -606,16 +776,17 @@ def upload_resumes():
                 continue
 
             if file and allowed_file(file.filename):
+                temp_path = None
                 try:
                     filename = secure_filename(file.filename)
-                    # Use UUID to prevent overwrites, but keep original extension
-                    unique_filename = f"{uuid.uuid4()}_{filename}"
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(filepath)
-                    print(f"Saved file: {filepath}")
+                    # Spool to a temp file first; it is moved into content-addressed storage
+                    # once text extraction succeeds
+                    with storage.temp_file(suffix=os.path.splitext(filename)[1].lower()) as tmp:
+                        file.save(tmp)
+                        temp_path = tmp.name
 
                     # Extract text
-                    raw_text = extract_text_from_file(filepath)
+                    raw_text = extract_text_from_file(temp_path)
                     if not raw_text:
                         error_msg = f"Failed to extract text from {filename}"
                         print(error_msg)
@@ -631,22 +802,31 @@ def upload_resumes():
                     # Categorize resume
                     categorized_field = categorize_resume(processed_text)
 
+                    storage_key = storage.store(temp_path, filename)
+                    temp_path = None
+                    print(f"Stored file {filename} as {storage_key}")
+
                     # Insert into Supabase 'resumes' table
                     insert_data = {
                         'user_id': user_id,
                         'filename': filename,
-                        'filepath': unique_filename, # Store unique filename
+                        'filepath': storage_key, # Content-addressed storage key
                         'raw_text': raw_text,
                         'processed_text': processed_text,
                         'extracted_skills': extracted_skills,
-                        'categorized_field': categorized_field
+                        'categorized_field': categorized_field,
+                        'pipeline_versions': PIPELINE_VERSIONS
                     }
                     
-                    response = supabase.table('resumes').insert(insert_data).execute()
+                    resume = repo.create_resume(insert_data)
 
-                    if response.data:
-                        resume_id = response.data[0]['id']
+                    if resume:
+                        resume_id = resume['id']
                         resume_ids.append(resume_id)
+                        search_index.add(resume_id, processed_text, user_id)
+                        skill_index.add(resume_id, extracted_skills, user_id)
+                        dedup_index.add(resume_id, processed_text, user_id)
+                        metrics.inc(ITEMS_TOTAL, kind='resumes_uploaded')
                         print(f"Processed resume {resume_id}: {filename}")
                     else:
                         error_msg = f"Failed to save resume metadata for {filename}"
@@ -660,9 +840,14 @@ def upload_resumes():
                     traceback.print_exc()
                     errors.append(error_msg)
                     continue
+                finally:
+                    if temp_path and os.path.exists(temp_path):
+                        os.remove(temp_path)
             else:
                 errors.append(f"File type not allowed: {file.filename}")
 
+        metrics.inc(ITEMS_TOTAL, len(errors), kind='upload_errors')
+
         if not resume_ids:
             msg = "No valid resumes were processed."
             if errors:
@@ -677,24 +862,215 @@ def upload_resumes():
         return jsonify({"message": f"An error occurred during upload: {str(e)}"}), 500
 
 
+# === Bulk archive upload ===
+ZIP_WORKERS = int(os.environ.get("ZIP_WORKERS", 4))
+ZIP_INSERT_BATCH = 100
+ZIP_MIMETYPES = {'application/zip', 'application/x-zip-compressed', 'application/octet-stream'}
+zip_executor = ThreadPoolExecutor(max_workers=ZIP_WORKERS, thread_name_prefix='zip-ingest')
+
+
+def ingest_member(data, filename, user_id):
+    # The upload pipeline for one in-memory file: returns the resumes row to insert, or raises
+    raw_text = extract_text_from_bytes(data, filename)
+    if not raw_text:
+        raise ValueError("no text could be extracted")
+    processed_text = preprocess_text(raw_text)
+    row = {
+        'user_id': user_id,
+        'filename': filename,
+        'raw_text': raw_text,
+        'processed_text': processed_text,
+        'extracted_skills': extract_skills_from_text(processed_text),
+        'categorized_field': categorize_resume(processed_text),
+        'pipeline_versions': PIPELINE_VERSIONS,
+    }
+    with storage.temp_file(suffix=os.path.splitext(filename)[1].lower()) as tmp:
+        tmp.write(data)
+        temp_path = tmp.name
+    try:
+        row['filepath'] = storage.store(temp_path, filename)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return row
+
+
+@app.route('/api/upload_resumes/zip', methods=['POST'])
+@admit('ingest')
+@profile_request('upload_resumes_zip')
+def upload_resumes_zip():
+    """
+    Ingest one ZIP of PDF/DOCX resumes, sent as multipart field 'archive' or as an
+    application/zip body. Members are parsed in parallel on ZIP_WORKERS threads and
+    inserted in batches; the response has a result for every member.
+    """
+    # Refuse oversized bodies before Werkzeug parses (and spools) a multipart upload
+    request.max_content_length = ZIP_MAX_ARCHIVE_BYTES
+    try:
+        user_id = request.form.get('user_id') or request.args.get('user_id')
+        upload = request.files.get('archive')
+    except RequestEntityTooLarge:
+        return jsonify({"message": f"Archive is larger than {ZIP_MAX_ARCHIVE_BYTES} bytes"}), 413
+    if not repo:
+        return jsonify({"message": "Database not connected."}), 500
+
+    spooled = None
+    try:
+        if upload is not None:
+            source = upload.stream
+        elif request.mimetype in ZIP_MIMETYPES:
+            spooled = tempfile.TemporaryFile(dir=getattr(storage, 'tmp_dir', None))
+            spool(request.stream, spooled)
+            source = spooled
+        else:
+            return jsonify({"message": "Send the archive as multipart field 'archive' or as an application/zip body"}), 400
+
+        archive, infos = open_archive(source)
+        with archive:
+            results, resume_ids = _ingest_archive(archive, infos, user_id)
+    except ArchiveError as e:
+        return jsonify({"message": str(e)}), e.status
+    except RequestEntityTooLarge:
+        return jsonify({"message": f"Archive is larger than {ZIP_MAX_ARCHIVE_BYTES} bytes"}), 413
+    finally:
+        if spooled is not None:
+            spooled.close()
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    metrics.inc(ITEMS_TOTAL, len(resume_ids), kind='resumes_uploaded')
+    metrics.inc(ITEMS_TOTAL, counts.get('error', 0), kind='upload_errors')
+    print(f"Archive upload from user {user_id}: {len(infos)} members, {counts}")
+
+    body = {"resume_ids": resume_ids, "counts": counts, "members": results}
+    if not resume_ids:
+        body["message"] = "No valid resumes were processed."
+        return jsonify(body), 400
+    body["message"] = "Resumes uploaded successfully"
+    return jsonify(body), 201
+
+
+def _ingest_archive(archive, infos, user_id):
+    results = []
+    resume_ids = []
+    in_flight = deque()          # (result, future) in archive order
+    parsed = []                  # (result, row) waiting for the next batched insert
+
+    def flush():
+        if not parsed:
+            return
+        batch = parsed[:]
+        parsed.clear()
+        try:
+            rows = repo.create_resumes([row for _, row in batch])
+        except Exception as e:
+            print(f"Failed to save a batch of {len(batch)} archive members: {e}")
+            rows = []
+        if len(rows) != len(batch):
+            for result, _ in batch:
+                result.update(status='error', error="Failed to save resume metadata")
+            return
+        for (result, row), saved in zip(batch, rows):
+            result.update(status='ok', resume_id=saved['id'])
+            resume_ids.append(saved['id'])
+        search_index.add_many([(saved['id'], row['processed_text'], user_id) for (_, row), saved in zip(batch, rows)])
+        skill_index.add_many([(saved['id'], row['extracted_skills'], user_id) for (_, row), saved in zip(batch, rows)])
+        dedup_index.add_many([(saved['id'], row['processed_text'], user_id) for (_, row), saved in zip(batch, rows)])
+
+    def collect(result, future):
+        try:
+            parsed.append((result, future.result()))
+        except Exception as e:
+            result.update(status='error', error=str(e))
+        if len(parsed) >= ZIP_INSERT_BATCH:
+            flush()
+
+    # Members are decompressed on this thread, at most 2 x ZIP_WORKERS ahead of the parsers,
+    # so memory stays bounded however large the archive is
+    for info, data, reason in iter_members(archive, infos):
+        result = {'name': info.filename, 'size': info.file_size}
+        results.append(result)
+        if data is None:
+            result.update(status='skipped', reason=reason)
+            continue
+        extension = os.path.splitext(info.filename)[1].lower()
+        filename = secure_filename(os.path.basename(info.filename))
+        if not filename.lower().endswith(extension):  # e.g. a name with no ASCII letters left
+            filename = f"resume{extension}"
+        in_flight.append((result, zip_executor.submit(ingest_member, data, filename, user_id)))
+        while len(in_flight) >= 2 * ZIP_WORKERS:
+            collect(*in_flight.popleft())
+    while in_flight:
+        collect(*in_flight.popleft())
+    flush()
+    return results, resume_ids
+
+
+# Fields a screening result can carry. raw_text is opt-in because it dominates the
+# payload size; clients fetch it lazily through /api/resume/<id>.
+SCREENING_RESULT_FIELDS = ['job_id', 'resume_id', 'filename', 'filepath', 'raw_text', 'match_score',
+                           'matched_skills', 'department', 'experience_level', 'categorized_field']
+DEFAULT_SCREENING_RESULT_FIELDS = [f for f in SCREENING_RESULT_FIELDS if f != 'raw_text']
+
+def parse_fields(requested, allowed, default):
+    # Accepts "a,b,c", a list, or "all"; unknown names are ignored
+    if not requested:
+        return list(default)
+    if isinstance(requested, str):
+        if requested.strip().lower() == 'all':
+            return list(allowed)
+        requested = requested.split(',')
+    wanted = {f.strip() for f in requested if isinstance(f, str)}
+    return [f for f in allowed if f in wanted] or list(default)
+
 @app.route('/api/screen_resumes', methods=['POST'])
+@admit('screen')
+@profile_request('screen_resumes')
 def screen_resumes():
     try:
         data = request.json
-        print(f"Received screening request: {data}") # Debug logging
+        print(f"Received screening request for job {data.get('job_id')} with {len(data.get('resume_ids') or [])} resumes") # Debug logging
         
         job_id = data.get('job_id')
         resume_ids = data.get('resume_ids')
+        fields = parse_fields(request.args.get('fields') or data.get('fields'),
+                              SCREENING_RESULT_FIELDS, DEFAULT_SCREENING_RESULT_FIELDS)
 
         if not job_id or not resume_ids:
             return jsonify({"message": "Job ID and Resume IDs are required"}), 400
 
-        if not supabase:
+        if not repo:
              return jsonify({"message": "Database not connected."}), 500
 
-        # Fetch job requirements from Supabase
-        job_response = supabase.table('jobs').select('*').eq('id', job_id).execute()
-        job_req = job_response.data[0] if job_response.data else None
+        # Optional must-have skills: resumes the skill index rules out are never loaded or scored
+        required_skill_filter = parse_skill_list(data.get('required_skills'))
+        skipped_ids = []
+        if required_skill_filter:
+            resume_ids, skipped_ids = skill_index.filter_ids(dict.fromkeys(resume_ids), required_skill_filter)
+            if skipped_ids:
+                # The index only picks up new uploads, so skills rewritten in place (reindex.py)
+                # are not in it: confirm what it ruled out against the stored skills
+                required_set = set(required_skill_filter)
+                qualified = {str(r['id']) for r in repo.get_resume_skills(skipped_ids)
+                             if required_set <= set(parse_skill_list(r['extracted_skills']))}
+                resume_ids += [rid for rid in skipped_ids if str(rid) in qualified]
+                skipped_ids = [rid for rid in skipped_ids if str(rid) not in qualified]
+
+        # Optionally score one resume per near-duplicate cluster; the others are listed
+        # under their representative's result instead of being scored again
+        collapsed = {}
+        collapse_duplicates = data.get('collapse_duplicates', SCREEN_COLLAPSE_DUPLICATES)
+        if collapse_duplicates:
+            resume_ids, collapsed = dedup_index.collapse(resume_ids)
+
+        # Fetch the job and all resumes in one batch: one "in" query per table, issued together
+        batch = repo.batch()
+        job_lookup = batch.get('jobs', job_id, JOB_SCREENING_COLUMNS)
+        resume_columns = RESUME_SCREENING_COLUMNS + (', raw_text' if 'raw_text' in fields else '')
+        resume_lookups = [batch.get('resumes', rid, resume_columns) for rid in dict.fromkeys(resume_ids)]
+        batch.execute()
+        job_req = job_lookup.result
 
         if not job_req:
             return jsonify({"message": "Job requirements not found."}), 404
@@ -706,12 +1082,20 @@ def screen_resumes():
         experience_required = job_req['experience_required']
 
         results = []
-        
-        # Fetch resumes from Supabase
-        # Supabase 'in' filter expects a tuple or list
-        resumes_response = supabase.table('resumes').select('*').in_('id', resume_ids).execute()
-        resumes_data = resumes_response.data if resumes_response.data else []
-
+        result_rows = []
+        resumes_data = [lookup.result for lookup in resume_lookups if lookup.result]
+        if required_skill_filter:
+            # Exact check for resumes the index had not seen yet
+            required_set = set(required_skill_filter)
+            matching = []
+            for resume_data in resumes_data:
+                if required_set <= set(parse_skill_list(resume_data['extracted_skills'])):
+                    matching.append(resume_data)
+                else:
+                    skipped_ids.append(resume_data['id'])
+            resumes_data = matching
+
+        prefetch_embeddings([job_description_text] + [r['processed_text'] or '' for r in resumes_data])
         for resume_data in resumes_data:
             resume_id = resume_data['id']
             resume_processed_text = resume_data['processed_text']
@@ -719,22 +1103,20 @@ def screen_resumes():
             resume_categorized_field = resume_data['categorized_field']
 
             try:
-                # Call the enhanced match score function
-                match_score, matched_skills = calculate_match_score_enhanced(
+                # Score components are stored with the result so it can be re-weighted later
+                components = calculate_match_components(
                     job_description_text,
                     required_skills,
                     experience_required,
                     resume_processed_text,
-                    resume_extracted_skills,
-                    HF_API_KEY
+                    resume_extracted_skills
                 )
+                matched_skills = components['matched_skills']
+                match_score = combine_scores(components['semantic'], components['skill'], components['experience'])
 
-                department_match_factor = 1.0
-                if required_department and required_department.lower() in resume_processed_text.lower():
-                    department_match_factor = 1.05
-
-                final_score = int(match_score * department_match_factor)
-                final_score = min(final_score, 100)
+                department_match = bool(required_department) and \
+                    required_department.lower() in resume_processed_text.lower()
+                final_score = int(apply_department_bonus(match_score, department_match))
                 
                 # Insert into Supabase 'screening_results' table
                 result_data = {
@@ -742,31 +1124,33 @@ def screen_resumes():
                     'resume_id': resume_id,
                     'match_score': final_score,
                     'matched_skills': matched_skills,
-                    'department_match': str(department_match_factor > 1.0), # Store as string or boolean
+                    'department_match': str(department_match), # Store as string or boolean
                     'experience_level': experience_required,
-                    'categorized_field': resume_categorized_field
+                    'categorized_field': resume_categorized_field,
+                    'semantic_score': components['semantic'],
+                    'skill_score': components['skill'],
+                    'experience_score': components['experience']
                 }
                 
-                # Check if result already exists to avoid duplicates (optional, but good practice)
-                # For now, we'll just insert a new record or update if we had a unique constraint
-                # Let's just insert for simplicity as per schema
-                insert_res = supabase.table('screening_results').insert(result_data).execute()
-                
-                if insert_res.data:
-                    # Construct result object for frontend
-                    frontend_result = {
-                        'job_id': job_id,
-                        'resume_id': resume_id,
-                        'filename': resume_data['filename'],
-                        'filepath': resume_data['filepath'],
-                        'raw_text': resume_data['raw_text'],
-                        'match_score': final_score,
-                        'matched_skills': matched_skills,
-                        'department': required_department,
-                        'experience_level': experience_required,
-                        'categorized_field': resume_categorized_field
-                    }
-                    results.append(frontend_result)
+                result_rows.append(result_data)
+
+                # Construct result object for frontend
+                frontend_result = {
+                    'job_id': job_id,
+                    'resume_id': resume_id,
+                    'filename': resume_data['filename'],
+                    'filepath': resume_data['filepath'],
+                    'raw_text': resume_data.get('raw_text'),
+                    'match_score': final_score,
+                    'matched_skills': matched_skills,
+                    'department': required_department,
+                    'experience_level': experience_required,
+                    'categorized_field': resume_categorized_field
+                }
+                result = {f: frontend_result[f] for f in fields}
+                if collapse_duplicates:
+                    result['duplicates'] = collapsed.get(str(resume_id), [])
+                results.append(result)
 
             except Exception as e:
                 print(f"Error screening resume {resume_id}: {e}")
@@ -774,6 +1158,12 @@ def screen_resumes():
                 traceback.print_exc()
                 # Continue with other resumes even if one fails
                 continue
+
+        # Insert all 'screening_results' rows in a single round-trip
+        if result_rows and not repo.insert_screening_results(result_rows):
+            return jsonify({"message": "Failed to save screening results."}), 500
+        metrics.inc(ITEMS_TOTAL, len(result_rows), kind='resumes_screened')
+        analytics.record_results(result_rows, {str(job_id): job_req.get('user_id')})
         
         # Notify user
         if job_req.get('user_id'):
@@ -782,23 +1172,221 @@ def screen_resumes():
             except Exception as e:
                 print(f"Notification error: {e}")
 
-        return jsonify({"message": "Screening complete", "results": results}), 200
+        response = {"message": "Screening complete", "results": results}
+        if required_skill_filter:
+            response["skipped_missing_skills"] = len(skipped_ids)
+        if collapse_duplicates:
+            response["collapsed_duplicates"] = sum(len(ids) for ids in collapsed.values())
+        return jsonify(response), 200
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({"message": f"An error occurred during screening: {str(e)}"}), 500
+
+MATRIX_MAX_JOBS = 50
+MATRIX_TOP_N = 20
+
+@app.route('/api/screen_resumes/multi', methods=['POST'])
+@admit('screen')
+@profile_request('screen_resumes_multi')
+def screen_resumes_multi():
+    # Score one resume pool against several jobs at once: resume-side work (embeddings,
+    # skill and experience parsing) is done once and the scores come out as a matrix.
+    data = request.json or {}
+    try:
+        top_n = MATRIX_TOP_N if data.get('top_n') is None else int(data['top_n'])
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid top_n: {e}"}), 400
+    if top_n < 1:
+        return jsonify({"message": "top_n must be at least 1"}), 400
+    top_n = min(top_n, 1000)
+
+    try:
+        job_ids = list(dict.fromkeys(data.get('job_ids') or []))
+        resume_ids = list(dict.fromkeys(data.get('resume_ids') or []))
+        print(f"Received multi-job screening request for {len(job_ids)} jobs and {len(resume_ids)} resumes")
+
+        if not job_ids or not resume_ids:
+            return jsonify({"message": "Job IDs and Resume IDs are required"}), 400
+        if len(job_ids) > MATRIX_MAX_JOBS:
+            return jsonify({"message": f"At most {MATRIX_MAX_JOBS} jobs per request"}), 400
+
+        if not repo:
+             return jsonify({"message": "Database not connected."}), 500
+
+        batch = repo.batch()
+        job_lookups = [batch.get('jobs', jid, JOB_MATRIX_COLUMNS) for jid in job_ids]
+        resume_lookups = [batch.get('resumes', rid, RESUME_SCREENING_COLUMNS) for rid in resume_ids]
+        batch.execute()
+
+        errors = []
+        jobs = []
+        for lookup in job_lookups:
+            if not lookup.result:
+                errors.append({"job_id": lookup.key, "message": "Job requirements not found."})
+                continue
+            try:
+                parse_experience_required(lookup.result['experience_required'])
+            except ValueError:
+                errors.append({"job_id": lookup.key, "message": "Unreadable experience_required."})
+                continue
+            jobs.append(lookup.result)
+        resumes_data = [lookup.result for lookup in resume_lookups if lookup.result]
+        if not jobs or not resumes_data:
+            return jsonify({"message": "No jobs or resumes found to screen.", "errors": errors}), 404
+
+        matrix = calculate_match_matrix(jobs, resumes_data)
+
+        # Same department bonus and rounding as /api/screen_resumes, applied to the whole matrix
+        resume_texts = [(r['processed_text'] or '').lower() for r in resumes_data]
+        department_match = np.array([[bool(job['department']) and job['department'].lower() in text
+                                      for job in jobs] for text in resume_texts], dtype=bool)
+        final_scores = apply_department_bonus(matrix.scores, department_match)
+
+        result_rows = []
+        for r, resume_data in enumerate(resumes_data):
+            for j, job in enumerate(jobs):
+                result_rows.append({
+                    'job_id': job['id'],
+                    'resume_id': resume_data['id'],
+                    'match_score': int(final_scores[r, j]),
+                    'matched_skills': matrix.matched_skills(r, j),
+                    'department_match': str(bool(department_match[r, j])),
+                    'experience_level': job['experience_required'],
+                    'categorized_field': resume_data['categorized_field'],
+                    'semantic_score': float(matrix.semantic[r, j]),
+                    'skill_score': float(matrix.skill[r, j]),
+                    'experience_score': float(matrix.experience[r, j])
+                })
+        if not repo.insert_screening_results(result_rows):
+            return jsonify({"message": "Failed to save screening results."}), 500
+        metrics.inc(ITEMS_TOTAL, len(result_rows), kind='resumes_screened')
+        analytics.record_results(result_rows, {str(job['id']): job.get('user_id') for job in jobs})
+
+        rankings = []
+        for j, job in enumerate(jobs):
+            order = np.argsort(-final_scores[:, j], kind='stable')[:top_n]
+            rankings.append({
+                'job_id': job['id'],
+                'title': job.get('title'),
+                'department': job['department'],
+                'results': [{
+                    'resume_id': resumes_data[r]['id'],
+                    'filename': resumes_data[r]['filename'],
+                    'match_score': int(final_scores[r, j]),
+                    'matched_skills': matrix.matched_skills(r, j),
+                    'categorized_field': resumes_data[r]['categorized_field'],
+                } for r in order],
+            })
+
+        best_jobs = final_scores.argmax(axis=1)
+        candidates = [{
+            'resume_id': resume_data['id'],
+            'filename': resume_data['filename'],
+            'best_job_id': jobs[best_jobs[r]]['id'],
+            'best_score': int(final_scores[r, best_jobs[r]]),
+            'scores': {job['id']: int(final_scores[r, j]) for j, job in enumerate(jobs)},
+        } for r, resume_data in enumerate(resumes_data)]
+
+        for user_id in {job['user_id'] for job in jobs if job.get('user_id')}:
+            try:
+                owned = sum(1 for job in jobs if job.get('user_id') == user_id)
+                create_notification(user_id, "Screening Completed",
+                                    f"Screened {len(resumes_data)} resumes against {owned} of your jobs.")
+            except Exception as e:
+                print(f"Notification error: {e}")
+
+        return jsonify({"message": "Screening complete", "jobs": rankings,
+                        "candidates": candidates, "errors": errors}), 200
 
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({"message": f"An error occurred during screening: {str(e)}"}), 500
 
+@app.route('/api/jobs/<job_id>/rerank', methods=['POST'])
+def rerank_job_results(job_id):
+    # Re-weight the stored score components of every result for a job; no model calls.
+    # Body: {"weights": {"semantic": .., "skill": .., "experience": ..}, "department_bonus": 1.05, "top_n": 50}
+    data = request.json or {}
+    weights = dict(DEFAULT_WEIGHTS)
+    try:
+        for name, value in (data.get('weights') or {}).items():
+            if name not in weights:
+                raise ValueError(f"unknown weight '{name}'")
+            weights[name] = float(value)
+        department_bonus = float(data.get('department_bonus', DEPARTMENT_BONUS))
+        top_n = None if data.get('top_n') is None else int(data['top_n'])
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({"message": f"Invalid re-rank parameters: {e}"}), 400
+    if top_n is not None:
+        if top_n < 1:
+            return jsonify({"message": "top_n must be at least 1"}), 400
+        top_n = min(top_n, 1000)
+    values = list(weights.values()) + [department_bonus]
+    if any(not np.isfinite(v) or v < 0 for v in values) or sum(weights.values()) <= 0:
+        return jsonify({"message": "Weights must be non-negative and not all zero"}), 400
+
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+
+    try:
+        # A resume screened more than once keeps only its latest result
+        latest = {}
+        for row in repo.get_screening_components(job_id):
+            latest.setdefault(row['resume_id'], row)
+        rows = [row for row in latest.values()
+                if None not in (row['semantic_score'], row['skill_score'], row['experience_score'])]
+        if not rows:
+            return jsonify({"message": "No screening results with stored score components for this job. "
+                                       "Screen the resumes again to enable re-ranking."}), 404
+
+        semantic = np.array([row['semantic_score'] for row in rows], dtype=float)
+        skill = np.array([row['skill_score'] for row in rows], dtype=float)
+        experience = np.array([row['experience_score'] for row in rows], dtype=float)
+        department_match = np.array([str(row['department_match']).lower() == 'true' for row in rows], dtype=bool)
+        scores = apply_department_bonus(combine_scores(semantic, skill, experience, weights),
+                                        department_match, department_bonus)
+
+        order = np.argsort(-scores, kind='stable')
+        if top_n is not None:
+            order = order[:top_n]
+        results = []
+        for i in order:
+            row = rows[i]
+            resume_info = row.get('resumes') or {}
+            results.append({
+                'resume_id': row['resume_id'],
+                'filename': resume_info.get('filename'),
+                'categorized_field': resume_info.get('categorized_field'),
+                'match_score': int(scores[i]),
+                'previous_score': row['match_score'],
+                'matched_skills': row['matched_skills'],
+                'department_match': bool(department_match[i]),
+                'components': {'semantic': semantic[i], 'skill': skill[i], 'experience': experience[i]},
+            })
+        return jsonify({
+            "job_id": job_id,
+            "weights": weights,
+            "department_bonus": department_bonus,
+            "total": len(rows),
+            "missing_components": len(latest) - len(rows),
+            "results": results,
+        }), 200
+    except Exception as e:
+        print(f"Error re-ranking results for job {job_id}: {e}")
+        return jsonify({"message": f"Error re-ranking results: {str(e)}"}), 500
+
 @app.route('/api/dashboard_data', methods=['GET'])
 def get_dashboard_data():
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     try:
         # Fetch all screening results
         # In a real app, you'd filter by user_id or job_id
-        response = supabase.table('screening_results').select('*, resumes(filename, categorized_field)').execute()
-        results = response.data if response.data else []
+        results = repo.get_dashboard_results()
 
         sort_by = request.args.get('sort_by', 'score')
         if sort_by == 'score':
@@ -827,48 +1415,212 @@ def get_dashboard_data():
         print(f"Error fetching dashboard data: {e}")
         return jsonify({"message": f"Error fetching data: {str(e)}"}), 500
 
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+
+    job_id = request.args.get('job_id')
+    user_id = request.args.get('user_id')
+    if bool(job_id) == bool(user_id):
+        return jsonify({"message": "Pass exactly one of job_id or user_id."}), 400
+    bins = min(max(request.args.get('bins', 10, type=int), 1), 100)
+    top_skills = min(max(request.args.get('top_skills', 20, type=int), 1), 200)
+
+    try:
+        if job_id:
+            data = analytics.for_job(job_id, bins, top_skills)
+        else:
+            data = analytics.for_user(user_id, bins, top_skills)
+        return jsonify(dict(data, job_id=job_id, user_id=user_id)), 200
+    except Exception as e:
+        print(f"Error computing analytics: {e}")
+        return jsonify({"message": f"Error computing analytics: {str(e)}"}), 500
+
 @app.route('/api/resume/<resume_id>', methods=['GET'])
 def get_resume_raw_text(resume_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
     
     try:
-        response = supabase.table('resumes').select('raw_text').eq('id', resume_id).execute()
-        if response.data:
-            return jsonify({"content": response.data[0]['raw_text']}), 200
+        resume = repo.get_resume_raw_text(resume_id)
+        if resume and resume.get('text_purged_at'):
+            return jsonify({"message": "The text of this resume was removed by the retention policy."}), 410
+        if resume:
+            return jsonify({"content": resume['raw_text']}), 200
         return jsonify({"message": "Resume not found"}), 404
     except Exception as e:
         print(f"Error fetching resume text: {e}")
         return jsonify({"message": "Error fetching resume"}), 500
 
+@app.route('/api/resumes/search', methods=['GET'])
+def search_resumes():
+    # ?q=kafka AND (python OR scala) NOT intern&page=1&page_size=20[&user_id=...]
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"message": "Query parameter 'q' is required"}), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = min(max(request.args.get('page_size', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_PAGE_SIZE)
+
+    try:
+        started = time.perf_counter()
+        total, hits, terms = search_index.search(query, limit=page_size, offset=(page - 1) * page_size,
+                                                 user_id=request.args.get('user_id'))
+        # Only the current page is read back from the database, for filenames and snippets
+        rows = {str(r['id']): r for r in repo.get_resumes_for_screening([resume_id for resume_id, _ in hits])}
+        results = []
+        for resume_id, score in hits:
+            row = rows.get(resume_id)
+            if not row:
+                continue
+            results.append({
+                'resume_id': resume_id,
+                'filename': row['filename'],
+                'categorized_field': row['categorized_field'],
+                'extracted_skills': row['extracted_skills'],
+                'score': round(score, 4),
+                'highlight': highlight(row['processed_text'], terms),
+            })
+        return jsonify({
+            "query": query,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }), 200
+    except QueryError as e:
+        return jsonify({"message": f"Invalid query: {e}"}), 400
+    except Exception as e:
+        print(f"Error searching resumes: {e}")
+        return jsonify({"message": "Error searching resumes"}), 500
+
+@app.route('/api/resumes/duplicates', methods=['GET'])
+def get_duplicate_clusters():
+    # ?user_id=...&threshold=0.85: clusters of near-duplicate resumes, newest upload first
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+    threshold = request.args.get('threshold', type=float)
+    if threshold is not None and not 0 < threshold <= 1:
+        return jsonify({"message": "'threshold' must be in (0, 1]"}), 400
+    try:
+        clusters = dedup_index.clusters(user_id=request.args.get('user_id'), threshold=threshold)
+        return jsonify({
+            "clusters": clusters,
+            "total_clusters": len(clusters),
+            "duplicates": sum(len(members) - 1 for members in clusters),
+        }), 200
+    except Exception as e:
+        print(f"Error finding duplicate resumes: {e}")
+        return jsonify({"message": "Error finding duplicate resumes"}), 500
+
+@app.route('/api/resume/<resume_id>/duplicates', methods=['GET'])
+def get_resume_duplicates(resume_id):
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+    threshold = request.args.get('threshold', type=float)
+    if threshold is not None and not 0 < threshold <= 1:
+        return jsonify({"message": "'threshold' must be in (0, 1]"}), 400
+    try:
+        matches = dedup_index.near_duplicates(resume_id, threshold=threshold)
+        return jsonify({
+            "resume_id": resume_id,
+            "duplicates": [{"resume_id": rid, "similarity": round(sim, 4)} for rid, sim in matches],
+        }), 200
+    except Exception as e:
+        print(f"Error finding duplicates of resume {resume_id}: {e}")
+        return jsonify({"message": "Error finding duplicate resumes"}), 500
+
+@app.route('/api/skills/query', methods=['GET'])
+def query_resumes_by_skills():
+    # ?all=docker,kubernetes&any=python,go&none=php[&user_id=...&limit=100&offset=0]
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+
+    all_skills = parse_skill_list(request.args.get('all'))
+    any_skills = parse_skill_list(request.args.get('any'))
+    none_skills = parse_skill_list(request.args.get('none'))
+    if not (all_skills or any_skills or none_skills):
+        return jsonify({"message": "At least one of 'all', 'any' or 'none' is required"}), 400
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    try:
+        total, resume_ids = skill_index.query(all_skills, any_skills, none_skills,
+                                              user_id=request.args.get('user_id'), limit=limit, offset=offset)
+        return jsonify({"total": total, "resume_ids": resume_ids, "limit": limit, "offset": offset}), 200
+    except Exception as e:
+        print(f"Error querying skills: {e}")
+        return jsonify({"message": "Error querying skills"}), 500
+
+@app.route('/api/skills/counts', methods=['GET'])
+def get_skill_counts():
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+    try:
+        counts = skill_index.counts(user_id=request.args.get('user_id'))
+        return jsonify({"skills": counts}), 200
+    except Exception as e:
+        print(f"Error counting skills: {e}")
+        return jsonify({"message": "Error counting skills"}), 500
+
+@app.route('/api/jobs/<job_id>/results/export', methods=['GET'])
+def export_job_results(job_id):
+    if not repo:
+         return jsonify({"message": "Database not connected."}), 500
+
+    fmt = (request.args.get('format') or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt == 'parquet' and not parquet_available():
+        return jsonify({"message": "Parquet export needs pyarrow installed on the server."}), 501
+    # No larger than one PostgREST response (max-rows)
+    page_size = min(max(request.args.get('page_size', EXPORT_PAGE_SIZE, type=int), 1), DB_PAGE_SIZE)
+
+    try:
+        if not repo.get_job_for_screening(job_id):
+            return jsonify({"message": "Job not found."}), 404
+        # Read the first page before answering so a database error is still a clean 500
+        pages = iter_pages(repo, job_id, page_size)
+        first_page = next(pages, None)
+        pages = itertools.chain([first_page], pages) if first_page is not None else iter(())
+    except Exception as e:
+        print(f"Error exporting results for job {job_id}: {e}")
+        return jsonify({"message": f"Error exporting results: {str(e)}"}), 500
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    response = Response(stream_export(pages, fmt, label=f"export job {job_id}"), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=results_{job_id}.{extension}'
+    return response
+
 @app.route('/api/download_all_resumes/<job_id>', methods=['GET'])
 def download_all_resumes_for_job(job_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     try:
         # Fetch resumes linked to this job via screening_results
-        response = supabase.table('screening_results').select('resume_id, resumes(filename, filepath)').eq('job_id', job_id).execute()
-        results = response.data if response.data else []
+        results = repo.get_job_resume_files(job_id)
 
         if not results:
             return jsonify({"message": "No resumes found for this job ID."}), 404
 
-        memory_file = BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for res in results:
-                resume_info = res.get('resumes', {})
-                unique_filename_on_server = resume_info.get('filepath')
-                original_filename = resume_info.get('filename')
-
-                if unique_filename_on_server and original_filename:
-                    full_filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename_on_server)
-                    if os.path.exists(full_filepath):
-                        zf.write(full_filepath, arcname=original_filename)
-
-        memory_file.seek(0)
-        response = make_response(memory_file.getvalue())
-        response.headers['Content-Type'] = 'application/zip'
+        entries = []
+        for res in results:
+            resume_info = res.get('resumes', {})
+            unique_filename_on_server = resume_info.get('filepath')
+            original_filename = resume_info.get('filename')
+
+            if unique_filename_on_server and original_filename:
+                source = storage.source(unique_filename_on_server)
+                if source:
+                    entries.append((source, original_filename))
+
+        print(f"Streaming {len(entries)} resumes for job {job_id}")
+        response = Response(stream_zip(entries, label=f"download job {job_id}"), mimetype='application/zip')
         response.headers['Content-Disposition'] = f'attachment; filename=all_resumes_{job_id}.zip'
         return response
     except Exception as e:
@@ -886,40 +1638,33 @@ def download_resume_file():
     
     if not unique_filename_on_server:
         return jsonify({"message": "Filepath is required"}), 400
-        
-    original_filename = unique_filename_on_server.split('_', 1)[-1] # Fallback extraction
 
-    full_filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename_on_server)
-
-    if os.path.exists(full_filepath) and os.path.abspath(os.path.dirname(full_filepath)) == os.path.abspath(
-            app.config['UPLOAD_FOLDER']):
-        mimetype, _ = guess_type(original_filename)
-        return send_from_directory(app.config['UPLOAD_FOLDER'], unique_filename_on_server, as_attachment=True,download_name=original_filename, mimetype=mimetype or 'application/octet-stream')
-    else:
+    # Security check: only well-formed storage keys are resolved, never arbitrary paths
+    if not is_valid_key(unique_filename_on_server) or not storage.exists(unique_filename_on_server):
         return jsonify({"message": "File not found on server or invalid path"}), 404
 
+    original_filename = None
+    if repo:
+        try:
+            resume_data = repo.get_resume_by_filepath(unique_filename_on_server)
+            original_filename = resume_data['filename'] if resume_data else None
+        except Exception as e:
+            print(f"Could not look up original filename: {e}")
+    if not original_filename:
+        original_filename = unique_filename_on_server.rsplit('/', 1)[-1].split('_', 1)[-1] # Fallback extraction
+
+    return storage.serve(unique_filename_on_server, original_filename, as_attachment=True)
+
 @app.route('/api/resume_file/<resume_id>', methods=['GET'])
 def get_resume_file(resume_id):
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
     
     try:
-        response = supabase.table('resumes').select('filepath, filename').eq('id', resume_id).execute()
-        if response.data:
-            resume_data = response.data[0]
-            unique_filename = resume_data['filepath']
-            original_filename = resume_data['filename']
-            
-            full_filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            if os.path.exists(full_filepath):
-                 mimetype, _ = guess_type(original_filename)
-                 return send_from_directory(
-                     app.config['UPLOAD_FOLDER'], 
-                     unique_filename, 
-                     as_attachment=False, 
-                     mimetype=mimetype or 'application/octet-stream'
-                 )
+        resume_data = repo.get_resume_file(resume_id)
+        if resume_data and storage.exists(resume_data['filepath']):
+            # Range + ETag aware, so the PDF viewer can fetch pages incrementally
+            return storage.serve(resume_data['filepath'], resume_data['filename'], as_attachment=False)
             
         return jsonify({"message": "File not found"}), 404
     except Exception as e:
@@ -934,35 +1679,28 @@ def download_all_filtered_resumes():
     if not filtered_resume_ids:
         return jsonify({"message": "No filtered resumes to download."}), 404
         
-    if not supabase:
+    if not repo:
          return jsonify({"message": "Database not connected."}), 500
 
     try:
         # Fetch resumes details from DB
-        response = supabase.table('resumes').select('filename, filepath').in_('id', filtered_resume_ids).execute()
-        resumes_data = response.data if response.data else []
-
-        memory_file = BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for resume in resumes_data:
-                unique_filename_on_server = resume.get('filepath')
-                original_filename = resume.get('filename')
-
-                if unique_filename_on_server and original_filename:
-                    full_filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename_on_server)
-                    if os.path.exists(full_filepath):
-                        # Security check: Ensure the file is within the UPLOAD_FOLDER
-                        if os.path.abspath(os.path.dirname(full_filepath)) == os.path.abspath(
-                                app.config['UPLOAD_FOLDER']):
-                            zf.write(full_filepath, arcname=original_filename)
-                        else:
-                            print(f"Skipping file outside UPLOAD_FOLDER: {full_filepath}")
-                    else:
-                        print(f"File not found: {full_filepath}")
-
-        memory_file.seek(0)
-        response = make_response(memory_file.getvalue())
-        response.headers['Content-Type'] = 'application/zip'
+        resumes_data = repo.get_resume_files(filtered_resume_ids)
+
+        entries = []
+        for resume in resumes_data:
+            unique_filename_on_server = resume.get('filepath')
+            original_filename = resume.get('filename')
+
+            if unique_filename_on_server and original_filename:
+                # Security check: storage only resolves keys inside its own root
+                source = storage.source(unique_filename_on_server)
+                if source:
+                    entries.append((source, original_filename))
+                else:
+                    print(f"File not found: {unique_filename_on_server}")
+
+        print(f"Streaming {len(entries)} filtered resumes")
+        response = Response(stream_zip(entries, label="download filtered"), mimetype='application/zip')
         response.headers['Content-Disposition'] = 'attachment; filename=filtered_resumes.zip'
         return response
     except Exception as e:
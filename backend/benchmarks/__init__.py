@@ -0,0 +1,5 @@
+# Benchmarks for the resume pipeline.
+#
+#   cd backend
+#   python -m benchmarks.run --resumes 200 --jobs 3 --output bench.json
+#   python -m benchmarks.compare baseline.json bench.json
@@ -0,0 +1,53 @@
+# compare.py
+# Diff two benchmark reports and fail on regressions.
+#
+#   python -m benchmarks.compare baseline.json candidate.json --threshold 0.10 --stat p50
+#
+# Exits 1 when any stage present in both reports got slower by more than the threshold.
+import argparse
+import json
+import sys
+
+
+def compare(baseline, candidate, stat='p50', threshold=0.10):
+    rows, regressions = [], []
+    for name, base in baseline['stages'].items():
+        new = candidate['stages'].get(name)
+        if not new or not base.get('n') or not new.get('n'):
+            continue
+        before, after = base[stat], new[stat]
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--stat', default='p50', choices=['mean', 'p50', 'p95', 'min', 'max'])
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows, regressions = compare(baseline, candidate, args.stat, args.threshold)
+    print(f"{baseline['metadata'].get('git_commit') or '?'} -> {candidate['metadata'].get('git_commit') or '?'} ({args.stat})")
+    print(f"{'stage':<16}{'before ms':>12}{'after ms':>12}{'change':>10}")
+    for name, before, after, change in rows:
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:<16}{before * 1000:>12.2f}{after * 1000:>12.2f}{change:>+10.1%}{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# corpus.py
+# Deterministic synthetic resumes (PDF and DOCX) and job descriptions. Vocabulary comes
+# from the skill and category tables in text_processor, so generated documents exercise
+# the same regexes and categories as real uploads. The same seed always yields the same
+# corpus, which keeps benchmark runs comparable across commits.
+import os
+import random
+
+from text_processor import COMMON_SKILLS, CATEGORIES
+
+FIRST_NAMES = ["Aarav", "Priya", "Liam", "Sofia", "Noah", "Mei", "Omar", "Elena", "Kenji", "Amara",
+               "Lucas", "Zara", "Ethan", "Isha", "Mateo", "Chloe", "Ravi", "Hana", "Diego", "Nora"]
+LAST_NAMES = ["Sharma", "Smith", "Garcia", "Chen", "Khan", "Ivanova", "Tanaka", "Okafor", "Silva",
+              "Muller", "Patel", "Rossi", "Kim", "Dubois", "Singh", "Novak", "Haddad", "Jensen"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises",
+             "Hooli", "Vandelay Industries", "Wonka Systems", "Cyberdyne", "Soylent Co", "Tyrell Group"]
+UNIVERSITIES = ["State University", "Institute of Technology", "City College", "National University",
+                "Metropolitan University", "Polytechnic Institute"]
+DEGREES = ["B.Tech in Computer Science", "B.Sc in Mathematics", "MBA", "M.Sc in Data Science",
+           "B.A. in Economics", "B.E. in Mechanical Engineering", "B.Des in Visual Design"]
+VERBS = ["Led", "Built", "Designed", "Managed", "Improved", "Delivered", "Automated", "Owned", "Drove",
+         "Launched", "Coordinated", "Optimized"]
+OUTCOMES = ["reducing costs by {n}%", "improving throughput by {n}%", "for {n} enterprise clients",
+            "across {n} regions", "cutting turnaround time by {n}%", "serving {n}k users"]
+LEVELS = ["Junior", "Senior", "Lead", "Principal", "Associate", "Entry-level"]
+EXPERIENCE_RANGES = ["0-2", "2-5", "3-6", "5+", "8+", "Any"]
+
+
+def _phrase(rng, skills):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 60))
+    return f"{rng.choice(VERBS)} {rng.choice(skills)} and {rng.choice(skills)} initiatives, {outcome}."
+
+
+def resume_lines(rng, category=None):
+    category = category or rng.choice(list(CATEGORIES))
+    keywords = CATEGORIES[category]
+    skills = rng.sample(keywords, min(len(keywords), rng.randint(6, 14))) + rng.sample(COMMON_SKILLS, min(len(COMMON_SKILLS), rng.randint(3, 8)))
+    years = rng.randint(0, 15)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    lines = [
+        name,
+        f"{rng.choice(LEVELS)} {category} Professional",
+        f"Email: {name.split()[0].lower()}.{rng.randint(10, 99)}@example.com | Phone: +1 555 {rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"{category} professional with {years} years of experience in {', '.join(skills[:4])}.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(rng.randint(2, 5)):
+        start = rng.randint(2005, 2022)
+        lines.append(f"{rng.choice(LEVELS)} {category} Specialist, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        lines.extend(f"- {_phrase(rng, skills)}" for _ in range(rng.randint(2, 5)))
+        lines.append("")
+    lines += [
+        "EDUCATION",
+        f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)}, {rng.randint(2000, 2022)}",
+    ]
+    return category, lines
+
+
+def job_description(rng, category=None):
+    category = category or rng.choice(list(CATEGORIES))
+    keywords = CATEGORIES[category]
+    skills = rng.sample(keywords, min(len(keywords), rng.randint(4, 8)))
+    level = rng.choice(LEVELS)
+    description = " ".join([
+        f"We are hiring a {level.lower()} {category} specialist to join our team.",
+        f"You will work with {', '.join(skills[:3])} and collaborate across departments.",
+        _phrase(rng, skills),
+        f"Experience with {rng.choice(COMMON_SKILLS)} is a plus.",
+    ])
+    return {
+        'job_title': f"{level} {category} Specialist",
+        'job_description': description,
+        'department': category,
+        'skills': skills,
+        'experience_required': rng.choice(EXPERIENCE_RANGES),
+        'location': rng.choice(["Remote", "Bengaluru", "Berlin", "New York", "London"]),
+        'job_type': rng.choice(["Full-time", "Contract"]),
+    }
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, lines, lines_per_page=55):
+    # Minimal single-font PDF writer; enough for PyPDF2 to extract the text back
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 790 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in page_lines) + " ET"
+        stream = stream.encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>").encode())
+        page_refs.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{r} 0 R' for r in page_refs)}] /Count {len(page_refs)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_docx(path, lines):
+    from docx import Document
+
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def generate_corpus(directory, resumes=100, jobs=3, seed=42, formats=('pdf', 'docx')):
+    """
+    Write `resumes` files to `directory`, alternating between `formats`, and return
+    (resume_files, job_payloads). resume_files is a list of dicts with path, format and
+    category; job_payloads are ready to POST to /api/job_requirements.
+    """
+    os.makedirs(directory, exist_ok=True)
+    resume_files = []
+    for i in range(resumes):
+        rng = random.Random(f"{seed}-resume-{i}")
+        category, lines = resume_lines(rng)
+        fmt = formats[i % len(formats)]
+        path = os.path.join(directory, f"resume_{i:05d}.{fmt}")
+        if fmt == 'pdf':
+            write_pdf(path, lines)
+        else:
+            write_docx(path, lines)
+        resume_files.append({'path': path, 'format': fmt, 'category': category})
+
+    job_payloads = [job_description(random.Random(f"{seed}-job-{j}")) for j in range(jobs)]
+    return resume_files, job_payloads
@@ -0,0 +1,143 @@
+# embeddings.py
+# Compares single-vector and chunked resume embeddings on a synthetic corpus.
+#
+#   python -m benchmarks.embeddings --resumes 200 --jobs 5 --pooling mean,max --output emb.json
+#
+# Reports encode throughput (single, chunked with a cold chunk cache, chunked warm) and how
+# far the chunked semantic score moves from the single-vector one: absolute deltas on the
+# 0-1 semantic score and on the final 0-100 match score, Spearman rank correlation per job
+# and top-k overlap. Needs the sentence-transformers model. Run from backend/.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import git_commit
+
+
+def _ranks(values):
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values, kind='stable')] = np.arange(len(values))
+    return ranks
+
+
+def compare_scores(single, chunked, top_k):
+    # single, chunked: (resumes, jobs) cosine similarities
+    from resume_matcher import WEIGHT_SEMANTIC
+
+    delta = np.abs((chunked + 1) / 2 - (single + 1) / 2)
+    spearman, overlap = [], []
+    for j in range(single.shape[1]):
+        spearman.append(float(np.corrcoef(_ranks(single[:, j]), _ranks(chunked[:, j]))[0, 1]))
+        k = min(top_k, single.shape[0])
+        top_single = set(np.argsort(-single[:, j])[:k].tolist())
+        top_chunked = set(np.argsort(-chunked[:, j])[:k].tolist())
+        overlap.append(len(top_single & top_chunked) / k if k else 1.0)
+    return {
+        'semantic_delta_mean': round(float(delta.mean()), 6),
+        'semantic_delta_p95': round(float(np.percentile(delta, 95)), 6),
+        'semantic_delta_max': round(float(delta.max()), 6),
+        # Before the skill/experience terms and the department bonus
+        'match_score_delta_max': round(float(delta.max() * WEIGHT_SEMANTIC * 100), 4),
+        'spearman_min': round(min(spearman), 4),
+        'spearman_mean': round(float(np.mean(spearman)), 4),
+        f'top{top_k}_overlap_mean': round(float(np.mean(overlap)), 4),
+    }
+
+
+def load_texts(resume_files):
+    from text_extractor import extract_text_from_pdf, extract_text_from_docx
+    from text_processor import preprocess_text
+
+    texts = []
+    for item in resume_files:
+        extract = extract_text_from_pdf if item['format'] == 'pdf' else extract_text_from_docx
+        text = extract(item['path'])
+        if text:
+            texts.append(preprocess_text(text))
+    return texts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare single-vector and chunked resume embeddings.")
+    parser.add_argument('--resumes', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--formats', default='pdf,docx', help="comma separated: pdf, docx")
+    parser.add_argument('--pooling', default='mean,max', help="comma separated: mean, max")
+    parser.add_argument('--chunk-words', type=int, default=None)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--output', default='embedding_results.json')
+    args = parser.parse_args(argv)
+
+    from embeddings import CHUNK_WORDS, EMBEDDING_BATCH_SIZE, ChunkedEncoder, chunk_text
+    from resume_matcher import model
+
+    if model is None:
+        print("The sentence-transformers model is not available; nothing to compare.")
+        return 1
+
+    chunk_words = args.chunk_words or CHUNK_WORDS
+    with tempfile.TemporaryDirectory(prefix='talentify-emb-') as workdir:
+        resume_files, jobs = generate_corpus(os.path.join(workdir, 'corpus'), args.resumes, args.jobs, args.seed,
+                                             tuple(f.strip() for f in args.formats.split(',') if f.strip()))
+        texts = load_texts(resume_files)
+    job_texts = [job['job_description'] for job in jobs]
+
+    max_tokens = getattr(model, 'max_seq_length', None)
+    truncated = None
+    if max_tokens and getattr(model, 'tokenizer', None) is not None:
+        lengths = [len(ids) for ids in model.tokenizer(texts)['input_ids']]
+        truncated = round(sum(n > max_tokens for n in lengths) / len(lengths), 4)
+
+    start = time.perf_counter()
+    single_resumes = model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True,
+                                  show_progress_bar=False)
+    single_seconds = time.perf_counter() - start
+    single = single_resumes @ model.encode(job_texts, normalize_embeddings=True, show_progress_bar=False).T
+
+    report = {
+        'metadata': {
+            'git_commit': git_commit(),
+            'python': sys.version.split()[0],
+            'params': vars(args),
+        },
+        'resumes': len(texts),
+        'jobs': len(job_texts),
+        'chunks_per_resume': round(float(np.mean([len(chunk_text(t, chunk_words)) for t in texts])), 3),
+        'truncated_fraction': truncated,
+        'single': {'seconds': round(single_seconds, 4), 'resumes_per_second': round(len(texts) / single_seconds, 2)},
+    }
+    for pooling in [p.strip() for p in args.pooling.split(',') if p.strip()]:
+        encoder = ChunkedEncoder(model, chunk_words=chunk_words, pooling=pooling)
+        start = time.perf_counter()
+        chunked_resumes = encoder.encode(texts)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        encoder.encode(texts)
+        warm = time.perf_counter() - start
+        chunked = chunked_resumes @ encoder.encode(job_texts).T
+        report[f'chunked_{pooling}'] = {
+            'cold_seconds': round(cold, 4),
+            'cold_resumes_per_second': round(len(texts) / cold, 2),
+            'warm_seconds': round(warm, 4),
+            'warm_resumes_per_second': round(len(texts) / warm, 2),
+            'chunks_encoded': encoder.chunks_encoded,
+            **compare_scores(single, chunked, args.top_k),
+        }
+
+    output = os.path.abspath(args.output)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != 'metadata'}, indent=2))
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
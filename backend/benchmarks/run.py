@@ -0,0 +1,184 @@
+# run.py
+# Times each pipeline stage over a synthetic corpus and writes a JSON report.
+#
+#   python -m benchmarks.run --resumes 200 --jobs 3 --seed 42 --output bench.json
+#
+# Stages: pdf_extract, docx_extract, preprocess, skill_extract, categorize, match_score,
+# plus end-to-end upload and screening requests through the Flask test client against
+# the in-memory or SQLite backend (skip with --no-e2e). Run from backend/.
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.corpus import generate_corpus
+
+
+def summarize(samples):
+    if not samples:
+        return {'n': 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        'n': len(ordered),
+        'total': round(sum(ordered), 6),
+        'mean': round(statistics.fmean(ordered), 6),
+        'p50': round(pct(50), 6),
+        'p95': round(pct(95), 6),
+        'min': round(ordered[0], 6),
+        'max': round(ordered[-1], 6),
+    }
+
+
+def _timed(samples, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_stages(resume_files, jobs, max_pairs):
+    from text_extractor import extract_text_from_pdf, extract_text_from_docx
+    from text_processor import preprocess_text, extract_skills_from_text, categorize_resume
+    from resume_matcher import calculate_match_score_enhanced
+
+    stages = {name: [] for name in ('pdf_extract', 'docx_extract', 'preprocess', 'skill_extract',
+                                    'categorize', 'match_score')}
+    processed = []
+    for item in resume_files:
+        if item['format'] == 'pdf':
+            text = _timed(stages['pdf_extract'], extract_text_from_pdf, item['path'])
+        else:
+            text = _timed(stages['docx_extract'], extract_text_from_docx, item['path'])
+        if not text:
+            print(f"No text extracted from {item['path']}")
+            continue
+        processed_text = _timed(stages['preprocess'], preprocess_text, text)
+        # Same inputs as upload_resumes: skills and category come from the processed text
+        skills = _timed(stages['skill_extract'], extract_skills_from_text, processed_text)
+        _timed(stages['categorize'], categorize_resume, processed_text)
+        processed.append((processed_text, skills))
+
+    pairs = [(job, resume) for job in jobs for resume in processed][:max_pairs]
+    for job, (processed_text, skills) in pairs:
+        _timed(stages['match_score'], calculate_match_score_enhanced, job['job_description'],
+               job['skills'], job['experience_required'], processed_text, skills)
+    return stages
+
+
+def bench_end_to_end(resume_files, jobs, batch_size, workdir, db_backend='memory'):
+    # app reads its configuration at import time, so point it at a local backend and a
+    # scratch upload folder first
+    os.environ['DB_BACKEND'] = db_backend
+    os.environ['SQLITE_PATH'] = os.path.join(workdir, 'benchmark.db')
+    os.environ.setdefault('STORAGE_BACKEND', 'local')
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app
+    client = app.test_client()
+    user_id = 'benchmark-user'
+    stages = {'upload_request': [], 'screen_request': []}
+    resume_ids = []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(0, len(resume_files), batch_size):
+            batch = resume_files[i:i + batch_size]
+            handles = [open(item['path'], 'rb') for item in batch]
+            try:
+                data = {'user_id': user_id,
+                        'files': [(fh, os.path.basename(item['path'])) for fh, item in zip(handles, batch)]}
+                start = time.perf_counter()
+                response = client.post('/api/upload_resumes', data=data, content_type='multipart/form-data')
+                stages['upload_request'].append(time.perf_counter() - start)
+            finally:
+                for fh in handles:
+                    fh.close()
+            if response.status_code != 201:
+                raise RuntimeError(f"Upload failed ({response.status_code}): {response.get_data(as_text=True)[:200]}")
+            resume_ids.extend(response.get_json()['resume_ids'])
+
+        for job in jobs:
+            response = client.post('/api/job_requirements', json={**job, 'user_id': user_id})
+            if response.status_code != 201:
+                raise RuntimeError(f"Job creation failed ({response.status_code})")
+            start = time.perf_counter()
+            response = client.post('/api/screen_resumes',
+                                   json={'job_id': response.get_json()['job_id'], 'resume_ids': resume_ids})
+            stages['screen_request'].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"Screening failed ({response.status_code}): {response.get_data(as_text=True)[:200]}")
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume pipeline on a synthetic corpus.")
+    parser.add_argument('--resumes', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--formats', default='pdf,docx', help="comma separated: pdf, docx")
+    parser.add_argument('--max-pairs', type=int, default=500, help="cap on job x resume match_score calls")
+    parser.add_argument('--batch-size', type=int, default=20, help="files per upload request")
+    parser.add_argument('--no-e2e', action='store_true', help="skip the Flask end-to-end requests")
+    parser.add_argument('--db-backend', default='memory', choices=['memory', 'sqlite'],
+                        help="database backend for the end-to-end requests")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    formats = tuple(f.strip() for f in args.formats.split(',') if f.strip())
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='talentify-bench-') as workdir:
+        start = time.perf_counter()
+        resume_files, jobs = generate_corpus(os.path.join(workdir, 'corpus'), args.resumes, args.jobs,
+                                             args.seed, formats)
+        print(f"Generated {len(resume_files)} resumes and {len(jobs)} jobs in {time.perf_counter() - start:.1f}s")
+
+        stages = bench_stages(resume_files, jobs, args.max_pairs)
+        if not args.no_e2e:
+            try:
+                stages.update(bench_end_to_end(resume_files, jobs, args.batch_size, workdir, args.db_backend))
+            finally:
+                os.chdir(cwd)
+
+    report = {
+        'metadata': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'params': vars(args),
+        },
+        'stages': {name: summarize(samples) for name, samples in stages.items()},
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'stage':<16}{'n':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, s in report['stages'].items():
+        if s['n']:
+            print(f"{name:<16}{s['n']:>6}{s['mean'] * 1000:>10.2f}{s['p50'] * 1000:>10.2f}{s['p95'] * 1000:>10.2f}")
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
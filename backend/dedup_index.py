@@ -0,0 +1,220 @@
+# dedup_index.py
+# Near-duplicate resumes: the same CV uploaded again with small edits.
+#
+# Each resume gets a MinHash signature over the word 3-grams of its processed_text
+# (NUM_PERM 32-bit minimums, 512 bytes). Two signatures agree in a given position with
+# probability equal to the Jaccard similarity of the shingle sets, so the fraction of
+# equal positions estimates it. Signatures are cut into BANDS bands; resumes sharing any
+# whole band land in the same LSH bucket and become candidate pairs, which are then
+# checked against DEDUP_THRESHOLD. With 16 bands of 8 rows a pair at 0.85 similarity is
+# a candidate 99.9% of the time and a pair at 0.5 only 6% of the time.
+#
+# Like the search and skill indexes this lives in process memory and catches up from
+# the repository (see search_index.ResumeIndex).
+import os
+import zlib
+from array import array
+
+import numpy as np
+
+from metrics import STAGE_SECONDS, timed
+from search_index import ResumeIndex, SEARCH_REFRESH_INTERVAL
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.85))
+
+# Multiply-shift hashing h(x) = ((a*x + b) mod 2**64) >> 32 with odd a: one multiply per
+# (permutation, shingle) in wrapping uint64 arithmetic. Fixed seed: every worker must agree.
+_rng = np.random.RandomState(20240611)
+_A = (_rng.randint(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1))[:, None]
+_B = _rng.randint(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)[:, None]
+_SHIFT = np.uint64(32)
+# Mixing constants for combining word hashes into an order-sensitive 3-gram hash
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F))
+
+
+def shingle_hashes(text):
+    # Distinct 32-bit hashes of the word 3-grams. Words are hashed once each and combined
+    # with vector arithmetic instead of hashing every joined 3-gram string.
+    words = (text or '').split()
+    hashes = np.fromiter((zlib.crc32(w.encode('utf-8')) for w in words), dtype=np.uint64, count=len(words))
+    if len(hashes) >= 3:
+        hashes = (hashes[:-2] * _MIX[0]) ^ (hashes[1:-1] * _MIX[1]) ^ hashes[2:]
+    return np.unique(hashes >> _SHIFT)
+
+
+def minhash(text):
+    # uint32 signature of length NUM_PERM, or None for empty text
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return None
+    values = np.multiply(_A, hashes[None, :])
+    values += _B
+    values >>= _SHIFT
+    return values.min(axis=1).astype(np.uint32)
+
+
+def similarity(signature_a, signature_b):
+    # Estimated Jaccard similarity of the two shingle sets
+    return float(np.count_nonzero(signature_a == signature_b)) / NUM_PERM
+
+
+class DuplicateIndex(ResumeIndex):
+    label = 'Duplicate index'
+
+    def __init__(self, repo, threshold=DEDUP_THRESHOLD, refresh_interval=SEARCH_REFRESH_INTERVAL):
+        super().__init__(repo, refresh_interval)
+        self.threshold = threshold
+        self._signatures = array('I')           # NUM_PERM values per doc, zeros for empty text
+        self._has_signature = bytearray()
+        self._buckets = [{} for _ in range(BANDS)]  # band bytes -> list of doc numbers
+
+    def _documents(self, rows):
+        return [(row['id'], row.get('processed_text'), row.get('user_id')) for row in rows]
+
+    def add(self, resume_id, text, user_id=None):
+        return self.add_many([(resume_id, text, user_id)]) == 1
+
+    def add_many(self, documents):
+        # documents: iterable of (resume_id, text, user_id). Returns how many were new.
+        signed = [(str(resume_id), minhash(text), user_id) for resume_id, text, user_id in documents]
+        added = 0
+        with self._lock:
+            for resume_id, signature, user_id in signed:
+                doc = self._new_doc(resume_id, user_id)
+                if doc is None:
+                    continue
+                if signature is None:
+                    self._signatures.extend([0] * NUM_PERM)
+                    self._has_signature.append(0)
+                else:
+                    self._signatures.frombytes(signature.tobytes())
+                    self._has_signature.append(1)
+                    for band, buckets in enumerate(self._buckets):
+                        key = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+                        bucket = buckets.get(key)
+                        if bucket is None:
+                            buckets[key] = [doc]
+                        else:
+                            bucket.append(doc)
+                added += 1
+        return added
+
+    def _signature(self, doc):
+        return np.frombuffer(self._signatures[doc * NUM_PERM:(doc + 1) * NUM_PERM].tobytes(), dtype=np.uint32)
+
+    def _candidates(self, doc):
+        # Live docs sharing at least one band with `doc`
+        signature = self._signature(doc)
+        found = set()
+        for band, buckets in enumerate(self._buckets):
+            found.update(buckets.get(signature[band * ROWS:(band + 1) * ROWS].tobytes(), ()))
+        found.discard(doc)
+        return [d for d in found if self._live[d]]
+
+    def near_duplicates(self, resume_id, threshold=None):
+        # [(resume_id, similarity)] for other resumes at or above the threshold, closest first
+        threshold = self.threshold if threshold is None else threshold
+        self.refresh()
+        with self._lock:
+            doc = self._doc_numbers.get(str(resume_id))
+            if doc is None or not self._has_signature[doc]:
+                return []
+            signature = self._signature(doc)
+            matches = [(self._doc_ids[d], similarity(signature, self._signature(d))) for d in self._candidates(doc)]
+        return sorted([m for m in matches if m[1] >= threshold], key=lambda m: -m[1])
+
+    def clusters(self, resume_ids=None, user_id=None, threshold=None):
+        """
+        Groups of two or more near-duplicate resumes, each listed newest upload first, so
+        the first id is the natural representative. Restricted to `resume_ids` when given
+        (ids the index has not seen are left out), otherwise all resumes, optionally of one
+        uploader. Similarity is chained: A~B and B~C puts all three in one cluster.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        self.refresh()
+        with timed(STAGE_SECONDS, stage='dedup_clusters'), self._lock:
+            if resume_ids is not None:
+                allowed = {d for d in (self._doc_numbers.get(str(r)) for r in resume_ids)
+                           if d is not None and self._has_signature[d]}
+            else:
+                mask = self._filter_mask(user_id) if self._doc_ids else None
+                if mask is None:
+                    return []
+                mask &= np.frombuffer(bytes(self._has_signature), dtype=np.uint8).astype(bool)
+                allowed = set(np.flatnonzero(mask).tolist())
+            if len(allowed) < 2:
+                return []
+
+            signatures = {}
+
+            def signature(d):
+                s = signatures.get(d)
+                if s is None:
+                    s = signatures[d] = self._signature(d)
+                return s
+
+            parent = {}
+            linked = set()
+
+            def find(d):
+                root = d
+                while parent.get(root, root) != root:
+                    root = parent[root]
+                while d != root:  # path compression
+                    parent[d], d = root, parent.get(d, d)
+                return root
+
+            if resume_ids is not None:
+                # A screening pool is small next to the index: visit only its own buckets
+                buckets = {}
+                for d in allowed:
+                    sig = signature(d)
+                    for band, band_buckets in enumerate(self._buckets):
+                        key = sig[band * ROWS:(band + 1) * ROWS].tobytes()
+                        buckets[(band, key)] = band_buckets[key]
+                buckets = buckets.values()
+            else:
+                buckets = (bucket for band_buckets in self._buckets for bucket in band_buckets.values())
+
+            for bucket in buckets:
+                if len(bucket) < 2:
+                    continue
+                members = [d for d in bucket if d in allowed]
+                # Compare each member with one doc per cluster met so far in this bucket
+                # (its latest member) instead of with every other member: linear in the
+                # common case of one big group of copies. A member joins every cluster it
+                # matches and then stands for them, so A~B and B~C chain even when A and C
+                # differ.
+                reps = []
+                for d in members:
+                    for rep in reps:
+                        if find(rep) != find(d) and similarity(signature(rep), signature(d)) >= threshold:
+                            parent[find(rep)] = find(d)
+                            linked.update((d, rep))
+                    root = find(d)
+                    reps = [rep for rep in reps if find(rep) != root] + [d]
+
+            groups = {}
+            for d in linked:
+                groups.setdefault(find(d), []).append(d)
+            groups = [sorted(members, reverse=True) for members in groups.values() if len(members) > 1]
+            groups.sort(key=lambda members: members[0], reverse=True)
+            return [[self._doc_ids[d] for d in members] for members in groups]
+
+    def collapse(self, resume_ids, threshold=None):
+        """
+        Split `resume_ids` for screening: returns (kept, collapsed) where kept has one
+        representative per near-duplicate cluster (the newest upload) plus every resume
+        outside a cluster, in the original order, and collapsed maps each representative
+        to the ids it stands in for.
+        """
+        resume_ids = list(dict.fromkeys(str(r) for r in resume_ids))
+        collapsed = {}
+        hidden = set()
+        for members in self.clusters(resume_ids, threshold=threshold):
+            collapsed[members[0]] = members[1:]
+            hidden.update(members[1:])
+        return [r for r in resume_ids if r not in hidden], collapsed
@@ -0,0 +1,331 @@
+# embedding_service.py
+# Optional embedding sidecar shared by every gunicorn worker.
+#
+#   python embedding_service.py                      # listens on EMBEDDING_SOCKET
+#   EMBEDDING_SOCKET=/tmp/talentify-embed.sock gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Without it each worker encodes its own handful of texts per request. The sidecar holds
+# the only MiniLM copy and coalesces concurrent encode requests from all workers into one
+# batch: the first queued request opens a batch, which closes when it reaches
+# EMBEDDING_MAX_BATCH texts or EMBEDDING_MAX_WAIT_MS after it opened, whichever is first.
+#
+# Wire format over the Unix socket, in both directions: a 4-byte big-endian length and a
+# JSON header, then for responses `rows * dim` little-endian float32 values.
+#     request:  {"texts": [...]}            response: {"rows": n, "dim": d} + vectors
+#     request:  {"stats": true}             response: {"batches": ..., ...}
+#     errors:   {"error": "message"}
+#
+# The client side (EmbeddingClient, FallbackEncoder) is what resume_matcher uses when
+# EMBEDDING_SOCKET is set: each thread keeps one connection open, every call has a
+# timeout, and on any failure the worker encodes in-process instead, leaving the sidecar
+# alone for EMBEDDING_RETRY_SECONDS before trying it again.
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+from embeddings import EMBEDDING_BATCH_SIZE
+from metrics import ERRORS_TOTAL, inc
+
+EMBEDDING_SOCKET = os.environ.get("EMBEDDING_SOCKET", "")
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_MAX_BATCH = int(os.environ.get("EMBEDDING_MAX_BATCH", 256))
+EMBEDDING_MAX_WAIT_MS = float(os.environ.get("EMBEDDING_MAX_WAIT_MS", 10))
+EMBEDDING_TIMEOUT = float(os.environ.get("EMBEDDING_TIMEOUT", 30))
+EMBEDDING_RETRY_SECONDS = float(os.environ.get("EMBEDDING_RETRY_SECONDS", 5))
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+_LENGTH = struct.Struct('>I')
+
+
+class EmbeddingServiceError(Exception):
+    pass
+
+
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise EmbeddingServiceError("Connection closed by peer")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _send_message(sock, header, payload=b''):
+    body = json.dumps(header).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(body)) + body + payload)
+
+
+def _recv_header(sock):
+    (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if length > MAX_MESSAGE_BYTES:
+        raise EmbeddingServiceError(f"Message of {length} bytes is too large")
+    return json.loads(_recv_exact(sock, length))
+
+
+# === Server ===
+
+class _Request:
+    __slots__ = ('texts', 'done', 'vectors', 'error')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Runs one encode call at a time over whatever requests are queued. A batch opens with
+    the first waiting request and takes more until it holds `max_batch` texts or
+    `max_wait` seconds have passed. Identical texts in a batch are encoded once.
+    """
+
+    def __init__(self, model, max_batch=EMBEDDING_MAX_BATCH, max_wait=EMBEDDING_MAX_WAIT_MS / 1000):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+        threading.Thread(target=self._run, name='embedding-batcher', daemon=True).start()
+
+    def encode(self, texts):
+        request = _Request(texts)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise EmbeddingServiceError(request.error)
+        return request.vectors
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            unique = list(dict.fromkeys(text for request in batch for text in request.texts))
+            start = time.perf_counter()
+            try:
+                encoded = np.asarray(self.model.encode(unique, batch_size=EMBEDDING_BATCH_SIZE,
+                                                       show_progress_bar=False), dtype=np.float32)
+                rows = {text: i for i, text in enumerate(unique)}
+                for request in batch:
+                    request.vectors = encoded[[rows[text] for text in request.texts]]
+            except Exception as e:
+                for request in batch:
+                    request.error = f"Encoding failed: {e}"
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.texts += sum(len(request.texts) for request in batch)
+                self.encoded += len(unique)
+                self.encode_seconds += elapsed
+            for request in batch:
+                request.done.set()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'texts': self.texts,
+                'encoded': self.encoded,
+                'mean_batch_texts': round(self.encoded / self.batches, 2) if self.batches else 0,
+                'encode_seconds': round(self.encode_seconds, 3),
+                'queued': self._queue.qsize(),
+            }
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # One connection per client thread, serving requests until it is closed
+        while True:
+            try:
+                header = _recv_header(self.request)
+            except (EmbeddingServiceError, OSError, ValueError):
+                return
+            try:
+                if header.get('stats'):
+                    _send_message(self.request, self.server.batcher.stats())
+                    continue
+                texts = header.get('texts')
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    _send_message(self.request, {'error': "'texts' must be a list of strings"})
+                    continue
+                if not texts:
+                    _send_message(self.request, {'rows': 0, 'dim': 0})
+                    continue
+                vectors = self.server.batcher.encode(texts)
+                _send_message(self.request, {'rows': vectors.shape[0], 'dim': vectors.shape[1]},
+                              vectors.astype('<f4').tobytes())
+            except EmbeddingServiceError as e:
+                _send_message(self.request, {'error': str(e)})
+            except OSError:
+                return
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Every worker thread connects at once after a deploy; the default backlog of 5 refuses some
+    request_queue_size = 128
+
+    def __init__(self, path, batcher):
+        if os.path.exists(path):
+            os.unlink(path)  # left behind by a previous run
+        self.batcher = batcher
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+
+def serve(path=EMBEDDING_SOCKET or '/tmp/talentify-embed.sock', model_name=EMBEDDING_MODEL_NAME):
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    model.eval()
+    batcher = MicroBatcher(model)
+    with EmbeddingServer(path, batcher) as server:
+        print(f"Embedding service for {model_name} listening on {path} "
+              f"(max batch {batcher.max_batch}, max wait {batcher.max_wait * 1000:.0f}ms)")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+
+# === Client ===
+
+class EmbeddingClient:
+    def __init__(self, path=EMBEDDING_SOCKET, timeout=EMBEDDING_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        # A connection opened in the gunicorn master must not be shared with workers
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _call(self, header):
+        for attempt in (1, 2):
+            reused = getattr(self._local, 'sock', None) is not None
+            try:
+                sock = self._connection()
+                _send_message(sock, header)
+                response = _recv_header(sock)
+                if 'rows' in response:
+                    rows, dim = response['rows'], response['dim']
+                    response['vectors'] = np.frombuffer(_recv_exact(sock, rows * dim * 4),
+                                                        dtype='<f4').reshape(rows, dim)
+                break
+            except (OSError, ValueError, EmbeddingServiceError) as e:
+                # The stream may be mid-message, so it cannot be reused
+                self.close()
+                # An idle connection may have been dropped by a sidecar restart; retry that
+                # once on a fresh one, but never a timeout
+                if attempt == 1 and reused and not isinstance(e, TimeoutError):
+                    continue
+                raise EmbeddingServiceError(f"Embedding service at {self.path} unavailable: {e}") from e
+        if 'error' in response:
+            raise EmbeddingServiceError(response['error'])
+        return response
+
+    def encode(self, texts):
+        return self._call({'texts': list(texts)})['vectors']
+
+    def stats(self):
+        return self._call({'stats': True})
+
+
+class FallbackEncoder:
+    """
+    Drop-in for the SentenceTransformer `encode` used by resume_matcher: asks the sidecar
+    first and encodes in-process when it cannot answer. The local model is only loaded
+    the first time it is needed.
+    """
+
+    def __init__(self, client, load_model, retry_seconds=EMBEDDING_RETRY_SECONDS):
+        self.client = client
+        self._load_model = load_model
+        self.retry_seconds = retry_seconds
+        self._local_model = None
+        self._local_loaded = False
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def local_model(self):
+        with self._lock:
+            if not self._local_loaded:
+                self._local_model = self._load_model()
+                self._local_loaded = True
+            return self._local_model
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False, **kwargs):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        vectors = None
+        if time.monotonic() >= self._down_until:
+            try:
+                vectors = self.client.encode(texts)
+            except EmbeddingServiceError as e:
+                print(f"{e}. Encoding in-process for the next {self.retry_seconds:.0f}s.")
+                inc(ERRORS_TOTAL, where='embedding_service')
+                self._down_until = time.monotonic() + self.retry_seconds
+        if vectors is None:
+            model = self.local_model()
+            if model is None:
+                raise EmbeddingServiceError("Embedding service is down and no local model could be loaded")
+            return model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings,
+                                show_progress_bar=show_progress_bar, **kwargs)
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,108 @@
+# embeddings.py
+# Chunked resume embeddings (EMBEDDING_MODE=chunked).
+#
+# MiniLM truncates its input at 256 word pieces, so embedding a whole resume as one string
+# only looks at its first few lines. In chunked mode the processed text is cut into
+# overlapping word windows, preferring to break just before a section header, every chunk
+# of a batch of resumes is encoded in one batched model call, and the chunk vectors are
+# pooled (mean or max) back into one unit vector per resume.
+#
+# Chunk vectors are cached by content hash, so boilerplate shared between resumes (and
+# the same resume screened against many jobs) is only encoded once per process.
+import hashlib
+import os
+
+import numpy as np
+
+from cache import TTLCache
+
+EMBEDDING_MODE = os.environ.get("EMBEDDING_MODE", "single").lower()
+EMBEDDING_POOLING = os.environ.get("EMBEDDING_POOLING", "mean").lower()
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 64))
+# ~1.3 word pieces per processed word keeps a window under MiniLM's 256-piece limit
+CHUNK_WORDS = int(os.environ.get("EMBEDDING_CHUNK_WORDS", 150))
+CHUNK_OVERLAP = int(os.environ.get("EMBEDDING_CHUNK_OVERLAP", 25))
+CHUNK_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 50000))
+CHUNK_CACHE_TTL = 24 * 3600
+
+# Headings that survive preprocess_text; a window ends just before one when it can
+SECTION_HEADERS = frozenset([
+    'summary', 'profile', 'objective', 'experience', 'employment', 'education', 'skill', 'skills',
+    'project', 'projects', 'certification', 'certifications', 'achievement', 'achievements', 'award',
+    'awards', 'publication', 'publications', 'language', 'languages', 'interest', 'interests',
+    'training', 'volunteer', 'reference', 'references',
+])
+MIN_SECTION_WORDS = 40
+
+
+def chunk_text(text, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    words = (text or '').split()
+    if len(words) <= chunk_words:
+        return [' '.join(words)]
+
+    chunks = []
+    start = 0
+    while True:
+        end = min(start + chunk_words, len(words))
+        at_section = False
+        if end < len(words):
+            for i in range(end - 1, start + MIN_SECTION_WORDS, -1):
+                if words[i] in SECTION_HEADERS:
+                    end, at_section = i, True
+                    break
+        chunks.append(' '.join(words[start:end]))
+        if end >= len(words):
+            return chunks
+        # A new section starts clean; a plain window overlaps the previous one
+        start = end if at_section else max(end - overlap, start + 1)
+
+
+def _unit(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class ChunkedEncoder:
+    def __init__(self, model, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP, pooling=EMBEDDING_POOLING,
+                 batch_size=EMBEDDING_BATCH_SIZE, cache_size=CHUNK_CACHE_SIZE):
+        if pooling not in ('mean', 'max'):
+            raise ValueError(f"Unknown pooling '{pooling}', expected 'mean' or 'max'")
+        self.model = model
+        self.chunk_words = chunk_words
+        self.overlap = overlap
+        self.pooling = pooling
+        self.batch_size = batch_size
+        self.cache = TTLCache(ttl=CHUNK_CACHE_TTL, maxsize=cache_size)
+        self.chunks_seen = 0
+        self.chunks_encoded = 0
+
+    def encode(self, texts):
+        # One unit vector per text, shape (len(texts), dim)
+        chunked = [chunk_text(text, self.chunk_words, self.overlap) for text in texts]
+        keys = [[hashlib.sha1(chunk.encode('utf-8')).hexdigest() for chunk in chunks] for chunks in chunked]
+
+        vectors = {}
+        missing = {}
+        for chunks, chunk_keys in zip(chunked, keys):
+            for chunk, key in zip(chunks, chunk_keys):
+                if key in vectors or key in missing:
+                    continue
+                cached = self.cache.get(key)
+                if cached is None:
+                    missing[key] = chunk
+                else:
+                    vectors[key] = cached
+        if missing:
+            encoded = self.model.encode(list(missing.values()), batch_size=self.batch_size,
+                                        normalize_embeddings=True, show_progress_bar=False)
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+                self.cache.set(key, vector)
+        self.chunks_seen += sum(len(k) for k in keys)
+        self.chunks_encoded += len(missing)
+
+        pooled = []
+        for chunk_keys in keys:
+            stacked = np.stack([vectors[key] for key in chunk_keys])
+            pooled.append(stacked.max(axis=0) if self.pooling == 'max' else stacked.mean(axis=0))
+        return _unit(np.stack(pooled))
@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+# Usage (from backend/):  gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+# Must be set before torch is imported by the preloaded app
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get("GUNICORN_WORKERS", max(2, CPU_COUNT // 2)))
+worker_class = "gthread"
+# Requests queued by admission control (admission.py) hold a thread while they wait; the
+# defaults there can occupy 6 threads with uploads and screening, leaving the rest free
+# for logins, notifications and dashboard reads
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# Load models once in the master and fork workers that share them copy-on-write
+preload_app = True
+
+# Screening large pools is CPU bound and can take a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then; they re-fork from the master, so shared pages stay shared
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+# Split the cores between workers so N workers x torch threads does not oversubscribe
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", max(1, CPU_COUNT // workers)))
+
+
+def post_fork(server, worker):
+    try:
+        import torch
+        torch.set_num_threads(TORCH_THREADS)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+    server.log.info(f"Worker {worker.pid} using {TORCH_THREADS} torch threads")
+
+
+def worker_exit(server, worker):
+    # Flush write-behind queues before the worker goes away
+    try:
+        import app
+        if app.notification_buffer:
+            app.notification_buffer.close()
+        if app.outbox:
+            app.outbox.close()
+    except Exception as e:
+        server.log.warning(f"Error flushing queues on worker exit: {e}")
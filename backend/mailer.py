@@ -0,0 +1,201 @@
+import atexit
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", 30))
+
+MAIL_WORKERS = int(os.environ.get("MAIL_WORKERS", 2))
+MAIL_MAX_ATTEMPTS = int(os.environ.get("MAIL_MAX_ATTEMPTS", 4))
+MAIL_RETRY_BASE_DELAY = float(os.environ.get("MAIL_RETRY_BASE_DELAY", 2.0))
+# Probe idle connections with NOOP before reuse; servers drop them after a few minutes
+IDLE_CHECK_SECONDS = 60
+MAX_TRACKED_STATUSES = 10000
+
+
+class Outbox:
+    """
+    Background mail sender.
+
+    `submit` queues a message and returns an id immediately. Each sender thread keeps
+    its own authenticated SMTP connection open and reuses it across messages, so the
+    TCP/STARTTLS/AUTH handshake is paid once per thread instead of once per email.
+    Failed sends are retried with exponential backoff; `status(id)` reports progress.
+    With a `status_store` (the repository) every status change from 'sending' on is
+    also written to the database by the sender thread, so any worker process can answer
+    a status query, not only the sender.
+
+    Host, port, STARTTLS and credentials are configurable, so tests can point it at a
+    local stand-in such as `python -m aiosmtpd -n -l localhost:8025` with SMTP_STARTTLS=false.
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, username=None, password=None,
+                 starttls=SMTP_STARTTLS, workers=MAIL_WORKERS, max_attempts=MAIL_MAX_ATTEMPTS,
+                 retry_base_delay=MAIL_RETRY_BASE_DELAY, timeout=SMTP_TIMEOUT, status_store=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.timeout = timeout
+
+        self.workers = workers
+
+        self.status_store = status_store
+        self._statuses = OrderedDict()
+        self._status_lock = threading.Lock()
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # Sender threads are started lazily in the process that sends, so an outbox
+        # created before a gunicorn fork still works in every worker
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._stopped = threading.Event()
+            self._threads = [
+                threading.Thread(target=self._run, name=f'mail-sender-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    # --- status tracking ---
+    def _set_status(self, message_id, status, persist=True, **extra):
+        with self._status_lock:
+            entry = self._statuses.setdefault(message_id, {'id': message_id, 'attempts': 0})
+            entry.update(extra, status=status, updated_at=datetime.now(timezone.utc).isoformat())
+            self._statuses.move_to_end(message_id)
+            while len(self._statuses) > MAX_TRACKED_STATUSES:
+                self._statuses.popitem(last=False)
+            entry = dict(entry)
+        if persist and self.status_store is not None:
+            try:
+                self.status_store.save_email_status(entry)
+            except Exception as e:
+                print(f"Could not record status of email {message_id}: {e}")
+
+    def status(self, message_id):
+        with self._status_lock:
+            entry = self._statuses.get(message_id)
+            if entry:
+                return dict(entry)
+        # Sent by another worker process
+        if self.status_store is not None:
+            return self.status_store.get_email_status(message_id)
+        return None
+
+    # --- public API ---
+    def submit(self, msg, user_id=None):
+        # user_id is the account the message belongs to; only it may read the status
+        self._ensure_started()
+        message_id = str(uuid.uuid4())
+        # Only tracked in memory here; the sender thread's 'sending' write is the first
+        # database write, so the request thread never waits on the status store
+        self._set_status(message_id, 'queued', persist=False, user_id=user_id)
+        self._queue.put((message_id, msg, 1, user_id))
+        return message_id
+
+    # --- sending ---
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _disconnect(server):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _alive(self, server, last_used):
+        if time.monotonic() - last_used < IDLE_CHECK_SECONDS:
+            return True
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _retry_later(self, message_id, msg, attempt, user_id, error):
+        if attempt >= self.max_attempts or self._stopped.is_set():
+            self._set_status(message_id, 'failed', attempts=attempt, error=str(error))
+            print(f"❌ Failed to send email to {msg['To']} after {attempt} attempts: {error}")
+            return
+        delay = self.retry_base_delay * (2 ** (attempt - 1))
+        self._set_status(message_id, 'retrying', attempts=attempt, error=str(error), retry_in=delay)
+        print(f"Email to {msg['To']} failed (attempt {attempt}), retrying in {delay:.1f}s: {error}")
+        timer = threading.Timer(delay, self._queue.put, args=((message_id, msg, attempt + 1, user_id),))
+        timer.daemon = True
+        timer.start()
+
+    def _run(self):
+        server = None
+        last_used = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    break
+                continue
+            if item is None:
+                break
+
+            message_id, msg, attempt, user_id = item
+            self._set_status(message_id, 'sending', attempts=attempt, user_id=user_id)
+            try:
+                if server is None or not self._alive(server, last_used):
+                    self._disconnect(server)
+                    server = self._connect()
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # Server closed the pooled connection between messages; reconnect once
+                    server = self._connect()
+                    server.send_message(msg)
+                last_used = time.monotonic()
+                self._set_status(message_id, 'sent', attempts=attempt, error=None)
+                print(f"✅ Email sent to {msg['To']}")
+            except Exception as e:
+                self._disconnect(server)
+                server = None
+                self._retry_later(message_id, msg, attempt, user_id, e)
+        self._disconnect(server)
+
+    def close(self, timeout=10.0):
+        if self._pid != os.getpid() or self._stopped.is_set():
+            return
+        self._stopped.set()
+        # Let senders finish what is already queued, then stop them
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
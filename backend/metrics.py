@@ -0,0 +1,216 @@
+# metrics.py
+# Minimal in-process metrics: histograms, counters and gauges rendered in the Prometheus
+# text format at /metrics. Disabled unless METRICS_ENABLED is set; when disabled every
+# helper returns immediately (timers are a shared no-op object), so instrumented code
+# pays one attribute lookup and a branch.
+#
+# Values are per process. Under gunicorn each worker keeps its own registry, so scrape
+# workers individually or put the exporter behind a single-worker deployment.
+import bisect
+import functools
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Seconds; spans a fast regex (~1ms) up to a large screening request (minutes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+_metrics = {}
+_caches = {}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (list(extra) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, key=()):
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(key, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+        return lines
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.series = {}
+
+    def inc(self, amount=1, key=()):
+        with _lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self):
+        return [f'{self.name}{_format_labels(key)} {value}' for key, value in sorted(self.series.items())]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value, key=()):
+        with _lock:
+            self.series[key] = value
+
+
+def _register(cls, name, help_text, **kwargs):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, help_text, **kwargs)
+        return metric
+
+
+STAGE_SECONDS = _register(Histogram, 'talentify_stage_seconds', 'Time spent in a pipeline stage.')
+REQUEST_SECONDS = _register(Histogram, 'talentify_http_request_seconds', 'HTTP request latency by endpoint.')
+DB_SECONDS = _register(Histogram, 'talentify_db_query_seconds', 'Database round-trip latency by table and operation.')
+ITEMS_TOTAL = _register(Counter, 'talentify_items_total', 'Items processed, by kind.')
+ERRORS_TOTAL = _register(Counter, 'talentify_errors_total', 'Errors, by where they happened.')
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'key', 'start')
+
+    def __init__(self, histogram, key):
+        self.histogram = histogram
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.key)
+        return False
+
+
+def timed(histogram, **labels):
+    # with timed(STAGE_SECONDS, stage='pdf_extract'): ...
+    if not ENABLED:
+        return _NOOP_TIMER
+    return _Timer(histogram, _label_key(labels))
+
+
+def timed_stage(stage):
+    # Decorator form of timed(STAGE_SECONDS, stage=...)
+    def decorator(fn):
+        key = _label_key({'stage': stage})
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, key)
+        return wrapper
+    return decorator
+
+
+def observe(histogram, value, **labels):
+    if ENABLED:
+        histogram.observe(value, _label_key(labels))
+
+
+def inc(counter, amount=1, **labels):
+    if ENABLED:
+        counter.inc(amount, _label_key(labels))
+
+
+def set_gauge(gauge, value, **labels):
+    if ENABLED:
+        gauge.set(value, _label_key(labels))
+
+
+def register_cache(name, cache):
+    # Caches expose `hits` and `misses`; they are read at scrape time, not per lookup
+    _caches[name] = cache
+
+
+def gauge(name, help_text):
+    return _register(Gauge, name, help_text)
+
+
+def counter(name, help_text):
+    return _register(Counter, name, help_text)
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help_text, buckets=buckets)
+
+
+def render():
+    lines = []
+    with _lock:
+        metrics = list(_metrics.values())
+        snapshots = [(m, m.render()) for m in metrics]
+    for metric, body in snapshots:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(body)
+
+    if _caches:
+        lines.append('# HELP talentify_cache_requests_total Cache lookups by result.')
+        lines.append('# TYPE talentify_cache_requests_total counter')
+        for name, cache in sorted(_caches.items()):
+            lines.append(f'talentify_cache_requests_total{{cache="{name}",result="hit"}} {cache.hits}')
+            lines.append(f'talentify_cache_requests_total{{cache="{name}",result="miss"}} {cache.misses}')
+        lines.append('# HELP talentify_cache_entries Entries currently held by a cache.')
+        lines.append('# TYPE talentify_cache_entries gauge')
+        for name, cache in sorted(_caches.items()):
+            lines.append(f'talentify_cache_entries{{cache="{name}"}} {len(cache)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,12 @@
+-- Delivery status of outbound email (mailer.Outbox). Written on every status change, so
+-- /api/email_status can be answered by any worker process, not only the one sending.
+CREATE TABLE IF NOT EXISTS email_messages (
+    id TEXT PRIMARY KEY,
+    user_id UUID REFERENCES users(id),
+    status TEXT NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    error TEXT,
+    retry_in FLOAT,
+    updated_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
@@ -0,0 +1,23 @@
+-- Background re-index (reindex.py). Each resume records the version of every pipeline
+-- stage that produced its stored fields; rows written before this migration have NULL
+-- and are brought up to date by the first run.
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS pipeline_versions JSONB;
+
+-- Progress of a run, so it can resume after a crash. The cursor is the (upload_date, id)
+-- of the last resume scanned, kept verbatim as returned by the API.
+CREATE TABLE IF NOT EXISTS reindex_checkpoints (
+    id TEXT PRIMARY KEY,
+    versions JSONB,
+    cursor_upload_date TEXT,
+    cursor_id TEXT,
+    scanned INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    status TEXT,
+    started_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- The scan walks resumes in (upload_date, id) order
+CREATE INDEX IF NOT EXISTS idx_resumes_upload_date_id ON resumes(upload_date, id);
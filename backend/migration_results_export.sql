@@ -0,0 +1,5 @@
+-- Results export (/api/jobs/<job_id>/results/export) pages through a job's results by
+-- (created_at, id); this index serves both the page queries and the existing per-job
+-- lookups, so it replaces idx_screening_results_job_id.
+CREATE INDEX IF NOT EXISTS idx_screening_results_job_cursor ON screening_results(job_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_screening_results_job_id;
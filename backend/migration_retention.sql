@@ -0,0 +1,17 @@
+-- Compressed resume text (text_codec.py) and the retention job (retention.py).
+
+-- zstd dictionaries, base64 encoded; compressed values name the one they were written with
+CREATE TABLE IF NOT EXISTS text_dictionaries (
+    id INTEGER PRIMARY KEY,
+    dictionary TEXT NOT NULL,
+    sample_count INTEGER,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- When the retention job moved or removed the file, and dropped raw_text
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS file_archived_at TIMESTAMPTZ;
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS text_purged_at TIMESTAMPTZ;
+
+-- Shared-file and "ever screened" checks
+CREATE INDEX IF NOT EXISTS idx_resumes_filepath ON resumes(filepath);
+CREATE INDEX IF NOT EXISTS idx_screening_results_resume_id ON screening_results(resume_id);
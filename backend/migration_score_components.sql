@@ -0,0 +1,9 @@
+-- Score components for re-ranking without rescreening (/api/jobs/<job_id>/rerank).
+-- Each value is the 0-1 component before weighting; skill_score can reach 1.2 after the
+-- high-match boost. department_match already records the department flag.
+ALTER TABLE screening_results ADD COLUMN IF NOT EXISTS semantic_score FLOAT;
+ALTER TABLE screening_results ADD COLUMN IF NOT EXISTS skill_score FLOAT;
+ALTER TABLE screening_results ADD COLUMN IF NOT EXISTS experience_score FLOAT;
+
+-- Re-ranking reads every result of one job
+CREATE INDEX IF NOT EXISTS idx_screening_results_job_id ON screening_results(job_id, created_at DESC);
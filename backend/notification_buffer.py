@@ -0,0 +1,99 @@
+import atexit
+import os
+import queue
+import threading
+
+FLUSH_INTERVAL = 1.0
+MAX_BATCH_SIZE = 200
+MAX_ATTEMPTS = 3
+
+
+class NotificationBuffer:
+    """
+    Write-behind queue for notification inserts.
+
+    Request handlers call `enqueue` and return immediately; a background thread
+    drains the queue every FLUSH_INTERVAL seconds (or as soon as MAX_BATCH_SIZE rows
+    are waiting) and writes them with one bulk insert. Pending rows are flushed on
+    interpreter shutdown.
+    """
+
+    def __init__(self, repo, flush_interval=FLUSH_INTERVAL, max_batch_size=MAX_BATCH_SIZE, on_flush=None):
+        self.repo = repo
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.on_flush = on_flush
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # Started lazily and per process: threads do not survive a fork, so a buffer
+        # created in a preloading gunicorn master gets a fresh writer in each worker
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, notification):
+        self._ensure_started()
+        if self._stopped.is_set():
+            # Shutting down: write synchronously rather than dropping it
+            self._write([(notification, 0)])
+            return
+        self._queue.put((notification, 0))
+
+    def _drain(self, block):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+            while len(batch) < self.max_batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        rows = [row for row, _ in batch]
+        try:
+            self.repo.create_notifications(rows)
+            print(f"Flushed {len(rows)} notifications")
+        except Exception as e:
+            print(f"Error writing {len(rows)} notifications: {e}")
+            for row, attempts in batch:
+                if attempts + 1 < MAX_ATTEMPTS and not self._stopped.is_set():
+                    self._queue.put((row, attempts + 1))
+                else:
+                    print(f"Dropping notification for user {row.get('user_id')}: {row.get('title')}")
+            return
+        if self.on_flush:
+            try:
+                self.on_flush(rows)
+            except Exception as e:
+                print(f"Notification flush callback failed: {e}")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def flush(self):
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self):
+        if self._pid != os.getpid() or self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
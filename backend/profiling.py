@@ -0,0 +1,153 @@
+# profiling.py
+# On-demand sampling profiler for slow requests.
+#
+# A profiled request is sampled from a side thread every PROFILE_INTERVAL seconds via
+# sys._current_frames(), so the request itself runs unmodified (no tracing hooks).
+# Each run writes two files to PROFILE_DIR:
+#   <id>.collapsed  one "root;caller;leaf count" line per stack, for flamegraph.pl,
+#                   speedscope or inferno
+#   <id>.json       per-function self/total time plus run metadata
+#
+# A request is profiled when either
+#   - it carries "X-Profile: 1" and an "X-Admin-Token" matching PROFILE_ADMIN_TOKEN, or
+#   - it is picked by PROFILE_SAMPLE_RATE (0..1), which only operators can set.
+# With no token and a zero rate the decorator returns the view untouched, so there is
+# no per-request cost at all.
+import functools
+import json
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.005))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN")
+MAX_STACK_DEPTH = 128
+
+PROFILING_AVAILABLE = bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[';'.join(stack)] += 1
+            self.samples += 1
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def function_totals(self):
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for name in set(frames):  # recursion counts once per sample
+                total_counts[name] += count
+        return [
+            {
+                'function': name,
+                'total_samples': total,
+                'self_samples': self_counts.get(name, 0),
+                'total_seconds': round(total * self.interval, 4),
+                'self_seconds': round(self_counts.get(name, 0) * self.interval, 4),
+            }
+            for name, total in total_counts.most_common()
+        ]
+
+    def write(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_{name}_{os.getpid()}_{secrets.token_hex(3)}"
+
+        with open(os.path.join(directory, f"{profile_id}.collapsed"), 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        with open(os.path.join(directory, f"{profile_id}.json"), 'w') as f:
+            json.dump({
+                'id': profile_id,
+                'endpoint': name,
+                'duration_seconds': round(self.duration, 4),
+                'interval_seconds': self.interval,
+                'samples': self.samples,
+                'functions': self.function_totals(),
+            }, f, indent=2)
+        return profile_id
+
+
+def _should_profile(request):
+    if PROFILE_ADMIN_TOKEN and request.headers.get('X-Profile') == '1':
+        token = request.headers.get('X-Admin-Token', '')
+        if secrets.compare_digest(token.encode('utf-8'), PROFILE_ADMIN_TOKEN.encode('utf-8')):
+            return True
+        print("Ignoring X-Profile header without a valid admin token")
+        return False
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profile_request(name):
+    # View decorator: samples the wrapped request when _should_profile says so and
+    # reports the written profile id in the X-Profile-Id response header.
+    def decorator(view):
+        if not PROFILING_AVAILABLE:
+            return view
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import make_response, request
+
+            if not _should_profile(request):
+                return view(*args, **kwargs)
+
+            profiler = SamplingProfiler(threading.get_ident()).start()
+            try:
+                result = view(*args, **kwargs)
+            finally:
+                profiler.stop()
+                try:
+                    profile_id = profiler.write(PROFILE_DIR, name)
+                    print(f"Profile {profile_id} written ({profiler.samples} samples, {profiler.duration:.2f}s)")
+                except OSError as e:
+                    profile_id = None
+                    print(f"Could not write profile for {name}: {e}")
+
+            response = make_response(result)
+            if profile_id:
+                response.headers['X-Profile-Id'] = profile_id
+            return response
+        return wrapper
+    return decorator
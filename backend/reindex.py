@@ -0,0 +1,219 @@
+# reindex.py
+# Background backfill of derived resume fields after a pipeline change.
+#
+#   python reindex.py                       # run (or resume) until every resume is current
+#   python reindex.py --max-rate 20 --workers 2
+#   python reindex.py --status
+#
+# Every resume stores the version of each stage that produced it (pipeline_versions,
+# see text_processor.PIPELINE_VERSIONS). The job walks resumes in (upload_date, id)
+# keyset order reading only ids and versions, loads the full rows of the stale ones,
+# recomputes just the stages whose version changed on a process pool, and writes the
+# batch back in one bulk update:
+#     preprocess  -> processed_text (and therefore skills and category too)
+#     skills      -> extracted_skills
+#     category    -> categorized_field
+# After every batch the cursor and counters go to reindex_checkpoints, so a crashed or
+# stopped run picks up where it left off. The job runs at low CPU priority, holds itself
+# to --max-rate resumes per second and backs off while database writes are slow, so live
+# traffic keeps priority.
+#
+# Embeddings are not stored, so there is nothing to backfill for a model change. The
+# search, skill and duplicate indexes in running workers keep the old values of rewritten
+# rows until the workers restart.
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+from repository import RESUME_REINDEX_SCAN_COLUMNS, create_repository
+
+CHECKPOINT_NAME = 'resume_pipeline'
+REINDEX_BATCH_SIZE = int(os.environ.get("REINDEX_BATCH_SIZE", 200))
+REINDEX_WORKERS = int(os.environ.get("REINDEX_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+REINDEX_MAX_RATE = float(os.environ.get("REINDEX_MAX_RATE", 50))  # resumes per second, 0 = unthrottled
+# A bulk write slower than this means the database is busy: pause before the next batch
+REINDEX_SLOW_WRITE_SECONDS = float(os.environ.get("REINDEX_SLOW_WRITE_SECONDS", 2.0))
+MAX_BACKOFF_SECONDS = 60
+STAGE_DEPENDENTS = {'preprocess': ('skills', 'category')}
+
+
+def stale_stages(stored, target):
+    # Stages whose stored version differs from the current one, plus stages fed by them
+    stored = stored or {}
+    stages = {stage for stage, version in target.items() if stored.get(stage) != version}
+    for stage in list(stages):
+        stages.update(STAGE_DEPENDENTS.get(stage, ()))
+    return stages
+
+
+def _init_worker():
+    # Pool processes run below the web workers' priority
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def recompute(row, stages):
+    # Runs in a pool process. Returns the update for one resume.
+    from text_processor import PIPELINE_VERSIONS, categorize_resume, extract_skills_from_text, preprocess_text
+
+    update = {'id': row['id']}
+    processed_text = row.get('processed_text') or ''
+    # Raw text dropped by the retention policy: keep the processed text it left behind
+    if 'preprocess' in stages and row.get('raw_text'):
+        processed_text = update['processed_text'] = preprocess_text(row['raw_text'])
+    if 'skills' in stages:
+        update['extracted_skills'] = extract_skills_from_text(processed_text)
+    if 'category' in stages:
+        update['categorized_field'] = categorize_resume(processed_text)
+    update['pipeline_versions'] = PIPELINE_VERSIONS
+    return update
+
+
+class Reindexer:
+    def __init__(self, repo, target_versions, batch_size=REINDEX_BATCH_SIZE, workers=REINDEX_WORKERS,
+                 max_rate=REINDEX_MAX_RATE, slow_write_seconds=REINDEX_SLOW_WRITE_SECONDS, name=CHECKPOINT_NAME):
+        self.repo = repo
+        self.target = dict(target_versions)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.max_rate = max_rate
+        self.slow_write_seconds = slow_write_seconds
+        self.name = name
+        self.backoff = 0.0
+
+    def _load_checkpoint(self):
+        checkpoint = self.repo.get_reindex_checkpoint(self.name)
+        if checkpoint and checkpoint.get('versions') == self.target:
+            if checkpoint.get('status') == 'done':
+                return None, checkpoint
+            cursor = None
+            if checkpoint.get('cursor_id'):
+                cursor = (checkpoint.get('cursor_upload_date'), checkpoint['cursor_id'])
+            return cursor, checkpoint
+        # First run, or the versions moved again since the last one: start over
+        now = datetime.now(timezone.utc).isoformat()
+        checkpoint = {'versions': self.target, 'cursor_upload_date': None, 'cursor_id': None, 'scanned': 0,
+                      'updated': 0, 'failed': 0, 'status': 'running', 'started_at': now, 'updated_at': now}
+        self.repo.save_reindex_checkpoint(self.name, checkpoint)
+        return None, checkpoint
+
+    def _throttle(self, rows, started):
+        # Sleep off whatever the rate limit and write backoff ask for
+        wait = self.backoff
+        if self.max_rate > 0:
+            wait = max(wait, rows / self.max_rate - (time.monotonic() - started))
+        if wait > 0:
+            time.sleep(wait)
+
+    def _recompute(self, pool, rows):
+        stages = [stale_stages(row.get('pipeline_versions'), self.target) for row in rows]
+        if pool is None:
+            futures = None
+        else:
+            futures = [pool.submit(recompute, row, row_stages) for row, row_stages in zip(rows, stages)]
+        updates, failed = [], 0
+        for i, row in enumerate(rows):
+            try:
+                updates.append(futures[i].result() if futures else recompute(row, stages[i]))
+            except Exception as e:
+                print(f"Re-index failed for resume {row['id']}: {e}")
+                failed += 1
+        return updates, failed
+
+    def run(self, max_batches=None):
+        """
+        Bring every resume up to the target versions, resuming from the checkpoint, and
+        return the checkpoint. With `max_batches` the run stops early and stays 'running'
+        for the next invocation to continue.
+        """
+        cursor, checkpoint = self._load_checkpoint()
+        if checkpoint.get('status') == 'done':
+            print(f"Re-index already complete for versions {self.target}")
+            return checkpoint
+        if cursor:
+            print(f"Resuming re-index after resume {cursor[1]} ({checkpoint.get('scanned', 0)} scanned so far)")
+
+        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker) if self.workers > 1 else None
+        batches = 0
+        try:
+            while max_batches is None or batches < max_batches:
+                started = time.monotonic()
+                scanned = self.repo.list_resumes_for_index(cursor, self.batch_size, RESUME_REINDEX_SCAN_COLUMNS)
+                if not scanned:
+                    break
+                stale_ids = [r['id'] for r in scanned if stale_stages(r.get('pipeline_versions'), self.target)]
+                updates, failed = [], 0
+                if stale_ids:
+                    updates, failed = self._recompute(pool, self.repo.get_resumes_for_reindex(stale_ids))
+                    write_started = time.monotonic()
+                    self.repo.update_resumes(updates)
+                    write_seconds = time.monotonic() - write_started
+                    if write_seconds > self.slow_write_seconds:
+                        self.backoff = min(max(self.backoff * 2, 1.0), MAX_BACKOFF_SECONDS)
+                        print(f"Bulk write took {write_seconds:.1f}s; pausing {self.backoff:.0f}s between batches")
+                    else:
+                        self.backoff /= 2
+
+                cursor = (scanned[-1].get('upload_date'), scanned[-1]['id'])
+                checkpoint.update(
+                    cursor_upload_date=cursor[0], cursor_id=cursor[1],
+                    scanned=checkpoint.get('scanned', 0) + len(scanned),
+                    updated=checkpoint.get('updated', 0) + len(updates),
+                    failed=checkpoint.get('failed', 0) + failed,
+                    updated_at=datetime.now(timezone.utc).isoformat(),
+                )
+                self.repo.save_reindex_checkpoint(self.name, checkpoint)
+                batches += 1
+                print(f"Re-index: {checkpoint['scanned']} scanned, {checkpoint['updated']} updated, "
+                      f"{checkpoint['failed']} failed")
+                if len(scanned) < self.batch_size:
+                    break
+                self._throttle(len(stale_ids), started)
+            else:
+                return checkpoint  # hit max_batches before the end of the table
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        checkpoint.update(status='done', updated_at=datetime.now(timezone.utc).isoformat())
+        self.repo.save_reindex_checkpoint(self.name, checkpoint)
+        print(f"Re-index complete: {checkpoint['scanned']} scanned, {checkpoint['updated']} updated, "
+              f"{checkpoint['failed']} failed")
+        return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute stale derived fields of stored resumes.")
+    parser.add_argument('--batch-size', type=int, default=REINDEX_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=REINDEX_WORKERS)
+    parser.add_argument('--max-rate', type=float, default=REINDEX_MAX_RATE,
+                        help="resumes recomputed per second at most (0 = unthrottled)")
+    parser.add_argument('--max-batches', type=int, default=None, help="stop after this many batches")
+    parser.add_argument('--status', action='store_true', help="print the checkpoint and exit")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    repo = create_repository()
+    if repo is None:
+        print("Database not connected.")
+        return 1
+    if args.status:
+        print(repo.get_reindex_checkpoint(CHECKPOINT_NAME))
+        return 0
+
+    from text_processor import PIPELINE_VERSIONS
+
+    _init_worker()
+    Reindexer(repo, PIPELINE_VERSIONS, batch_size=args.batch_size, workers=args.workers,
+              max_rate=args.max_rate).run(args.max_batches)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,1016 @@
+# repository.py
+# All table access goes through here. app.py asks for narrow, per-use-case projections
+# and never builds queries itself, so the storage backend can be swapped (PostgREST over
+# a pooled HTTP session in production, embedded SQLite for single-node installs, an
+# in-memory stand-in for tests and benchmarks).
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import metrics
+from metrics import DB_SECONDS, ERRORS_TOTAL, timed
+from text_codec import COMPRESSED_TEXT_COLUMNS, DICTIONARY_TABLE, TextCodec
+
+# Foreign key used to resolve an embedded resource such as "resumes(filename)"
+EMBED_FOREIGN_KEYS = {'users': 'user_id', 'jobs': 'job_id', 'resumes': 'resume_id'}
+
+# Large "in" filters are split so the PostgREST query string stays well under URL limits
+IN_CHUNK_SIZE = int(os.environ.get("DB_IN_CHUNK_SIZE", 200))
+BATCH_MAX_WORKERS = 4
+# Rows per bulk insert request, to keep request bodies bounded
+INSERT_CHUNK_SIZE = int(os.environ.get("DB_INSERT_CHUNK_SIZE", 1000))
+# Rows per keyset page when a read needs every matching row. PostgREST caps a single
+# response at its max-rows setting (1000 on Supabase); keep this at or below it.
+PAGE_SIZE = int(os.environ.get("DB_PAGE_SIZE", 1000))
+
+USER_AUTH_COLUMNS = 'id, email, password_hash, is_verified, role, full_name, hr_id, department, position'
+USER_PROFILE_COLUMNS = 'id, email, full_name, hr_id, role, department, position'
+USER_OTP_COLUMNS = 'id, otp, is_verified, role, full_name, hr_id, department, position'
+JOB_COLUMNS = 'id, user_id, title, description, department, skills, experience_required, location, job_type, created_at'
+JOB_SCREENING_COLUMNS = 'id, user_id, description, skills, department, experience_required'
+JOB_MATRIX_COLUMNS = JOB_SCREENING_COLUMNS + ', title'
+RESUME_SCREENING_COLUMNS = 'id, filename, filepath, processed_text, extracted_skills, categorized_field'
+RESUME_FILE_COLUMNS = 'id, filename, filepath'
+DASHBOARD_COLUMNS = '*, resumes(filename, filepath, categorized_field)'
+JOB_RESUME_FILE_COLUMNS = 'id, resume_id, created_at, resumes(filename, filepath)'
+SCREENING_COMPONENT_COLUMNS = ('id, resume_id, match_score, matched_skills, department_match, semantic_score, '
+                               'skill_score, experience_score, created_at, resumes(filename, categorized_field)')
+SCREENING_EXPORT_COLUMNS = ('id, job_id, resume_id, match_score, semantic_score, skill_score, experience_score, '
+                            'matched_skills, department_match, experience_level, categorized_field, created_at, '
+                            'resumes(filename, user_id, categorized_field, upload_date)')
+ANALYTICS_COLUMNS = 'id, job_id, resume_id, match_score, matched_skills, categorized_field, created_at'
+NOTIFICATION_COLUMNS = 'id, title, message, type, read, created_at'
+EMAIL_STATUS_COLUMNS = 'id, user_id, status, attempts, error, retry_in, updated_at'
+RESUME_INDEX_COLUMNS = 'id, user_id, processed_text, upload_date'
+RESUME_SKILL_INDEX_COLUMNS = 'id, user_id, extracted_skills, upload_date'
+RESUME_REINDEX_SCAN_COLUMNS = 'id, pipeline_versions, upload_date'
+RESUME_TEXT_COLUMNS = 'id, raw_text, processed_text'
+RESUME_RETENTION_COLUMNS = 'id, filepath, upload_date, file_archived_at, text_purged_at'
+RESUME_REINDEX_COLUMNS = 'id, raw_text, processed_text, pipeline_versions'
+
+# Insert timestamp column per table; everything else uses created_at
+TIMESTAMP_COLUMNS = {'resumes': 'upload_date'}
+
+
+class RepositoryError(Exception):
+    pass
+
+
+def _clean_columns(columns):
+    return re.sub(r'\s+', '', columns or '*')
+
+
+def _split_columns(columns):
+    # Split a select string on top-level commas: "a,b,resumes(c,d)" -> ["a", "b", "resumes(c,d)"]
+    parts, depth, current = [], 0, ''
+    for ch in _clean_columns(columns):
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _embed_foreign_key(table):
+    return EMBED_FOREIGN_KEYS.get(table, table.rstrip('s') + '_id')
+
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# === Backends ===
+# A backend implements select/insert/update/delete over plain dicts.
+#   filters: list of (column, op, value) with op in eq, neq, in, lt, lte, gt, gte, is
+#   order:   list of (column, descending)
+# plus count(table, filters) -> int
+
+class PostgrestBackend:
+    name = 'postgrest'
+
+    def __init__(self, url, key, pool_size=20, timeout=30.0):
+        self.base_url = url.rstrip('/') + '/rest/v1'
+        self.key = key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = self._new_session()
+        # Pooled sockets must not be shared with forked workers
+        os.register_at_fork(after_in_child=self._reset_session)
+
+    def _new_session(self):
+        import httpx
+
+        # One long-lived client per process: keeps TLS sessions and TCP connections alive
+        # across requests instead of reconnecting for every query
+        return httpx.Client(
+            headers={
+                'apikey': self.key,
+                'Authorization': f'Bearer {self.key}',
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+            },
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            timeout=self.timeout,
+        )
+
+    def _reset_session(self):
+        self.session = self._new_session()
+
+    @staticmethod
+    def _format_value(value):
+        if value is None:
+            return 'null'
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        value = str(value)
+        if re.search(r'[,()"\s]', value):
+            return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        return value
+
+    def _params(self, filters=None, order=None, limit=None, columns=None):
+        params = []
+        if columns is not None:
+            params.append(('select', _clean_columns(columns)))
+        for column, op, value in filters or []:
+            if op == 'in':
+                params.append((column, 'in.(' + ','.join(self._format_value(v) for v in value) + ')'))
+            elif op == 'is':
+                params.append((column, f'is.{self._format_value(value)}'))
+            else:
+                params.append((column, f'{op}.{self._format_value(value)}'))
+        if order:
+            params.append(('order', ','.join(f"{col}.{'desc' if desc else 'asc'}" for col, desc in order)))
+        if limit is not None:
+            params.append(('limit', str(int(limit))))
+        return params
+
+    def _request(self, method, table, params, json=None, prefer=None):
+        headers = {'Prefer': prefer} if prefer else None
+        response = self.session.request(method, f'{self.base_url}/{table}', params=params, json=json, headers=headers)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get('message', response.text)
+            except ValueError:
+                detail = response.text
+            raise RepositoryError(f"{method} {table} failed ({response.status_code}): {detail}")
+        if not response.content:
+            return []
+        return response.json()
+
+    def select(self, table, columns='*', filters=None, order=None, limit=None):
+        return self._request('GET', table, self._params(filters, order, limit, columns))
+
+    def count(self, table, filters=None):
+        # HEAD + exact count: PostgREST reports the total in Content-Range ("*/42") without sending rows
+        response = self.session.head(f'{self.base_url}/{table}', params=self._params(filters, columns='id'),
+                                     headers={'Prefer': 'count=exact'})
+        if response.status_code >= 400:
+            raise RepositoryError(f"HEAD {table} failed ({response.status_code})")
+        total = response.headers.get('Content-Range', '*/0').rsplit('/', 1)[-1]
+        return int(total) if total.isdigit() else 0
+
+    def insert(self, table, rows):
+        if not rows:
+            return []
+        return self._request('POST', table, [], json=rows, prefer='return=representation')
+
+    def update(self, table, values, filters):
+        return self._request('PATCH', table, self._params(filters), json=values, prefer='return=representation')
+
+    def update_many(self, table, rows):
+        # A real UPDATE (PATCH), never an upsert, so a row deleted meanwhile stays deleted.
+        # Rows setting the same values share one "id in" request (retention stamps);
+        # otherwise it is one request per row, sent concurrently over the pool. Returns
+        # the number of rows that existed and were written.
+        groups = {}
+        for row in rows:
+            values = {c: v for c, v in row.items() if c != 'id'}
+            if values:
+                key = json.dumps(values, sort_keys=True, default=str)
+                groups.setdefault(key, (values, []))[1].append(row['id'])
+        requests = [(values, chunk) for values, ids in groups.values() for chunk in _chunks(ids, IN_CHUNK_SIZE)]
+
+        def patch(request):
+            values, ids = request
+            params = self._params([('id', 'in', ids)], columns='id')
+            return len(self._request('PATCH', table, params, json=values, prefer='return=representation'))
+
+        if len(requests) <= 1:
+            return sum(patch(r) for r in requests)
+        with ThreadPoolExecutor(max_workers=min(len(requests), BATCH_MAX_WORKERS)) as pool:
+            return sum(pool.map(patch, requests))
+
+    def delete(self, table, filters):
+        return self._request('DELETE', table, self._params(filters), prefer='return=representation')
+
+    def close(self):
+        self.session.close()
+
+
+_OPS = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'lt': lambda a, b: a is not None and a < b,
+    'lte': lambda a, b: a is not None and a <= b,
+    'gt': lambda a, b: a is not None and a > b,
+    'gte': lambda a, b: a is not None and a >= b,
+    'is': lambda a, b: a is b,
+    'in': lambda a, b: a in b,
+}
+
+
+def _normalize(value):
+    # Ids arrive as strings from the API; rows may hold them as str or UUID
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _matches(row, filters):
+    for column, op, value in filters or []:
+        if op == 'in':
+            value = {_normalize(v) for v in value}
+        if not _OPS[op](_normalize(row.get(column)), _normalize(value)):
+            return False
+    return True
+
+
+def _sort_rows(rows, order):
+    for column, desc in reversed(order or []):
+        rows.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else ''), reverse=desc)
+    return rows
+
+
+def project_rows(rows, columns, lookup):
+    # Apply a PostgREST-style select string to plain dict rows. `lookup(table, id)` resolves
+    # embedded resources through EMBED_FOREIGN_KEYS.
+    parts = _split_columns(columns)
+    projected = []
+    for row in rows:
+        out = {}
+        for part in parts:
+            if part == '*':
+                out.update(row)
+            elif '(' in part:
+                table, inner = part[:-1].split('(', 1)
+                related = lookup(table, row.get(_embed_foreign_key(table)))
+                out[table] = project_rows([related], inner, lookup)[0] if related else None
+            else:
+                out[part] = row.get(part)
+        projected.append(out)
+    return projected
+
+
+class MemoryBackend:
+    # In-process stand-in with the same semantics as PostgrestBackend. Used by tests and
+    # benchmarks so the API can run without a database service.
+    name = 'memory'
+
+    def __init__(self):
+        self.tables = {}
+        self.lock = threading.RLock()
+
+    def _table(self, table):
+        return self.tables.setdefault(table, [])
+
+    def _lookup(self, table, row_id):
+        for row in self._table(table):
+            if row.get('id') == _normalize(row_id):
+                return row
+        return None
+
+    def select(self, table, columns='*', filters=None, order=None, limit=None):
+        with self.lock:
+            rows = [r for r in self._table(table) if _matches(r, filters)]
+            rows = _sort_rows(rows, order)
+            if limit is not None:
+                rows = rows[:int(limit)]
+            return project_rows(rows, columns, self._lookup)
+
+    def count(self, table, filters=None):
+        with self.lock:
+            return sum(1 for r in self._table(table) if _matches(r, filters))
+
+    def insert(self, table, rows):
+        now = datetime.now(timezone.utc).isoformat()
+        timestamp_column = TIMESTAMP_COLUMNS.get(table, 'created_at')
+        inserted = []
+        with self.lock:
+            for row in rows:
+                row = dict(row)
+                row.setdefault('id', str(uuid.uuid4()))
+                row.setdefault(timestamp_column, now)
+                self._table(table).append(row)
+                inserted.append(dict(row))
+        return inserted
+
+    def update(self, table, values, filters):
+        updated = []
+        with self.lock:
+            for row in self._table(table):
+                if _matches(row, filters):
+                    row.update(values)
+                    updated.append(dict(row))
+        return updated
+
+    def update_many(self, table, rows):
+        # rows: dicts with an id plus the columns to set on that row. Returns rows written.
+        written = 0
+        with self.lock:
+            by_id = {row.get('id'): row for row in self._table(table)}
+            for values in rows:
+                row = by_id.get(_normalize(values['id']))
+                if row is not None:
+                    row.update(values)
+                    written += 1
+        return written
+
+    def delete(self, table, filters):
+        with self.lock:
+            kept, removed = [], []
+            for row in self._table(table):
+                (removed if _matches(row, filters) else kept).append(row)
+            self.tables[table] = kept
+        return removed
+
+    def close(self):
+        pass
+
+
+SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_sqlite.sql')
+
+# Column types SQLite has no native equivalent for
+JSON_COLUMNS = {'skills', 'extracted_skills', 'matched_skills', 'pipeline_versions', 'versions'}
+BOOL_COLUMNS = {'is_verified', 'read'}
+
+# Columns added after the first release of schema_sqlite.sql (mirrors the migration_*.sql files)
+SQLITE_ADDED_COLUMNS = {
+    'screening_results': [('semantic_score', 'REAL'), ('skill_score', 'REAL'), ('experience_score', 'REAL')],
+    'resumes': [('pipeline_versions', 'TEXT'), ('file_archived_at', 'TEXT'), ('text_purged_at', 'TEXT')],
+}
+
+_SQL_OPS = {'eq': '=', 'neq': '!=', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='}
+
+
+def _encode(column, value):
+    if value is None:
+        return None
+    if column in JSON_COLUMNS:
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return int(value)
+    return _normalize(value)
+
+
+def _decode(row):
+    out = dict(row)
+    for column, value in out.items():
+        if value is None:
+            continue
+        if column in JSON_COLUMNS:
+            out[column] = json.loads(value)
+        elif column in BOOL_COLUMNS:
+            out[column] = bool(value)
+    return out
+
+
+class SqliteBackend:
+    # Embedded single-node backend. Each thread gets its own connection (sqlite3 objects
+    # cannot be shared), WAL lets readers run alongside the single writer, and every query
+    # is parameterised with stable SQL text so sqlite3's per-connection statement cache
+    # reuses the compiled plan. "in" filters bind one JSON array through json_each(), so a
+    # 3-id and a 300-id lookup share the same prepared statement.
+    name = 'sqlite'
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        conn = self._conn()
+        with open(SQLITE_SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        self.columns = self._read_columns(conn)
+        self._add_missing_columns(conn)
+        # Connections must not be shared with forked workers
+        os.register_at_fork(after_in_child=self._reset_connections)
+
+    @staticmethod
+    def _read_columns(conn):
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return {t: {r[1] for r in conn.execute(f'PRAGMA table_info("{t}")')} for t in tables}
+
+    def _add_missing_columns(self, conn):
+        # CREATE TABLE IF NOT EXISTS leaves older databases as they were; bring them up to date
+        with conn:
+            for table, columns in SQLITE_ADDED_COLUMNS.items():
+                for column, sql_type in columns:
+                    if column not in self.columns.get(table, ()):
+                        conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {sql_type}')
+                        print(f"Added column {table}.{column} to {self.path}")
+        self.columns = self._read_columns(conn)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Durable at checkpoint rather than every commit; safe with WAL, much faster
+        conn.execute('PRAGMA synchronous=NORMAL')
+        # Off by default in SQLite, and only settable per connection
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _reset_connections(self):
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _check(self, table, *columns):
+        known = self.columns.get(table)
+        if known is None:
+            raise RepositoryError(f"Unknown table {table}")
+        for column in columns:
+            if column not in known:
+                raise RepositoryError(f"Unknown column {table}.{column}")
+
+    def _where(self, table, filters):
+        clauses, params = [], []
+        for column, op, value in filters or []:
+            self._check(table, column)
+            if op == 'in':
+                clauses.append(f'"{column}" IN (SELECT value FROM json_each(?))')
+                params.append(json.dumps([_normalize(v) for v in value]))
+            elif op == 'is' and value is None:
+                clauses.append(f'"{column}" IS NULL')
+            elif op == 'is':
+                clauses.append(f'"{column}" IS ?')
+                params.append(_encode(column, value))
+            elif op in _SQL_OPS:
+                clauses.append(f'"{column}" {_SQL_OPS[op]} ?')
+                params.append(_encode(column, value))
+            else:
+                raise RepositoryError(f"Unsupported filter operator {op}")
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _rows_by_id(self, table, ids):
+        # Returns rows in the order of `ids`
+        ids = [str(i) for i in ids]
+        if not ids:
+            return []
+        by_id = {r['id']: _decode(r) for r in self._conn().execute(
+            f'SELECT * FROM "{table}" WHERE id IN (SELECT value FROM json_each(?))', [json.dumps(ids)])}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _embed_lookup(self, rows, embeds):
+        # Resolve each embedded resource with one query for all rows instead of one per row
+        cache = {}
+        for part in embeds:
+            table = part.split('(', 1)[0]
+            self._check(table)
+            foreign_key = _embed_foreign_key(table)
+            ids = {str(r[foreign_key]) for r in rows if r.get(foreign_key) is not None}
+            for related in self._rows_by_id(table, ids):
+                cache[(table, related['id'])] = related
+
+        def lookup(table, row_id):
+            if row_id is None:
+                return None
+            key = (table, str(row_id))
+            if key not in cache:  # nested embeds fall back to single lookups
+                found = self._rows_by_id(table, [row_id])
+                cache[key] = found[0] if found else None
+            return cache[key]
+        return lookup
+
+    def select(self, table, columns='*', filters=None, order=None, limit=None):
+        self._check(table)
+        parts = _split_columns(columns)
+        embeds = [p for p in parts if '(' in p]
+        if '*' in parts:
+            projection = '*'
+        else:
+            needed = list(dict.fromkeys([p for p in parts if '(' not in p] +
+                                        [_embed_foreign_key(e.split('(', 1)[0]) for e in embeds]))
+            self._check(table, *needed)
+            projection = ', '.join(f'"{c}"' for c in needed)
+
+        where, params = self._where(table, filters)
+        sql = f'SELECT {projection} FROM "{table}"{where}'
+        if order:
+            self._check(table, *[column for column, _ in order])
+            sql += ' ORDER BY ' + ', '.join(f'"{column}" {"DESC" if desc else "ASC"}' for column, desc in order)
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        rows = [_decode(r) for r in self._conn().execute(sql, params)]
+        return project_rows(rows, columns, self._embed_lookup(rows, embeds))
+
+    def count(self, table, filters=None):
+        self._check(table)
+        where, params = self._where(table, filters)
+        return self._conn().execute(f'SELECT COUNT(*) FROM "{table}"{where}', params).fetchone()[0]
+
+    def insert(self, table, rows):
+        if not rows:
+            return []
+        self._check(table)
+        now = datetime.now(timezone.utc).isoformat()
+        timestamp_column = TIMESTAMP_COLUMNS.get(table, 'created_at')
+        groups = {}
+        ids = []
+        for row in rows:
+            row = dict(row)
+            row.setdefault('id', str(uuid.uuid4()))
+            if timestamp_column in self.columns[table]:
+                row.setdefault(timestamp_column, now)
+            ids.append(row['id'])
+            # executemany needs one statement per column set; a single call normally has one
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        conn = self._conn()
+        with conn:
+            for columns, group in groups.items():
+                self._check(table, *columns)
+                column_list = ', '.join(f'"{c}"' for c in columns)
+                placeholders = ', '.join('?' for _ in columns)
+                sql = f'INSERT INTO "{table}" ({column_list}) VALUES ({placeholders})'
+                conn.executemany(sql, [[_encode(c, row[c]) for c in columns] for row in group])
+        return self._rows_by_id(table, ids)
+
+    def update(self, table, values, filters):
+        self._check(table, *values)
+        where, params = self._where(table, filters)
+        conn = self._conn()
+        with conn:
+            ids = [r[0] for r in conn.execute(f'SELECT id FROM "{table}"{where}', params)]
+            if ids and values:
+                assignments = ', '.join(f'"{c}" = ?' for c in values)
+                conn.execute(f'UPDATE "{table}" SET {assignments} WHERE id IN (SELECT value FROM json_each(?))',
+                             [_encode(c, v) for c, v in values.items()] + [json.dumps(ids)])
+        return self._rows_by_id(table, ids)
+
+    def update_many(self, table, rows):
+        # rows: dicts with an id plus the columns to set on that row. Returns rows written.
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(c for c in row if c != 'id')), []).append(row)
+        written = 0
+        conn = self._conn()
+        with conn:
+            for columns, group in groups.items():
+                if not columns:
+                    continue
+                self._check(table, *columns)
+                assignments = ', '.join(f'"{c}" = ?' for c in columns)
+                cursor = conn.executemany(f'UPDATE "{table}" SET {assignments} WHERE id = ?',
+                                          [[_encode(c, row[c]) for c in columns] + [_normalize(row['id'])]
+                                           for row in group])
+                written += cursor.rowcount
+        return written
+
+    def delete(self, table, filters):
+        self._check(table)
+        where, params = self._where(table, filters)
+        conn = self._conn()
+        with conn:
+            removed = [_decode(r) for r in conn.execute(f'SELECT * FROM "{table}"{where}', params)]
+            if removed:
+                conn.execute(f'DELETE FROM "{table}" WHERE id IN (SELECT value FROM json_each(?))',
+                             [json.dumps([r['id'] for r in removed])])
+        return removed
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # created in another thread; released when that thread exits
+        self._local = threading.local()
+
+
+class InstrumentedBackend:
+    # Times every round-trip per table and operation for /metrics
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+
+    def _call(self, op, table, fn, *args, **kwargs):
+        try:
+            with timed(DB_SECONDS, table=table, op=op):
+                return fn(table, *args, **kwargs)
+        except Exception:
+            metrics.inc(ERRORS_TOTAL, where=f'db_{op}')
+            raise
+
+    def select(self, table, *args, **kwargs):
+        return self._call('select', table, self.backend.select, *args, **kwargs)
+
+    def count(self, table, *args, **kwargs):
+        return self._call('count', table, self.backend.count, *args, **kwargs)
+
+    def insert(self, table, rows):
+        return self._call('insert', table, self.backend.insert, rows)
+
+    def update(self, table, *args, **kwargs):
+        return self._call('update', table, self.backend.update, *args, **kwargs)
+
+    def update_many(self, table, rows):
+        return self._call('update_many', table, self.backend.update_many, rows)
+
+    def delete(self, table, *args, **kwargs):
+        return self._call('delete', table, self.backend.delete, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+class CompressingBackend:
+    # Stores the text columns in text_codec.COMPRESSED_TEXT_COLUMNS through the codec and
+    # decodes them again in every row read back, so callers only ever see plain text
+    def __init__(self, backend, codec):
+        self.backend = backend
+        self.codec = codec
+        self.name = backend.name
+
+    def _decode(self, table, rows):
+        if table not in COMPRESSED_TEXT_COLUMNS or not isinstance(rows, list):
+            return rows
+        return [self.codec.decode_row(table, row) for row in rows]
+
+    def select(self, table, *args, **kwargs):
+        return self._decode(table, self.backend.select(table, *args, **kwargs))
+
+    def insert(self, table, rows):
+        return self._decode(table, self.backend.insert(table, [self.codec.encode_row(table, r) for r in rows]))
+
+    def update(self, table, values, *args, **kwargs):
+        return self._decode(table, self.backend.update(table, self.codec.encode_row(table, values), *args, **kwargs))
+
+    def update_many(self, table, rows):
+        return self.backend.update_many(table, [self.codec.encode_row(table, r) for r in rows])
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+# === Batching ===
+
+class _Pending:
+    __slots__ = ('key', 'result')
+
+    def __init__(self, key):
+        self.key = key
+        self.result = None
+
+
+class LookupBatch:
+    """
+    Collects by-key lookups and resolves them with one "in" query per (table, column, projection).
+
+        batch = repo.batch()
+        job = batch.get('jobs', job_id, JOB_SCREENING_COLUMNS)
+        resumes = [batch.get('resumes', rid, RESUME_SCREENING_COLUMNS) for rid in ids]
+        batch.execute()
+        job.result, [r.result for r in resumes]
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.groups = {}
+
+    def get(self, table, key, columns='*', key_column='id'):
+        pending = _Pending(key)
+        self.groups.setdefault((table, key_column, _clean_columns(columns)), []).append(pending)
+        return pending
+
+    def _resolve(self, group, pendings):
+        table, key_column, columns = group
+        select_columns = columns
+        if columns != '*' and key_column not in _split_columns(columns):
+            select_columns = f'{columns},{key_column}'
+        by_key = {}
+        keys = list(dict.fromkeys(str(p.key) for p in pendings))
+        for chunk in _chunks(keys, IN_CHUNK_SIZE):
+            for row in self.backend.select(table, select_columns, [(key_column, 'in', chunk)]):
+                by_key[str(row.get(key_column))] = row
+        for p in pendings:
+            p.result = by_key.get(str(p.key))
+
+    def execute(self):
+        groups, self.groups = self.groups, {}
+        if len(groups) <= 1:
+            for group, pendings in groups.items():
+                self._resolve(group, pendings)
+            return
+        # Independent groups go out concurrently over the shared connection pool
+        with ThreadPoolExecutor(max_workers=min(len(groups), BATCH_MAX_WORKERS)) as pool:
+            for future in [pool.submit(self._resolve, g, p) for g, p in groups.items()]:
+                future.result()
+
+
+# === Repository ===
+
+class Repository:
+    def __init__(self, backend):
+        backend = InstrumentedBackend(backend) if metrics.ENABLED else backend
+        # stored_backend sees text columns as stored (possibly compressed); everything
+        # else goes through self.backend and sees plain text
+        self.stored_backend = backend
+        self.text_codec = TextCodec(backend)
+        self.backend = CompressingBackend(backend, self.text_codec)
+
+    def batch(self):
+        return LookupBatch(self.backend)
+
+    def _first(self, table, columns, filters):
+        rows = self.backend.select(table, columns, filters, limit=1)
+        return rows[0] if rows else None
+
+    def _select_in(self, table, columns, column, values, backend=None):
+        backend = backend or self.backend
+        rows = []
+        for chunk in _chunks(values, IN_CHUNK_SIZE):
+            rows.extend(backend.select(table, columns, [(column, 'in', chunk)]))
+        return rows
+
+    # --- users ---
+    def get_user_by_email(self, email, columns='id'):
+        return self._first('users', columns, [('email', 'eq', email)])
+
+    def get_user_for_login(self, email):
+        return self.get_user_by_email(email, USER_AUTH_COLUMNS)
+
+    def get_user_for_otp(self, email):
+        return self.get_user_by_email(email, USER_OTP_COLUMNS)
+
+    def get_user_profile(self, user_id):
+        return self._first('users', USER_PROFILE_COLUMNS, [('id', 'eq', user_id)])
+
+    def create_user(self, values):
+        rows = self.backend.insert('users', [values])
+        return rows[0] if rows else None
+
+    def update_user_by_email(self, email, values):
+        return self.backend.update('users', values, [('email', 'eq', email)])
+
+    # --- jobs ---
+    def list_jobs(self, user_id=None):
+        filters = [('user_id', 'eq', user_id)] if user_id else None
+        return self.backend.select('jobs', JOB_COLUMNS, filters)
+
+    def get_job_for_screening(self, job_id):
+        return self._first('jobs', JOB_SCREENING_COLUMNS, [('id', 'eq', job_id)])
+
+    def create_job(self, values):
+        rows = self.backend.insert('jobs', [values])
+        return rows[0] if rows else None
+
+    # --- resumes ---
+    def create_resume(self, values):
+        rows = self.backend.insert('resumes', [values])
+        return rows[0] if rows else None
+
+    def create_resumes(self, rows):
+        return self.backend.insert('resumes', rows)
+
+    def get_resumes_for_screening(self, resume_ids, include_raw_text=False):
+        columns = RESUME_SCREENING_COLUMNS + (', raw_text' if include_raw_text else '')
+        return self._select_in('resumes', columns, 'id', resume_ids)
+
+    def get_resume_raw_text(self, resume_id):
+        return self._first('resumes', 'id, raw_text, text_purged_at', [('id', 'eq', resume_id)])
+
+    def get_resume_file(self, resume_id):
+        return self._first('resumes', RESUME_FILE_COLUMNS, [('id', 'eq', resume_id)])
+
+    def get_resume_by_filepath(self, filepath):
+        return self._first('resumes', RESUME_FILE_COLUMNS, [('filepath', 'eq', filepath)])
+
+    def get_resume_files(self, resume_ids):
+        return self._select_in('resumes', RESUME_FILE_COLUMNS, 'id', resume_ids)
+
+    def list_resumes_for_index(self, after=None, limit=1000, columns=RESUME_INDEX_COLUMNS):
+        # Keyset page ordered by (upload_date, id); `after` is that pair for the last row
+        # of the previous page
+        order = [('upload_date', False), ('id', False)]
+        if after is None:
+            return self.backend.select('resumes', columns, order=order, limit=limit)
+        upload_date, last_id = after
+        rows = self.backend.select('resumes', columns, [('upload_date', 'eq', upload_date), ('id', 'gt', last_id)],
+                                   order=order, limit=limit)
+        if len(rows) < limit:
+            rows += self.backend.select('resumes', columns, [('upload_date', 'gt', upload_date)],
+                                        order=order, limit=limit - len(rows))
+        return rows
+
+    def get_resume_skills(self, resume_ids):
+        return self._select_in('resumes', RESUME_SKILL_INDEX_COLUMNS, 'id', resume_ids)
+
+    def get_resumes_for_reindex(self, resume_ids):
+        return self._select_in('resumes', RESUME_REINDEX_COLUMNS, 'id', resume_ids)
+
+    def update_resumes(self, rows, stored=False):
+        # Bulk write of per-row values, INSERT_CHUNK_SIZE rows per round-trip. With stored=True
+        # text values are written exactly as given (already encoded by the caller).
+        backend = self.stored_backend if stored else self.backend
+        written = 0
+        for chunk in _chunks(rows, INSERT_CHUNK_SIZE):
+            written += backend.update_many('resumes', chunk)
+        return written
+
+    # --- text storage ---
+    def get_resume_texts(self, resume_ids, stored=False):
+        # With stored=True the text columns come back as stored, possibly compressed
+        return self._select_in('resumes', RESUME_TEXT_COLUMNS, 'id', resume_ids,
+                               self.stored_backend if stored else None)
+
+    def list_recent_resume_texts(self, limit):
+        return self.backend.select('resumes', 'id, raw_text, processed_text', order=[('upload_date', True)],
+                                   limit=limit)
+
+    def save_text_dictionary(self, values):
+        return self.backend.insert(DICTIONARY_TABLE, [values])
+
+    # --- retention ---
+    def get_resumes_by_filepaths(self, filepaths):
+        # Every resume sharing one of these content-addressed files
+        return self._select_in('resumes', RESUME_RETENTION_COLUMNS, 'filepath', filepaths)
+
+    def get_screened_resume_ids(self, resume_ids):
+        return {str(r['resume_id']) for r in self._select_in('screening_results', 'resume_id', 'resume_id', resume_ids)}
+
+    # --- background jobs ---
+    def get_reindex_checkpoint(self, name):
+        return self._first('reindex_checkpoints', '*', [('id', 'eq', name)])
+
+    def save_reindex_checkpoint(self, name, values):
+        if self.backend.update('reindex_checkpoints', values, [('id', 'eq', name)]):
+            return
+        self.backend.insert('reindex_checkpoints', [dict(values, id=name)])
+
+    # --- screening results ---
+    def insert_screening_results(self, rows):
+        # One round-trip per INSERT_CHUNK_SIZE rows; multi-job screening can produce thousands
+        inserted = []
+        for chunk in _chunks(rows, INSERT_CHUNK_SIZE):
+            inserted.extend(self.backend.insert('screening_results', chunk))
+        return inserted
+
+    def get_dashboard_results(self):
+        return self._all_results([], DASHBOARD_COLUMNS)
+
+    def get_screening_components(self, job_id):
+        # Newest first, so the latest result per resume comes first
+        return self._all_results([('job_id', 'eq', job_id)], SCREENING_COMPONENT_COLUMNS)
+
+    def get_job_resume_files(self, job_id):
+        return self._all_results([('job_id', 'eq', job_id)], JOB_RESUME_FILE_COLUMNS)
+
+    def get_results_for_analytics(self, job_ids):
+        rows = []
+        for chunk in _chunks(job_ids, IN_CHUNK_SIZE):
+            rows.extend(self._all_results([('job_id', 'in', chunk)], ANALYTICS_COLUMNS))
+        return rows
+
+    def _all_results(self, filters, columns):
+        # Every matching result, newest first, one keyset page at a time. Only an empty page
+        # ends the walk, in case max-rows cut a page short.
+        rows, after = [], None
+        while True:
+            page = self._results_page(filters, after, PAGE_SIZE, columns)
+            if not page:
+                return rows
+            rows.extend(page)
+            after = (page[-1].get('created_at'), page[-1]['id'])
+
+    def list_job_results(self, job_id, after=None, limit=1000, columns=SCREENING_EXPORT_COLUMNS):
+        # Keyset page of a job's results, newest first by (created_at, id); `after` is that
+        # pair for the last row of the previous page
+        return self._results_page([('job_id', 'eq', job_id)], after, limit, columns)
+
+    def _results_page(self, filters, after, limit, columns):
+        order = [('created_at', True), ('id', True)]
+        if after is None:
+            return self.backend.select('screening_results', columns, filters, order=order, limit=limit)
+        created_at, last_id = after
+        rows = self.backend.select('screening_results', columns,
+                                   filters + [('created_at', 'eq', created_at), ('id', 'lt', last_id)],
+                                   order=order, limit=limit)
+        if len(rows) < limit:
+            rows += self.backend.select('screening_results', columns, filters + [('created_at', 'lt', created_at)],
+                                        order=order, limit=limit - len(rows))
+        return rows
+
+    # --- notifications ---
+    def create_notifications(self, rows):
+        return self.backend.insert('notifications', rows)
+
+    def list_notifications(self, user_id, limit=None, after=None):
+        # Keyset page, newest first by (created_at, id); `after` is that pair for the last
+        # row of the previous page. A buffered flush gives a whole batch one created_at,
+        # so the id breaks the tie.
+        # With no limit every notification is returned, walked a page at a time so
+        # max-rows cannot cut the list short.
+        if limit is None:
+            rows = []
+            while True:
+                page = self.list_notifications(user_id, PAGE_SIZE, after)
+                if not page:
+                    return rows
+                rows.extend(page)
+                after = (page[-1].get('created_at'), page[-1]['id'])
+        order = [('created_at', True), ('id', True)]
+        filters = [('user_id', 'eq', user_id)]
+        if after is None:
+            return self.backend.select('notifications', NOTIFICATION_COLUMNS, filters, order=order, limit=limit)
+        created_at, last_id = after
+        rows = self.backend.select('notifications', NOTIFICATION_COLUMNS,
+                                   filters + [('created_at', 'eq', created_at), ('id', 'lt', last_id)],
+                                   order=order, limit=limit)
+        if len(rows) < limit:
+            rows += self.backend.select('notifications', NOTIFICATION_COLUMNS,
+                                        filters + [('created_at', 'lt', created_at)], order=order,
+                                        limit=limit - len(rows))
+        return rows
+
+    def count_unread_notifications(self, user_id):
+        return self.backend.count('notifications', [('user_id', 'eq', user_id), ('read', 'eq', False)])
+
+    def mark_notification_read(self, user_id, notification_id):
+        return self.backend.update('notifications', {'read': True},
+                                   [('id', 'eq', notification_id), ('user_id', 'eq', user_id)])
+
+    def mark_all_notifications_read(self, user_id):
+        return self.backend.update('notifications', {'read': True}, [('user_id', 'eq', user_id)])
+
+    # --- outbound email ---
+    def save_email_status(self, values):
+        values = {c: values.get(c) for c in _split_columns(EMAIL_STATUS_COLUMNS)}
+        if self.backend.update('email_messages', values, [('id', 'eq', values['id'])]):
+            return
+        self.backend.insert('email_messages', [values])
+
+    def get_email_status(self, message_id):
+        return self._first('email_messages', EMAIL_STATUS_COLUMNS, [('id', 'eq', message_id)])
+
+    def close(self):
+        self.backend.close()
+
+
+def create_repository():
+    # DB_BACKEND selects the storage backend: "supabase" (default), "sqlite" or "memory"
+    backend_name = os.environ.get("DB_BACKEND", "supabase").lower()
+
+    if backend_name == 'memory':
+        print("Using in-memory database backend. Data will not persist across restarts.")
+        return Repository(MemoryBackend())
+
+    if backend_name == 'sqlite':
+        path = os.environ.get("SQLITE_PATH", "talentify.db")
+        try:
+            backend = SqliteBackend(path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Could not open SQLite database {path}: {e}. Database features will be disabled.")
+            return None
+        print(f"Using SQLite database backend at {path}")
+        return Repository(backend)
+
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if not url or not key:
+        print("WARNING: SUPABASE_URL and SUPABASE_KEY environment variables are not set. Supabase features will not work.")
+        return None
+
+    try:
+        pool_size = int(os.environ.get("DB_POOL_SIZE", 20))
+        return Repository(PostgrestBackend(url, key, pool_size=pool_size))
+    except Exception as e:
+        print(f"Could not connect to Supabase: {e}. Supabase features will be disabled.")
+        return None
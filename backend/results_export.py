@@ -0,0 +1,188 @@
+# results_export.py
+# Streaming export of one job's screening results for /api/jobs/<job_id>/results/export.
+#
+# Results are read from the repository one keyset page at a time and each page is
+# encoded and yielded before the next is fetched, so memory holds a single page no
+# matter how many results the job has:
+#     csv      header row, then one row per result (matched skills joined with "; ")
+#     ndjson   one JSON object per line
+#     parquet  one row group per page; needs pyarrow (`pip install pyarrow`)
+import csv
+import io
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPORT_PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", 1000))
+PROGRESS_EVERY_PAGES = 50
+
+EXPORT_FIELDS = [
+    'result_id', 'job_id', 'resume_id', 'filename', 'uploader_id', 'uploaded_at',
+    'match_score', 'semantic_score', 'skill_score', 'experience_score', 'matched_skills',
+    'department_match', 'experience_level', 'category', 'screened_at',
+]
+SCORE_FIELDS = {'match_score', 'semantic_score', 'skill_score', 'experience_score'}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def export_row(result):
+    # Flatten a screening_results row and its embedded resume into EXPORT_FIELDS
+    resume = result.get('resumes') or {}
+    department_match = result.get('department_match')
+    return {
+        'result_id': result.get('id'),
+        'job_id': result.get('job_id'),
+        'resume_id': result.get('resume_id'),
+        'filename': resume.get('filename'),
+        'uploader_id': resume.get('user_id'),
+        'uploaded_at': resume.get('upload_date'),
+        'match_score': result.get('match_score'),
+        'semantic_score': result.get('semantic_score'),
+        'skill_score': result.get('skill_score'),
+        'experience_score': result.get('experience_score'),
+        'matched_skills': list(result.get('matched_skills') or []),
+        'department_match': None if department_match is None else str(department_match),
+        'experience_level': result.get('experience_level'),
+        'category': result.get('categorized_field') or resume.get('categorized_field'),
+        'screened_at': result.get('created_at'),
+    }
+
+
+def iter_pages(repo, job_id, page_size=EXPORT_PAGE_SIZE):
+    # Pages of export rows, newest result first
+    cursor = None
+    while True:
+        page = repo.list_job_results(job_id, cursor, page_size)
+        if not page:
+            return
+        yield [export_row(result) for result in page]
+        # Only an empty page ends the export; max-rows can cut any page short
+        cursor = (page[-1].get('created_at'), page[-1]['id'])
+
+
+def _encode_csv(pages):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for page in pages:
+        for row in page:
+            writer.writerow(['; '.join(row[f]) if f == 'matched_skills' else row[f] for f in EXPORT_FIELDS])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _encode_ndjson(pages):
+    for page in pages:
+        if orjson is not None:
+            yield b''.join(orjson.dumps(row) + b'\n' for row in page)
+        else:
+            yield ''.join(json.dumps(row) + '\n' for row in page).encode('utf-8')
+
+
+class _ParquetSink:
+    # Append-only file object for pyarrow: the writer only needs write() and tell(),
+    # and whatever it has written can be drained and sent straight away
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b''.join(chunks)
+
+
+def _parquet_schema(pa):
+    fields = []
+    for name in EXPORT_FIELDS:
+        if name in SCORE_FIELDS:
+            fields.append(pa.field(name, pa.float64()))
+        elif name == 'matched_skills':
+            fields.append(pa.field(name, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _encode_parquet(pages):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(pa)
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for page in pages:
+            writer.write_table(pa.Table.from_pylist(page, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        # Footer with the row group index; also written if the client goes away mid-stream
+        writer.close()
+    yield sink.drain()
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def stream_export(pages, fmt, label='export'):
+    """
+    Yield the encoded export of `pages` (an iterable of lists of export rows) in `fmt`,
+    one of EXPORT_FORMATS. Each page is encoded and yielded before the next is read.
+    """
+    encoder = {'csv': _encode_csv, 'ndjson': _encode_ndjson, 'parquet': _encode_parquet}[fmt]
+    counted = {'rows': 0, 'pages': 0}
+
+    def counting(pages):
+        for page in pages:
+            counted['rows'] += len(page)
+            counted['pages'] += 1
+            if counted['pages'] % PROGRESS_EVERY_PAGES == 0:
+                print(f"[{label}] Exported {counted['rows']} rows so far")
+            yield page
+
+    total_bytes = 0
+    for chunk in encoder(counting(pages)):
+        total_bytes += len(chunk)
+        yield chunk
+    print(f"[{label}] Finished exporting {counted['rows']} rows as {fmt} "
+          f"({total_bytes / (1024 * 1024):.1f} MB)")
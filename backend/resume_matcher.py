@@ -5,24 +5,128 @@ import numpy as np
 import re
 from sentence_transformers import SentenceTransformer
 
-try:
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-except Exception as e:
-    print(f"Could not load SentenceTransformer model: {e}. Semantic similarity will fall back to TF-IDF.")
-    model = None
+from embedding_service import EMBEDDING_MODEL_NAME, EMBEDDING_SOCKET, EmbeddingClient, FallbackEncoder
+from embeddings import EMBEDDING_MODE, ChunkedEncoder
+from metrics import STAGE_SECONDS, timed, timed_stage
+
+
+def load_model():
+    try:
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+    except Exception as e:
+        print(f"Could not load SentenceTransformer model: {e}. Semantic similarity will fall back to TF-IDF.")
+        return None
+
+
+# With EMBEDDING_SOCKET set, encoding goes to the shared sidecar (embedding_service.py) and
+# a worker only loads its own model if the sidecar stops answering
+model = FallbackEncoder(EmbeddingClient(EMBEDDING_SOCKET), load_model) if EMBEDDING_SOCKET else load_model()
+
+# EMBEDDING_MODE=chunked embeds resumes section by section instead of truncating them
+chunk_encoder = ChunkedEncoder(model) if model and EMBEDDING_MODE == 'chunked' else None
+
+WEIGHT_SEMANTIC = 0.15
+WEIGHT_SKILL_MATCH = 0.75
+WEIGHT_EXPERIENCE = 0.10
+DEFAULT_WEIGHTS = {'semantic': WEIGHT_SEMANTIC, 'skill': WEIGHT_SKILL_MATCH, 'experience': WEIGHT_EXPERIENCE}
+# Multiplier on the blended score when the resume mentions the job's department
+DEPARTMENT_BONUS = 1.05
+
+EXPERIENCE_PATTERN = re.compile(r'(\d+)(?:\s*-\s*(\d+))?\+?\s*(?:year|yr)s?(?:\s*of)?\s*experience', re.IGNORECASE)
+# Checked in order when the resume states no years of experience: (keyword, score) when
+# both the job description and the resume mention it
+SENIORITY_KEYWORDS = [("senior", 0.9), ("junior", 0.9), ("entry-level", 0.9), ("lead", 0.85), ("manager", 0.8)]
+SENIORITY_DEFAULT = 0.6
+
+
+def parse_experience_required(experience_required):
+    # "2-5" -> (2, 5), "5+" -> (5, inf), "Any" or empty -> None. Raises ValueError on junk.
+    if not experience_required or experience_required == "Any":
+        return None
+    job_min_exp, job_max_exp = 0, float('inf')
+    if '-' in experience_required:
+        parts = experience_required.split('-')
+        job_min_exp = int(parts[0])
+        job_max_exp = int(parts[1].replace('+', '')) if '+' in parts[1] else int(parts[1])
+    elif '+' in experience_required:
+        job_min_exp = int(experience_required.replace('+', ''))
+    return job_min_exp, job_max_exp
+
+
+def find_experience_years(resume_text):
+    # "3-5 years of experience" -> (3, 5), "4 years experience" -> (4, 4), otherwise None
+    match = EXPERIENCE_PATTERN.search(resume_text)
+    if not match:
+        return None
+    resume_min_years = int(match.group(1))
+    resume_max_years = int(match.group(2)) if match.group(2) else resume_min_years
+    return resume_min_years, resume_max_years
+
+
+def adjust_skill_match(skill_match_percentage):
+    # Strong boost for high skill match, softer penalty for low match; scalars or arrays
+    return np.where(skill_match_percentage > 0.7, skill_match_percentage * 1.2,
+                    np.where(skill_match_percentage < 0.3, skill_match_percentage * 0.85, skill_match_percentage))
+
+
+def combine_scores(semantic_similarity, skill_match_percentage, experience_score, weights=None):
+    # Weighted blend scaled to 0-100. Works on scalars or whole arrays of components.
+    weights = weights or DEFAULT_WEIGHTS
+    total_weight = weights['semantic'] + weights['skill'] + weights['experience']
+    final_score = (
+        (semantic_similarity * weights['semantic']) +
+        (skill_match_percentage * weights['skill']) +
+        (experience_score * weights['experience'])
+    )
+    final_score = (final_score / total_weight) * 100
+    # Ensure within 0–100
+    return np.clip(final_score, 0, 100)
+
+
+def apply_department_bonus(scores, department_match, bonus=DEPARTMENT_BONUS):
+    # Final stored score: bonus for a department match, truncated to int, capped at 100
+    return np.minimum((np.asarray(scores) * np.where(department_match, bonus, 1.0)).astype(int), 100)
+
+
+def encode_texts(texts):
+    # Unit-length embeddings, pooled over chunks in chunked mode
+    if chunk_encoder is not None:
+        return chunk_encoder.encode(texts)
+    return model.encode(texts, normalize_embeddings=True)
+
+
+def prefetch_embeddings(texts):
+    # Chunked mode: encode every chunk of a screening batch in one model call up front, so
+    # the per-resume scoring below only hits the chunk cache
+    if chunk_encoder is None:
+        return
+    try:
+        with timed(STAGE_SECONDS, stage='embedding'):
+            chunk_encoder.encode(texts)
+    except Exception as e:
+        print(f"Error prefetching embeddings: {e}")
+
 
 def calculate_match_score_enhanced(job_description_text, required_skills, experience_required,
                                    resume_processed_text, resume_extracted_skills, hf_api_key=None):
+    components = calculate_match_components(job_description_text, required_skills, experience_required,
+                                            resume_processed_text, resume_extracted_skills)
+    final_score = combine_scores(components['semantic'], components['skill'], components['experience'])
+    return final_score, components['matched_skills']
 
-    WEIGHT_SEMANTIC = 0.15  #
-    WEIGHT_SKILL_MATCH = 0.75
-    WEIGHT_EXPERIENCE = 0.10
+
+@timed_stage('match_score')
+def calculate_match_components(job_description_text, required_skills, experience_required,
+                               resume_processed_text, resume_extracted_skills):
+    # The three 0-1 inputs to combine_scores (skill can reach 1.2 after the boost) plus
+    # the matched skills. Stored per screening result so results can be re-weighted later.
 
     semantic_similarity = 0.0
     if model:
         try:
-            embeddings = model.encode([job_description_text, resume_processed_text])
-            semantic_similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
+            with timed(STAGE_SECONDS, stage='embedding'):
+                embeddings = encode_texts([job_description_text, resume_processed_text])
+            semantic_similarity = float(embeddings[0] @ embeddings[1])
         except Exception as e:
             print(f"Error with SentenceTransformer embeddings: {e}. Falling back to TF-IDF.")
             documents = [job_description_text, resume_processed_text]
@@ -50,31 +154,16 @@ def calculate_match_score_enhanced(job_description_text, required_skills, experi
     skill_match_percentage = 0
     if required_skills_lower:
         skill_match_percentage = len(matched_required_skills) / len(required_skills_lower)
-
-    # Strong boost for high skill match, softer penalty for low match
-    if skill_match_percentage > 0.7:
-        skill_match_percentage *= 1.2  # 20% boost
-    elif skill_match_percentage < 0.3:
-        skill_match_percentage *= 0.85  # Slight penalty
+    skill_match_percentage = float(adjust_skill_match(skill_match_percentage))
 
     # Experience Matching
     experience_score = 0.0
-    if experience_required and experience_required != "Any":
-        job_min_exp, job_max_exp = 0, float('inf')
-        if '-' in experience_required:
-            parts = experience_required.split('-')
-            job_min_exp = int(parts[0])
-            job_max_exp = int(parts[1].replace('+', '')) if '+' in parts[1] else int(parts[1])
-        elif '+' in experience_required:
-            job_min_exp = int(experience_required.replace('+', ''))
-
-        resume_experience_match = re.search(
-            r'(\d+)(?:\s*-\s*(\d+))?\+?\s*(?:year|yr)s?(?:\s*of)?\s*experience',
-            resume_processed_text, re.IGNORECASE
-        )
-        if resume_experience_match:
-            resume_min_years = int(resume_experience_match.group(1))
-            resume_max_years = int(resume_experience_match.group(2)) if resume_experience_match.group(2) else resume_min_years
+    job_range = parse_experience_required(experience_required)
+    if job_range:
+        job_min_exp, job_max_exp = job_range
+        resume_years = find_experience_years(resume_processed_text)
+        if resume_years:
+            resume_min_years, resume_max_years = resume_years
 
             if (job_min_exp <= resume_max_years and job_max_exp >= resume_min_years):
                 experience_score = 1.0
@@ -87,30 +176,115 @@ def calculate_match_score_enhanced(job_description_text, required_skills, experi
         else:
             job_desc_lower = job_description_text.lower()
             resume_text_lower = resume_processed_text.lower()
-            if "senior" in job_desc_lower and "senior" in resume_text_lower:
-                experience_score = 0.9
-            elif "junior" in job_desc_lower and "junior" in resume_text_lower:
-                experience_score = 0.9
-            elif "entry-level" in job_desc_lower and "entry-level" in resume_text_lower:
-                experience_score = 0.9
-            elif "lead" in job_desc_lower and "lead" in resume_text_lower:
-                experience_score = 0.85
-            elif "manager" in job_desc_lower and "manager" in resume_text_lower:
-                experience_score = 0.8
-            else:
-                experience_score = 0.6
+            experience_score = next((score for keyword, score in SENIORITY_KEYWORDS
+                                     if keyword in job_desc_lower and keyword in resume_text_lower),
+                                    SENIORITY_DEFAULT)
 
-    # Combine Scores
-    total_weight = WEIGHT_SEMANTIC + WEIGHT_SKILL_MATCH + WEIGHT_EXPERIENCE
-    final_score = (
-        (semantic_similarity * WEIGHT_SEMANTIC) +
-        (skill_match_percentage * WEIGHT_SKILL_MATCH) +
-        (experience_score * WEIGHT_EXPERIENCE)
-    )
-    final_score = (final_score / total_weight) * 100
+    return {
+        'semantic': float(semantic_similarity),
+        'skill': skill_match_percentage,
+        'experience': experience_score,
+        'matched_skills': matched_required_skills,
+    }
 
-    # Ensure within 0–100
-    final_score = np.clip(final_score, 0, 100)
 
-    return final_score, matched_required_skills
+class MatchMatrix:
+    # Result of calculate_match_matrix: resume x job arrays for the final score and each
+    # component (all already normalized to 0-1 except `scores`, which is 0-100)
+    def __init__(self, scores, semantic, skill, experience, skill_hits, job_skill_columns):
+        self.scores = scores
+        self.semantic = semantic
+        self.skill = skill
+        self.experience = experience
+        self._skill_hits = skill_hits
+        self._job_skill_columns = job_skill_columns
+
+    def matched_skills(self, resume_index, job_index):
+        return [skill for skill, column in self._job_skill_columns[job_index]
+                if self._skill_hits[resume_index, column]]
+
+
+def _semantic_matrix(job_texts, resume_texts):
+    # Cosine similarity of every resume to every job: one encode call per side
+    if model:
+        try:
+            with timed(STAGE_SECONDS, stage='embedding'):
+                job_embeddings = encode_texts(job_texts)
+                resume_embeddings = encode_texts(resume_texts)
+            return resume_embeddings @ job_embeddings.T
+        except Exception as e:
+            print(f"Error with SentenceTransformer embeddings: {e}. Falling back to TF-IDF.")
+    # TF-IDF fitted over the whole set, not per pair as in the single-job path
+    try:
+        tfidf_matrix = TfidfVectorizer().fit_transform(job_texts + resume_texts)
+    except ValueError:  # nothing but stop words
+        return np.zeros((len(resume_texts), len(job_texts)))
+    return (tfidf_matrix[len(job_texts):] @ tfidf_matrix[:len(job_texts)].T).toarray()
+
+
+@timed_stage('match_matrix')
+def calculate_match_matrix(jobs, resumes):
+    """
+    Score every resume against every job in one pass, with the same rules as
+    calculate_match_score_enhanced. `jobs` need description, skills and
+    experience_required; `resumes` need processed_text and extracted_skills. Resume-side
+    work (embedding, skill matching, experience parsing) happens once per resume, not
+    once per pair. Raises ValueError if a job's experience_required cannot be parsed.
+    """
+    job_ranges = [parse_experience_required(job.get('experience_required')) for job in jobs]
+    job_texts = [job['description'] or '' for job in jobs]
+    resume_texts = [resume['processed_text'] or '' for resume in resumes]
+
+    semantic = (_semantic_matrix(job_texts, resume_texts) + 1) / 2
+
+    # Skills: resume x skill hits over the union of required skills, times skill x job
+    # requirement counts, gives matched counts per pair
+    vocabulary = {}
+    job_skill_columns = []
+    for job in jobs:
+        columns = []
+        for skill in job['skills'] or []:
+            skill = skill.lower()
+            columns.append((skill, vocabulary.setdefault(skill, len(vocabulary))))
+        job_skill_columns.append(columns)
+
+    skill_hits = np.zeros((len(resumes), len(vocabulary)), dtype=bool)
+    for r, resume in enumerate(resumes):
+        resume_skills_lower = [es.lower() for es in resume['extracted_skills'] or []]
+        for skill, column in vocabulary.items():
+            skill_hits[r, column] = any(skill in rs or rs in skill for rs in resume_skills_lower)
+
+    required = np.zeros((len(vocabulary), len(jobs)))
+    for j, columns in enumerate(job_skill_columns):
+        for _, column in columns:
+            required[column, j] += 1
+    matched_counts = skill_hits.astype(float) @ required
+    required_counts = required.sum(axis=0)
+    skill = np.divide(matched_counts, required_counts, out=np.zeros_like(matched_counts), where=required_counts > 0)
+    skill = adjust_skill_match(skill)
+
+    # Experience: stated years where the resume has them, seniority keywords otherwise
+    job_min = np.array([rng[0] if rng else 0 for rng in job_ranges], dtype=float)
+    job_max = np.array([rng[1] if rng else float('inf') for rng in job_ranges], dtype=float)
+    resume_years = [find_experience_years(text) for text in resume_texts]
+    has_years = np.array([years is not None for years in resume_years], dtype=bool)
+    resume_min = np.array([years[0] if years else 0 for years in resume_years], dtype=float)[:, None]
+    resume_max = np.array([years[1] if years else 0 for years in resume_years], dtype=float)[:, None]
+    by_years = np.select(
+        [(job_min <= resume_max) & (job_max >= resume_min), resume_min > job_max, resume_max < job_min],
+        [1.0, 0.8, 0.4], SENIORITY_DEFAULT)
+
+    def keyword_flags(texts):
+        flags = [[kw in text.lower() for kw, _ in SENIORITY_KEYWORDS] for text in texts]
+        return np.array(flags, dtype=bool).reshape(len(texts), len(SENIORITY_KEYWORDS))
+
+    both = keyword_flags(resume_texts)[:, None, :] & keyword_flags(job_texts)[None, :, :]
+    keyword_scores = np.array([score for _, score in SENIORITY_KEYWORDS])
+    by_keywords = np.where(both.any(axis=2), keyword_scores[both.argmax(axis=2)], SENIORITY_DEFAULT)
+
+    experience = np.where(has_years[:, None], by_years, by_keywords)
+    has_range = np.array([rng is not None for rng in job_ranges], dtype=bool)
+    experience = np.where(has_range[None, :], experience, 0.0)
 
+    scores = combine_scores(semantic, skill, experience)
+    return MatchMatrix(scores, semantic, skill, experience, skill_hits, job_skill_columns)
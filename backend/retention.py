@@ -0,0 +1,207 @@
+# retention.py
+# Tiered retention for resume files and raw text.
+#
+#   python retention.py --dry-run      # report what would be reclaimed
+#   python retention.py                # apply the policy
+#
+# Policy (days since upload; 0 turns a rule off):
+#     RETENTION_FILE_DAYS        the original PDF/DOCX is moved to RETENTION_ARCHIVE_DIR
+#                                (RETENTION_FILE_ACTION=archive) or deleted (=delete)
+#     RETENTION_TEXT_DAYS        raw_text is dropped; processed_text, skills and category
+#                                stay, so search and screening keep working
+#     RETENTION_UNSCREENED_DAYS  both of the above, sooner, for resumes that were never
+#                                screened against any job
+# Files are content-addressed and identical uploads share one file, so a file only goes
+# once every resume pointing at it is due; otherwise it is kept and reported as shared.
+# Resumes are walked oldest first in (upload_date, id) order and the walk stops at the
+# first resume too new for any rule. Handled resumes are stamped with file_archived_at /
+# text_purged_at, so the job can be re-run at any time.
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from repository import RESUME_RETENTION_COLUMNS, create_repository
+from storage import LocalStorage, StorageError, create_storage
+
+RETENTION_FILE_DAYS = int(os.environ.get("RETENTION_FILE_DAYS", 0))
+RETENTION_TEXT_DAYS = int(os.environ.get("RETENTION_TEXT_DAYS", 0))
+RETENTION_UNSCREENED_DAYS = int(os.environ.get("RETENTION_UNSCREENED_DAYS", 0))
+RETENTION_FILE_ACTION = os.environ.get("RETENTION_FILE_ACTION", "archive").lower()
+RETENTION_ARCHIVE_DIR = os.environ.get("RETENTION_ARCHIVE_DIR", "archive")
+RETENTION_BATCH_SIZE = int(os.environ.get("RETENTION_BATCH_SIZE", 500))
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class RetentionPolicy:
+    def __init__(self, file_days=RETENTION_FILE_DAYS, text_days=RETENTION_TEXT_DAYS,
+                 unscreened_days=RETENTION_UNSCREENED_DAYS, now=None):
+        self.now = now or datetime.now(timezone.utc)
+        self.file_cutoff = self._cutoff(file_days)
+        self.text_cutoff = self._cutoff(text_days)
+        self.unscreened_cutoff = self._cutoff(unscreened_days)
+
+    def _cutoff(self, days):
+        return self.now - timedelta(days=days) if days > 0 else None
+
+    @property
+    def newest_cutoff(self):
+        # Nothing uploaded after this is due under any rule
+        cutoffs = [c for c in (self.file_cutoff, self.text_cutoff, self.unscreened_cutoff) if c]
+        return max(cutoffs) if cutoffs else None
+
+    @staticmethod
+    def _before(uploaded, cutoff):
+        return cutoff is not None and uploaded is not None and uploaded <= cutoff
+
+    def file_due(self, row, screened):
+        uploaded = _parse_time(row.get('upload_date'))
+        return self._before(uploaded, self.file_cutoff) or \
+            (not screened and self._before(uploaded, self.unscreened_cutoff))
+
+    def text_due(self, row, screened):
+        uploaded = _parse_time(row.get('upload_date'))
+        return self._before(uploaded, self.text_cutoff) or \
+            (not screened and self._before(uploaded, self.unscreened_cutoff))
+
+
+class RetentionJob:
+    def __init__(self, repo, storage, policy, action=RETENTION_FILE_ACTION, archive_dir=RETENTION_ARCHIVE_DIR,
+                 batch_size=RETENTION_BATCH_SIZE, dry_run=False):
+        if action not in ('archive', 'delete'):
+            raise ValueError(f"RETENTION_FILE_ACTION must be 'archive' or 'delete', not {action!r}")
+        self.repo = repo
+        self.storage = storage
+        self.policy = policy
+        self.action = action
+        self.archive = LocalStorage(archive_dir) if action == 'archive' and not dry_run else None
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self._seen_keys = set()
+        self.report = {
+            'dry_run': dry_run, 'scanned': 0,
+            'files_' + ('archived' if action == 'archive' else 'deleted'): 0, 'file_bytes': 0,
+            'files_missing': 0, 'files_kept_shared': 0,
+            'texts_purged': 0, 'text_bytes': 0,
+        }
+
+    def _stamp(self, rows, column):
+        now = self.policy.now.isoformat()
+        updates = [{'id': r['id'], column: now} for r in rows]
+        if column == 'text_purged_at':
+            for update in updates:
+                update['raw_text'] = None
+        if not self.dry_run:
+            self.repo.update_resumes(updates)
+
+    def _move_file(self, key):
+        # Returns the bytes reclaimed, or None if the file was already gone
+        try:
+            size = self.storage.size(key)
+        except (OSError, StorageError, TypeError):
+            return None
+        if self.dry_run:
+            return size
+        if self.archive is not None:
+            dest = self.archive.path(key)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with self.storage.open(key) as src, open(dest + '.part', 'wb') as out:
+                shutil.copyfileobj(src, out, 1024 * 1024)
+            os.replace(dest + '.part', dest)
+        self.storage.delete(key)
+        return size
+
+    def _files(self, due_rows, screened):
+        keys = sorted({r['filepath'] for r in due_rows if r.get('filepath')} - self._seen_keys)
+        self._seen_keys.update(keys)
+        if not keys:
+            return
+        # Everything sharing these files, including resumes outside this batch
+        sharing = self.repo.get_resumes_by_filepaths(keys)
+        screened = screened | self.repo.get_screened_resume_ids(
+            [r['id'] for r in sharing if str(r['id']) not in screened])
+        by_key = {}
+        for row in sharing:
+            by_key.setdefault(row['filepath'], []).append(row)
+        counter = 'files_archived' if self.action == 'archive' else 'files_deleted'
+        for key in keys:
+            rows = by_key.get(key, [])
+            if not all(r.get('file_archived_at') or self.policy.file_due(r, str(r['id']) in screened) for r in rows):
+                self.report['files_kept_shared'] += 1
+                continue
+            size = self._move_file(key)
+            if size is None:
+                self.report['files_missing'] += 1
+            else:
+                self.report[counter] += 1
+                self.report['file_bytes'] += size
+            self._stamp([r for r in rows if not r.get('file_archived_at')], 'file_archived_at')
+
+    def _texts(self, due_rows):
+        if not due_rows:
+            return
+        # Measure what the rows take in the database, compressed or not
+        stored = self.repo.get_resume_texts([r['id'] for r in due_rows], stored=True)
+        self.report['text_bytes'] += sum(len((r.get('raw_text') or '').encode('utf-8')) for r in stored)
+        self.report['texts_purged'] += len(due_rows)
+        self._stamp(due_rows, 'text_purged_at')
+
+    def run(self):
+        newest = self.policy.newest_cutoff
+        if newest is None:
+            print("No retention rule is enabled.")
+            return self.report
+        cursor = None
+        while True:
+            page = self.repo.list_resumes_for_index(cursor, self.batch_size, RESUME_RETENTION_COLUMNS)
+            if not page:
+                break
+            cursor = (page[-1].get('upload_date'), page[-1]['id'])
+            rows = [r for r in page if (_parse_time(r.get('upload_date')) or self.policy.now) <= newest]
+            self.report['scanned'] += len(rows)
+            if rows:
+                screened = self.repo.get_screened_resume_ids([r['id'] for r in rows])
+                self._files([r for r in rows if not r.get('file_archived_at')
+                             and self.policy.file_due(r, str(r['id']) in screened)], screened)
+                self._texts([r for r in rows if not r.get('text_purged_at')
+                             and self.policy.text_due(r, str(r['id']) in screened)])
+            if len(rows) < len(page) or len(page) < self.batch_size:
+                break
+        return self.report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply the resume file and text retention policy.")
+    parser.add_argument('--dry-run', action='store_true', help="report what would be reclaimed, change nothing")
+    parser.add_argument('--file-days', type=int, default=RETENTION_FILE_DAYS)
+    parser.add_argument('--text-days', type=int, default=RETENTION_TEXT_DAYS)
+    parser.add_argument('--unscreened-days', type=int, default=RETENTION_UNSCREENED_DAYS)
+    parser.add_argument('--action', choices=('archive', 'delete'), default=RETENTION_FILE_ACTION)
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    repo = create_repository()
+    if repo is None:
+        print("Database not connected.")
+        return 1
+    policy = RetentionPolicy(args.file_days, args.text_days, args.unscreened_days)
+    job = RetentionJob(repo, create_storage('uploads'), policy, action=args.action, dry_run=args.dry_run)
+    report = job.run()
+    print(json.dumps(report, indent=2))
+    mb = (report['file_bytes'] + report['text_bytes']) / (1024 * 1024)
+    print(f"{'Would reclaim' if args.dry_run else 'Reclaimed'} {mb:.1f} MB "
+          f"({report['file_bytes']} bytes of files, {report['text_bytes']} bytes of raw text)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+-- SQLite schema for DB_BACKEND=sqlite. Mirrors migration.sql and migration_notifications.sql
+-- (plus the users table that lives in Supabase auth setup). Ids are UUID strings, array
+-- columns hold JSON text and booleans are 0/1; repository.py converts on the way in and out.
+-- Timestamps are ISO-8601 UTC strings written by the application so they sort lexically.
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    phone TEXT,
+    password_hash TEXT,
+    otp TEXT,
+    is_verified INTEGER DEFAULT 0,
+    role TEXT,
+    full_name TEXT,
+    hr_id TEXT,
+    department TEXT,
+    position TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id),
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    department TEXT,
+    skills TEXT NOT NULL, -- JSON array of strings
+    experience_required TEXT,
+    location TEXT,
+    job_type TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS resumes (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id),
+    filename TEXT NOT NULL,
+    filepath TEXT NOT NULL,
+    raw_text TEXT,
+    processed_text TEXT,
+    extracted_skills TEXT, -- JSON array of strings
+    categorized_field TEXT,
+    pipeline_versions TEXT, -- JSON object: stage -> version (see text_processor.PIPELINE_VERSIONS)
+    file_archived_at TEXT, -- set by retention.py once the file was moved or removed
+    text_purged_at TEXT, -- set by retention.py once raw_text was dropped
+    upload_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS screening_results (
+    id TEXT PRIMARY KEY,
+    job_id TEXT REFERENCES jobs(id),
+    resume_id TEXT REFERENCES resumes(id),
+    match_score REAL,
+    matched_skills TEXT, -- JSON array of strings
+    department_match TEXT,
+    experience_level TEXT,
+    categorized_field TEXT,
+    semantic_score REAL,
+    skill_score REAL,
+    experience_score REAL,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id),
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    type TEXT DEFAULT 'info',
+    read INTEGER DEFAULT 0,
+    created_at TEXT
+);
+
+-- Progress of reindex.py, one row per job
+CREATE TABLE IF NOT EXISTS reindex_checkpoints (
+    id TEXT PRIMARY KEY,
+    versions TEXT, -- JSON object: the pipeline versions being brought up to date
+    cursor_upload_date TEXT,
+    cursor_id TEXT,
+    scanned INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    status TEXT,
+    started_at TEXT,
+    updated_at TEXT,
+    created_at TEXT
+);
+
+-- zstd dictionaries for compressed resume text (see text_codec.py)
+CREATE TABLE IF NOT EXISTS text_dictionaries (
+    id INTEGER PRIMARY KEY,
+    dictionary TEXT NOT NULL, -- base64
+    sample_count INTEGER,
+    created_at TEXT
+);
+
+-- Delivery status of outbound email (mailer.Outbox)
+CREATE TABLE IF NOT EXISTS email_messages (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id),
+    status TEXT NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    error TEXT,
+    retry_in REAL,
+    updated_at TEXT,
+    created_at TEXT
+);
+
+-- Access paths used by repository.Repository
+CREATE INDEX IF NOT EXISTS idx_jobs_user_id ON jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_resumes_filepath ON resumes(filepath);
+CREATE INDEX IF NOT EXISTS idx_resumes_user_id ON resumes(user_id);
+CREATE INDEX IF NOT EXISTS idx_resumes_upload_date_id ON resumes(upload_date, id);
+CREATE INDEX IF NOT EXISTS idx_screening_results_job_cursor ON screening_results(job_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_screening_results_resume_id ON screening_results(resume_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications(user_id) WHERE read = 0;
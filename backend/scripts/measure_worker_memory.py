@@ -0,0 +1,78 @@
+# measure_worker_memory.py
+# Report per-process memory for a running gunicorn master and its workers (Linux only).
+#
+#   python scripts/measure_worker_memory.py <master_pid>
+#   python scripts/measure_worker_memory.py <master_pid> --json
+#
+# RSS counts shared pages once per process, so it overstates the cost of extra workers.
+# PSS splits shared pages between the processes sharing them, and Private_* is what each
+# worker really owns; with preload_app those should stay far below the model size.
+import json
+import os
+import sys
+
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def read_rollup(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(':') in FIELDS:
+                values[parts[0].rstrip(':')] = int(parts[1])  # kB
+    values['Private'] = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    values['Shared'] = values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0)
+    return values
+
+
+def children(pid):
+    found = []
+    task_dir = f'/proc/{pid}/task'
+    for tid in os.listdir(task_dir):
+        try:
+            with open(f'{task_dir}/{tid}/children') as f:
+                found.extend(int(c) for c in f.read().split())
+        except OSError:
+            continue
+    return sorted(set(found))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: measure_worker_memory.py <master_pid> [--json]")
+        sys.exit(1)
+
+    master = int(sys.argv[1])
+    report = {'master': {'pid': master, **read_rollup(master)}, 'workers': []}
+    for pid in children(master):
+        try:
+            report['workers'].append({'pid': pid, **read_rollup(pid)})
+        except OSError:
+            continue
+
+    workers = report['workers']
+    report['totals'] = {
+        'workers': len(workers),
+        'Pss': report['master']['Pss'] + sum(w['Pss'] for w in workers),
+        'Rss': report['master']['Rss'] + sum(w['Rss'] for w in workers),
+        'Private_per_worker_avg': (sum(w['Private'] for w in workers) // len(workers)) if workers else 0,
+    }
+
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2))
+        return
+
+    def mb(kb):
+        return f"{kb / 1024:8.1f}"
+
+    print(f"{'process':>10} {'pid':>8} {'RSS MB':>8} {'PSS MB':>8} {'shared':>8} {'private':>8}")
+    for name, row in [('master', report['master'])] + [('worker', w) for w in workers]:
+        print(f"{name:>10} {row['pid']:>8} {mb(row['Rss'])} {mb(row['Pss'])} {mb(row['Shared'])} {mb(row['Private'])}")
+    totals = report['totals']
+    print(f"\n{totals['workers']} workers, total PSS {totals['Pss'] / 1024:.1f} MB "
+          f"(RSS sum {totals['Rss'] / 1024:.1f} MB), avg private per worker {totals['Private_per_worker_avg'] / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+# search_index.py
+# In-process inverted index over resumes.processed_text for /api/resumes/search.
+#
+# Postings are kept as two parallel typed arrays per term (doc numbers, term frequencies),
+# about 6 bytes per (term, resume) pair, so 100k resumes fit in a few hundred MB. Queries
+# turn postings into numpy masks for the boolean part and score the survivors with BM25
+# in one vectorized pass, which keeps a query in the low milliseconds at that size.
+#
+# Each process holds its own index. It is filled lazily from the repository (keyset pages
+# ordered by upload_date, id) and topped up at most every SEARCH_REFRESH_INTERVAL seconds,
+# so resumes uploaded through another gunicorn worker show up without a restart. Uploads
+# handled by this process are added immediately.
+#
+# Query syntax: terms, AND / OR / NOT (any case), parentheses, "quoted groups" (all words
+# required; positions are not indexed, so this is not a strict phrase match). Adjacent
+# terms are ANDed:  kafka AND (python OR scala) NOT intern
+import html
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from metrics import STAGE_SECONDS, timed
+from repository import RESUME_INDEX_COLUMNS
+
+SEARCH_REFRESH_INTERVAL = float(os.environ.get("SEARCH_REFRESH_INTERVAL", 30))
+REFRESH_BATCH_SIZE = 1000
+MAX_TERM_FREQUENCY = 65535  # array('H')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_TOKENS = 30
+SNIPPET_CONTEXT = 5
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9.+#\-]*")
+_QUERY_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"?|[^\s()"]+')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def tokenize(text):
+    # processed_text is already lowercased, stop-worded and lemmatized; only split it
+    return [t.rstrip('.-') for t in _TOKEN_RE.findall(text.lower())]
+
+
+# === Query parsing ===
+# Nodes: ('term', t) | ('and', [nodes]) | ('or', [nodes]) | ('not', node)
+
+def parse_query(query, normalize=str.lower):
+    tokens = _QUERY_TOKEN_RE.findall(query or '')
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def is_op(token, op):
+        return token is not None and token.upper() == op
+
+    def parse_or():
+        nonlocal pos
+        nodes = [parse_and()]
+        while is_op(peek(), 'OR'):
+            pos += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nonlocal pos
+        nodes = [parse_not()]
+        while peek() is not None and peek() != ')' and not is_op(peek(), 'OR'):
+            if is_op(peek(), 'AND'):
+                pos += 1
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not():
+        nonlocal pos
+        if is_op(peek(), 'NOT'):
+            pos += 1
+            return ('not', parse_not())
+        return parse_primary()
+
+    def parse_primary():
+        nonlocal pos
+        token = peek()
+        if token is None:
+            raise QueryError("unexpected end of query")
+        pos += 1
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise QueryError("missing closing parenthesis")
+            pos += 1
+            return node
+        if token == ')' or token.upper() in _OPERATORS:
+            raise QueryError(f"unexpected '{token}'")
+        words = [normalize(t) for t in tokenize(token.strip('"'))]
+        words = [w for w in words if w]
+        if not words:
+            raise QueryError(f"'{token}' has no searchable words")
+        return ('term', words[0]) if len(words) == 1 else ('and', [('term', w) for w in words])
+
+    if not tokens:
+        raise QueryError("empty query")
+    tree = parse_or()
+    if pos != len(tokens):
+        raise QueryError(f"unexpected '{tokens[pos]}'")
+    return tree
+
+
+def positive_terms(node, negated=False):
+    # Terms that contribute to ranking: everything not under an odd number of NOTs
+    kind = node[0]
+    if kind == 'term':
+        return set() if negated else {node[1]}
+    if kind == 'not':
+        return positive_terms(node[1], not negated)
+    return set().union(*(positive_terms(n, negated) for n in node[1]))
+
+
+# === Highlighting ===
+
+def highlight(text, terms, window=SNIPPET_TOKENS):
+    # Snippet around the densest run of matches, with matches wrapped in <mark>
+    words = (text or '').split()
+    hits = [i for i, w in enumerate(words) if w.rstrip('.-') in terms]
+    start = 0
+    if hits:
+        best, end = 0, 0
+        for i, first in enumerate(hits):
+            while end < len(hits) and hits[end] < first + window - SNIPPET_CONTEXT:
+                end += 1
+            if end - i > best:
+                best, start = end - i, max(0, first - SNIPPET_CONTEXT)
+    shown = []
+    for word in words[start:start + window]:
+        escaped = html.escape(word)
+        shown.append(f'<mark>{escaped}</mark>' if word.rstrip('.-') in terms else escaped)
+    return ('... ' if start > 0 else '') + ' '.join(shown) + (' ...' if start + window < len(words) else '')
+
+
+# === Index ===
+
+def to_numpy(values):
+    # Copy so the typed array is not left exporting its buffer (it could not grow then)
+    return np.frombuffer(values, dtype=np.dtype(f'u{values.itemsize}')).copy() if len(values) else np.zeros(0, np.uint32)
+
+
+class ResumeIndex:
+    # Shared bookkeeping for the per-process indexes over the resumes table: dense doc
+    # numbers, tombstones, per-user filtering and catch-up from the repository. Subclasses
+    # set `columns` and implement add_many() and _documents(rows).
+    label = 'Index'
+    columns = RESUME_INDEX_COLUMNS
+
+    def __init__(self, repo, refresh_interval=SEARCH_REFRESH_INTERVAL):
+        self.repo = repo
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._doc_ids = []              # doc number -> resume id
+        self._doc_numbers = {}          # resume id -> doc number
+        self._doc_users = array('I')    # doc number -> user code (0 = none)
+        self._user_codes = {}
+        self._live = bytearray()
+        self._live_count = 0
+        self._cursor = None             # (upload_date, id) of the last row pulled from the repository
+        self._refreshed_at = None
+
+    def __len__(self):
+        return self._live_count
+
+    def _new_doc(self, resume_id, user_id):
+        # Caller holds the lock. Returns the new doc number, or None if already indexed.
+        if resume_id in self._doc_numbers:
+            return None
+        doc = len(self._doc_ids)
+        self._doc_ids.append(resume_id)
+        self._doc_numbers[resume_id] = doc
+        user_code = 0
+        if user_id is not None:
+            user_code = self._user_codes.setdefault(str(user_id), len(self._user_codes) + 1)
+        self._doc_users.append(user_code)
+        self._live.append(1)
+        self._live_count += 1
+        return doc
+
+    def _removed(self, doc):
+        pass
+
+    def remove(self, resume_id):
+        # Tombstone; postings are left in place and masked out at query time
+        with self._lock:
+            doc = self._doc_numbers.pop(str(resume_id), None)
+            if doc is None or not self._live[doc]:
+                return False
+            self._live[doc] = 0
+            self._live_count -= 1
+            self._removed(doc)
+            return True
+
+    def _filter_mask(self, user_id=None):
+        # Live docs, optionally restricted to one uploader; None when nothing can match
+        mask = np.frombuffer(bytes(self._live), dtype=np.uint8).astype(bool)
+        if user_id is not None:
+            code = self._user_codes.get(str(user_id))
+            if code is None:
+                return None
+            mask &= to_numpy(self._doc_users) == code
+        return mask
+
+    def refresh(self, force=False):
+        # Pull resumes this process has not seen yet. Only one thread fetches at a time and
+        # queries keep running on the current contents meanwhile.
+        if not force and self._refreshed_at is not None and \
+                time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return 0
+        if not self._refresh_lock.acquire(blocking=self._refreshed_at is None):
+            return 0
+        try:
+            started, added = time.perf_counter(), 0
+            while True:
+                rows = self.repo.list_resumes_for_index(self._cursor, REFRESH_BATCH_SIZE, self.columns)
+                added += self.add_many(self._documents(rows))
+                if rows:
+                    self._cursor = (rows[-1].get('upload_date'), rows[-1]['id'])
+                if len(rows) < REFRESH_BATCH_SIZE:
+                    break
+            self._refreshed_at = time.monotonic()
+            if added:
+                print(f"{self.label}: added {added} resumes in {time.perf_counter() - started:.2f}s "
+                      f"({self._live_count} indexed)")
+            return added
+        finally:
+            self._refresh_lock.release()
+
+
+class SearchIndex(ResumeIndex):
+    label = 'Search index'
+
+    def __init__(self, repo, normalize=str.lower, refresh_interval=SEARCH_REFRESH_INTERVAL):
+        super().__init__(repo, refresh_interval)
+        self.normalize = normalize
+        self._doc_lengths = array('I')
+        self._total_length = 0
+        self._postings = {}             # term -> (array('I') doc numbers, array('H') frequencies)
+
+    def _documents(self, rows):
+        return [(row['id'], row.get('processed_text'), row.get('user_id')) for row in rows]
+
+    def add(self, resume_id, text, user_id=None):
+        return self.add_many([(resume_id, text, user_id)]) == 1
+
+    def add_many(self, documents):
+        # documents: iterable of (resume_id, text, user_id). Returns how many were new.
+        # Postings are gathered per term first and appended with one extend() each, which
+        # is several times faster than growing the arrays one posting at a time.
+        tokenized = [(str(resume_id), tokenize(text or ''), user_id) for resume_id, text, user_id in documents]
+        with self._lock:
+            new_postings = {}
+            added = 0
+            for resume_id, tokens, user_id in tokenized:
+                doc = self._new_doc(resume_id, user_id)
+                if doc is None:
+                    continue
+                self._doc_lengths.append(len(tokens))
+                self._total_length += len(tokens)
+                for term, frequency in Counter(tokens).items():
+                    pending = new_postings.get(term)
+                    if pending is None:
+                        pending = new_postings[term] = ([], [])
+                    pending[0].append(doc)
+                    pending[1].append(frequency if frequency < MAX_TERM_FREQUENCY else MAX_TERM_FREQUENCY)
+                added += 1
+            # Doc numbers only grow, so every postings list stays sorted
+            for term, (docs, frequencies) in new_postings.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array('I'), array('H'))
+                postings[0].extend(docs)
+                postings[1].extend(frequencies)
+            return added
+
+    def _removed(self, doc):
+        self._total_length -= self._doc_lengths[doc]
+
+    def _mask(self, node, size):
+        kind = node[0]
+        if kind == 'term':
+            mask = np.zeros(size, dtype=bool)
+            postings = self._postings.get(node[1])
+            if postings is not None:
+                mask[to_numpy(postings[0])] = True
+            return mask
+        if kind == 'not':
+            return ~self._mask(node[1], size)
+        masks = [self._mask(n, size) for n in node[1]]
+        return np.logical_and.reduce(masks) if kind == 'and' else np.logical_or.reduce(masks)
+
+    def _bm25(self, terms, size):
+        scores = np.zeros(size, dtype=np.float64)
+        if not self._live_count:
+            return scores
+        lengths = to_numpy(self._doc_lengths).astype(np.float64)
+        average_length = self._total_length / self._live_count or 1.0
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docs = to_numpy(postings[0])
+            frequencies = to_numpy(postings[1]).astype(np.float64)
+            df = len(docs)
+            idf = math.log(1 + (self._live_count - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / average_length)
+            scores[docs] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+        return scores
+
+    def search(self, query, limit=20, offset=0, user_id=None):
+        """
+        Returns (total, [(resume_id, score), ...], terms) for one page of results, best
+        first. `terms` are the normalized positive query terms, for highlighting.
+        Raises QueryError for malformed queries.
+        """
+        tree = parse_query(query, self.normalize)
+        terms = positive_terms(tree)
+        self.refresh()
+
+        with timed(STAGE_SECONDS, stage='search_query'), self._lock:
+            size = len(self._doc_ids)
+            allowed = self._filter_mask(user_id) if size else None
+            if allowed is None:
+                return 0, [], terms
+            mask = self._mask(tree, size) & allowed
+
+            candidates = np.flatnonzero(mask)
+            total = len(candidates)
+            if offset >= total:
+                return total, [], terms
+            scores = self._bm25(terms, size)[candidates]
+
+            # Only the requested page needs ordering; partition the rest away first
+            wanted = min(offset + limit, total)
+            if wanted < total:
+                top = np.argpartition(-scores, wanted - 1)[:wanted]
+            else:
+                top = np.arange(total)
+            top = top[np.lexsort((candidates[top], -scores[top]))][offset:offset + limit]
+            return total, [(self._doc_ids[candidates[i]], float(scores[i])) for i in top], terms
@@ -0,0 +1,151 @@
+# skill_index.py
+# Skill -> resume postings over resumes.extracted_skills, for "must have docker and
+# kubernetes" style filters without loading resumes.
+#
+# Each skill maps to a sorted array of dense doc numbers (see search_index.ResumeIndex for
+# numbering, tombstones and catch-up from the repository). Queries are set algebra on
+# those arrays:
+#     all:  intersection, smallest postings list first so the working set only shrinks
+#     any:  union
+#     none: difference
+# Counts per skill are maintained on add/remove, so they never scan postings.
+from array import array
+
+import numpy as np
+
+from metrics import STAGE_SECONDS, timed
+from repository import RESUME_SKILL_INDEX_COLUMNS
+from search_index import ResumeIndex, SEARCH_REFRESH_INTERVAL, to_numpy
+
+
+def normalize_skill(skill):
+    # Same shape as extract_skills_from_text output: lowercase, dots dropped ("Node.js" -> "nodejs")
+    return ' '.join(str(skill).lower().replace('.', '').split())
+
+
+def parse_skill_list(value):
+    # Accepts a list or a comma separated string
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return list(dict.fromkeys(s for s in (normalize_skill(v) for v in value) if s))
+
+
+class SkillIndex(ResumeIndex):
+    label = 'Skill index'
+    columns = RESUME_SKILL_INDEX_COLUMNS
+
+    def __init__(self, repo, refresh_interval=SEARCH_REFRESH_INTERVAL):
+        super().__init__(repo, refresh_interval)
+        self._doc_skills = []           # doc number -> tuple of skills, for remove()
+        self._postings = {}             # skill -> sorted array('I') of doc numbers
+        self._counts = {}               # skill -> live resumes having it
+
+    def _documents(self, rows):
+        return [(row['id'], row.get('extracted_skills'), row.get('user_id')) for row in rows]
+
+    def add(self, resume_id, skills, user_id=None):
+        return self.add_many([(resume_id, skills, user_id)]) == 1
+
+    def add_many(self, documents):
+        # documents: iterable of (resume_id, skills, user_id). Returns how many were new.
+        added = 0
+        with self._lock:
+            for resume_id, skills, user_id in documents:
+                doc = self._new_doc(str(resume_id), user_id)
+                if doc is None:
+                    continue
+                skills = tuple(parse_skill_list(skills or []))
+                self._doc_skills.append(skills)
+                for skill in skills:
+                    postings = self._postings.get(skill)
+                    if postings is None:
+                        postings = self._postings[skill] = array('I')
+                    postings.append(doc)  # doc numbers only grow, so postings stay sorted
+                    self._counts[skill] = self._counts.get(skill, 0) + 1
+                added += 1
+        return added
+
+    def _removed(self, doc):
+        for skill in self._doc_skills[doc]:
+            self._counts[skill] -= 1
+
+    def _docs(self, skill):
+        postings = self._postings.get(skill)
+        return to_numpy(postings) if postings is not None else np.zeros(0, np.uint32)
+
+    def _match_docs(self, all_skills=(), any_skills=(), none_skills=(), user_id=None):
+        # Caller holds the lock. Returns a sorted array of live doc numbers.
+        allowed = self._filter_mask(user_id) if self._doc_ids else None
+        if allowed is None:
+            return np.zeros(0, np.uint32)
+
+        if all_skills:
+            ordered = sorted(all_skills, key=lambda s: len(self._postings.get(s, ())))
+            docs = self._docs(ordered[0])
+            for skill in ordered[1:]:
+                if not len(docs):
+                    break
+                docs = np.intersect1d(docs, self._docs(skill), assume_unique=True)
+        else:
+            docs = None
+        if any_skills:
+            union = self._docs(any_skills[0])
+            for skill in any_skills[1:]:
+                union = np.union1d(union, self._docs(skill))
+            docs = union if docs is None else np.intersect1d(docs, union, assume_unique=True)
+        if docs is None:
+            docs = np.flatnonzero(allowed).astype(np.uint32)
+        for skill in none_skills:
+            if not len(docs):
+                break
+            docs = np.setdiff1d(docs, self._docs(skill), assume_unique=True)
+        return docs[allowed[docs]] if len(docs) else docs
+
+    def query(self, all_skills=(), any_skills=(), none_skills=(), user_id=None, limit=None, offset=0):
+        """
+        Resumes having every skill in `all_skills`, at least one of `any_skills` (when
+        given) and none of `none_skills`. Returns (total, resume_ids) in upload order.
+        """
+        self.refresh()
+        with timed(STAGE_SECONDS, stage='skill_query'), self._lock:
+            docs = self._match_docs(parse_skill_list(all_skills), parse_skill_list(any_skills),
+                                    parse_skill_list(none_skills), user_id)
+            page = docs[offset:offset + limit] if limit is not None else docs[offset:]
+            return len(docs), [self._doc_ids[d] for d in page]
+
+    def counts(self, user_id=None):
+        # {skill: number of resumes}, most common first
+        self.refresh()
+        with self._lock:
+            if user_id is None:
+                counts = {skill: n for skill, n in self._counts.items() if n > 0}
+            else:
+                allowed = self._filter_mask(user_id) if self._doc_ids else None
+                if allowed is None:
+                    return {}
+                counts = {}
+                for skill, postings in self._postings.items():
+                    n = int(allowed[to_numpy(postings)].sum())
+                    if n:
+                        counts[skill] = n
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def filter_ids(self, resume_ids, required_skills):
+        """
+        Split `resume_ids` into (kept, dropped) by whether the index says they have every
+        required skill. Ids the index has not seen yet are kept. The index does not see
+        skills rewritten in place, so callers re-check both lists against stored rows.
+        """
+        required = parse_skill_list(required_skills)
+        if not required:
+            return list(resume_ids), []
+        self.refresh()
+        with self._lock:
+            matching = set(self._match_docs(required).tolist())
+            kept, dropped = [], []
+            for resume_id in resume_ids:
+                doc = self._doc_numbers.get(str(resume_id))
+                (kept if doc is None or doc in matching else dropped).append(resume_id)
+        return kept, dropped
@@ -0,0 +1,241 @@
+# storage.py
+# Resume file storage. Files are content-addressed: the key is the SHA-256 of the bytes,
+# laid out as "ab/cd/<sha256>.<ext>" so no directory grows beyond a few thousand entries
+# and identical uploads are stored once. Keys from the old flat layout ("<uuid>_<name>")
+# are still resolved so existing rows keep working.
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from mimetypes import guess_type
+
+from flask import Response, request, send_file
+
+HASH_CHUNK_SIZE = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+FILE_MAX_AGE = 3600
+
+_SHARDED_KEY_RE = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]{1,8})?$')
+_LEGACY_KEY_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+
+
+class StorageError(Exception):
+    pass
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(digest, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if not re.fullmatch(r'\.[a-z0-9]{1,8}', ext):
+        ext = ''
+    return f"{digest[0:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def is_valid_key(key):
+    return bool(key) and (bool(_SHARDED_KEY_RE.match(key)) or bool(_LEGACY_KEY_RE.match(key)))
+
+
+def key_etag(key):
+    # Content-addressed keys carry their own strong validator
+    match = _SHARDED_KEY_RE.match(key)
+    return match.group(1) if match else None
+
+
+class LocalStorage:
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def temp_file(self, suffix=''):
+        # Temp files live under the storage root so store() can rename them into place
+        return tempfile.NamedTemporaryFile(dir=self.tmp_dir, suffix=suffix, delete=False)
+
+    def path(self, key):
+        if not is_valid_key(key):
+            return None
+        full_path = os.path.join(self.root, *key.split('/'))
+        return full_path if os.path.commonpath([self.root, full_path]) == self.root else None
+
+    def exists(self, key):
+        path = self.path(key)
+        return path is not None and os.path.isfile(path)
+
+    def store(self, temp_path, filename):
+        # Takes ownership of temp_path and returns the content key
+        key = make_key(hash_file(temp_path), filename)
+        dest = self.path(key)
+        if os.path.exists(dest):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(temp_path, dest)
+        return key
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def source(self, key):
+        # Something stream_zip can read: a local path, or None when the file is missing
+        return self.path(key) if self.exists(key) else None
+
+    def open(self, key):
+        path = self.path(key)
+        if path is None:
+            raise StorageError(f"Invalid storage key: {key}")
+        return open(path, 'rb')
+
+    def delete(self, key):
+        path = self.path(key)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def serve(self, key, download_name, as_attachment=False, mimetype=None):
+        # send_file handles Range/If-Range/If-None-Match and hands the file to
+        # wsgi.file_wrapper, which gunicorn turns into sendfile(2)
+        return send_file(
+            self.path(key),
+            mimetype=mimetype or guess_type(download_name)[0] or 'application/octet-stream',
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=key_etag(key) or True,
+            max_age=FILE_MAX_AGE,
+        )
+
+
+class S3Storage:
+    # Any S3-compatible service (AWS S3, MinIO, ...). Uploads are hashed locally first
+    # so the object key is content-addressed exactly like LocalStorage.
+    name = 's3'
+
+    def __init__(self, bucket, endpoint_url=None, access_key=None, secret_key=None, region=None, tmp_dir=None):
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+        )
+        self.tmp_dir = tmp_dir or tempfile.gettempdir()
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def temp_file(self, suffix=''):
+        return tempfile.NamedTemporaryFile(dir=self.tmp_dir, suffix=suffix, delete=False)
+
+    def path(self, key):
+        return None
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return None
+
+    def exists(self, key):
+        return is_valid_key(key) and self._head(key) is not None
+
+    def store(self, temp_path, filename):
+        key = make_key(hash_file(temp_path), filename)
+        try:
+            if self._head(key) is None:
+                content_type = guess_type(filename)[0] or 'application/octet-stream'
+                self.client.upload_file(temp_path, self.bucket, key, ExtraArgs={'ContentType': content_type})
+        finally:
+            os.remove(temp_path)
+        return key
+
+    def size(self, key):
+        head = self._head(key)
+        if head is None:
+            raise StorageError(f"Object not found: {key}")
+        return head['ContentLength']
+
+    def open(self, key):
+        if not is_valid_key(key):
+            raise StorageError(f"Invalid storage key: {key}")
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def source(self, key):
+        # Opened lazily by stream_zip; a missing object is skipped there instead of paying a HEAD here
+        return (lambda: self.open(key)) if is_valid_key(key) else None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def serve(self, key, download_name, as_attachment=False, mimetype=None):
+        head = self._head(key)
+        if head is None:
+            raise StorageError(f"Object not found: {key}")
+        etag = key_etag(key) or head['ETag'].strip('"')
+        total = head['ContentLength']
+        mimetype = mimetype or guess_type(download_name)[0] or 'application/octet-stream'
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        # Single byte range only, which is what PDF viewers ask for
+        status, get_kwargs, start, end = 200, {}, 0, total - 1
+        byte_range = request.range
+        if byte_range and byte_range.units == 'bytes' and len(byte_range.ranges) == 1 \
+                and (not request.if_range or request.if_range.etag == etag):
+            bounds = byte_range.range_for_length(total)
+            if bounds is None:
+                response = Response(status=416)
+                response.headers['Content-Range'] = f'bytes */{total}'
+                return response
+            start, stop = bounds
+            end = stop - 1
+            status = 206
+            get_kwargs['Range'] = f'bytes={start}-{end}'
+
+        body = self.client.get_object(Bucket=self.bucket, Key=key, **get_kwargs)['Body']
+        response = Response(body.iter_chunks(STREAM_CHUNK_SIZE), status=status, mimetype=mimetype, direct_passthrough=True)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Content-Length'] = str(end - start + 1)
+        if status == 206:
+            response.headers['Content-Range'] = f'bytes {start}-{end}/{total}'
+        response.set_etag(etag)
+        response.cache_control.max_age = FILE_MAX_AGE
+        response.last_modified = head.get('LastModified')
+        disposition = 'attachment' if as_attachment else 'inline'
+        response.headers['Content-Disposition'] = f'{disposition}; filename="{download_name}"'
+        return response
+
+
+def create_storage(upload_folder):
+    # STORAGE_BACKEND selects "local" (default, sharded under upload_folder) or "s3"
+    backend = os.environ.get("STORAGE_BACKEND", "local").lower()
+    if backend == 's3':
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            endpoint_url=os.environ.get("S3_ENDPOINT_URL"),
+            access_key=os.environ.get("S3_ACCESS_KEY"),
+            secret_key=os.environ.get("S3_SECRET_KEY"),
+            region=os.environ.get("S3_REGION"),
+            tmp_dir=os.path.join(upload_folder, 'tmp'),
+        )
+    return LocalStorage(upload_folder)
+
+
+def copy_to_temp(storage, key, suffix=''):
+    # Materialise a stored object as a local temp file (for backends without local paths)
+    with storage.open(key) as src, storage.temp_file(suffix=suffix) as dest:
+        shutil.copyfileobj(src, dest, STREAM_CHUNK_SIZE)
+        return dest.name
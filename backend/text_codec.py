@@ -0,0 +1,231 @@
+# text_codec.py
+# Compressed storage for the resume text columns (raw_text, processed_text).
+#
+# With TEXT_COMPRESSION=zstd new values are stored as
+#     "\x01zstd:<dictionary id>:<base64 of the zstd frame>"
+# inside the existing TEXT columns, so no column type changes. Resumes share most of
+# their vocabulary and layout, so a dictionary trained on a sample of them lets even a
+# short resume compress well (dictionary 0 means none). Dictionaries live in the
+# text_dictionaries table, are loaded at startup, and old ones are kept: every value
+# names the dictionary it was written with. The repository decodes values as rows are
+# read (see repository.CompressingBackend) and plain values pass through untouched, so
+# compression can be switched on or off at any time.
+#
+#   python text_codec.py train [--samples 2000] [--size 112640]   # train a new dictionary
+#   python text_codec.py compress                                 # rewrite existing rows
+#
+# Needs the zstandard package (`pip install zstandard`); reading compressed values
+# without it fails loudly rather than returning garbage.
+import argparse
+import base64
+import os
+import threading
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TEXT_COMPRESSION = os.environ.get("TEXT_COMPRESSION", "none").lower()
+TEXT_COMPRESSION_LEVEL = int(os.environ.get("TEXT_COMPRESSION_LEVEL", 6))
+# Shorter values are left as they are; the frame and base64 overhead eat the gain
+TEXT_COMPRESSION_MIN_LENGTH = int(os.environ.get("TEXT_COMPRESSION_MIN_LENGTH", 256))
+
+COMPRESSED_TEXT_COLUMNS = {'resumes': ('raw_text', 'processed_text')}
+DICTIONARY_TABLE = 'text_dictionaries'
+PREFIX = '\x01zstd:'
+
+
+class TextCodecError(Exception):
+    pass
+
+
+def is_encoded(value):
+    return isinstance(value, str) and value.startswith(PREFIX)
+
+
+def dictionary_id(value):
+    # Id of the dictionary an encoded value was written with
+    return int(value[len(PREFIX):value.index(':', len(PREFIX))])
+
+
+class TextCodec:
+    def __init__(self, backend, compress=None, level=TEXT_COMPRESSION_LEVEL, min_length=TEXT_COMPRESSION_MIN_LENGTH):
+        # `backend` is the raw storage backend, used to load dictionaries
+        self.backend = backend
+        self.compress = (TEXT_COMPRESSION == 'zstd') if compress is None else compress
+        self.level = level
+        self.min_length = min_length
+        self._dictionaries = {}   # id -> ZstdCompressionDict
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if self.compress and zstandard is None:
+            print("WARNING: TEXT_COMPRESSION=zstd needs the zstandard package; storing text uncompressed.")
+            self.compress = False
+        if zstandard is not None:
+            self.load_dictionaries()
+
+    @property
+    def current_dictionary(self):
+        return max(self._dictionaries, default=0)
+
+    def load_dictionaries(self):
+        try:
+            rows = self.backend.select(DICTIONARY_TABLE, 'id, dictionary')
+        except Exception as e:
+            # No table yet (migration not run): compress without a dictionary
+            print(f"Could not load text dictionaries: {e}")
+            return
+        loaded = {}
+        for row in rows:
+            data = zstandard.ZstdCompressionDict(base64.b64decode(row['dictionary']))
+            data.precompute_compress(level=self.level)
+            loaded[int(row['id'])] = data
+        with self._lock:
+            self._dictionaries = loaded
+            # Compressor and decompressor objects are per thread and per dictionary
+            self._local = threading.local()
+
+    def _dictionary(self, dict_id):
+        if dict_id and dict_id not in self._dictionaries:
+            # Trained by another process since we started
+            self.load_dictionaries()
+            if dict_id not in self._dictionaries:
+                raise TextCodecError(f"Unknown text dictionary {dict_id}")
+        return self._dictionaries.get(dict_id)
+
+    def _coder(self, kind, dict_id):
+        coders = self._local.__dict__.setdefault(kind, {})
+        coder = coders.get(dict_id)
+        if coder is None:
+            dictionary = self._dictionary(dict_id)
+            if kind == 'compressors':
+                coder = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+            else:
+                coder = zstandard.ZstdDecompressor(dict_data=dictionary)
+            coders[dict_id] = coder
+        return coder
+
+    def encode(self, value, dict_id=None):
+        # Stored form of `value`; unchanged when compression is off or would not help
+        if not self.compress or not isinstance(value, str) or is_encoded(value) or len(value) < self.min_length:
+            return value
+        dict_id = self.current_dictionary if dict_id is None else dict_id
+        frame = self._coder('compressors', dict_id).compress(value.encode('utf-8'))
+        encoded = f"{PREFIX}{dict_id}:{base64.b64encode(frame).decode('ascii')}"
+        return encoded if len(encoded) < len(value) else value
+
+    def decode(self, value):
+        if not is_encoded(value):
+            return value
+        if zstandard is None:
+            raise TextCodecError("Found zstd-compressed text but the zstandard package is not installed")
+        dict_id = dictionary_id(value)
+        frame = base64.b64decode(value[value.index(':', len(PREFIX)) + 1:])
+        return self._coder('decompressors', dict_id).decompress(frame).decode('utf-8')
+
+    def encode_row(self, table, row):
+        columns = [c for c in COMPRESSED_TEXT_COLUMNS.get(table, ()) if c in row]
+        if not columns or not self.compress:
+            return row
+        row = dict(row)
+        for column in columns:
+            row[column] = self.encode(row[column])
+        return row
+
+    def decode_row(self, table, row):
+        columns = [c for c in COMPRESSED_TEXT_COLUMNS.get(table, ()) if is_encoded(row.get(c))]
+        if not columns:
+            return row
+        row = dict(row)
+        for column in columns:
+            row[column] = self.decode(row[column])
+        return row
+
+
+def train_dictionary(repo, codec, samples=2000, size=112640):
+    # Train on the newest `samples` resumes and store the result as the next dictionary
+    rows = repo.list_recent_resume_texts(samples)
+    texts = [t.encode('utf-8') for row in rows for t in (row.get('raw_text'), row.get('processed_text')) if t]
+    if len(texts) < 10:
+        raise TextCodecError(f"Need at least 10 texts to train a dictionary, found {len(texts)}")
+    trained = zstandard.train_dictionary(size, texts, level=codec.level)
+    dict_id = codec.current_dictionary + 1
+    repo.save_text_dictionary({'id': dict_id, 'dictionary': base64.b64encode(trained.as_bytes()).decode('ascii'),
+                               'sample_count': len(texts), 'created_at': datetime.now(timezone.utc).isoformat()})
+    codec.load_dictionaries()
+    print(f"Trained text dictionary {dict_id} ({len(trained.as_bytes())} bytes) from {len(texts)} texts")
+    return dict_id
+
+
+def compress_existing(repo, codec, batch_size=200):
+    """
+    Rewrite every resume whose text is stored plain or with an older dictionary using the
+    current one. Returns (rows rewritten, stored bytes before, stored bytes after).
+    """
+    current = codec.current_dictionary
+    rewritten = before = after = 0
+    cursor = None
+    while True:
+        page = repo.list_resumes_for_index(cursor, batch_size, 'id, upload_date')
+        if not page:
+            break
+        cursor = (page[-1].get('upload_date'), page[-1]['id'])
+        updates = []
+        for row in repo.get_resume_texts([r['id'] for r in page], stored=True):
+            # Only the columns that change, so a concurrent retention purge or re-index of
+            # the other column is not overwritten with what was read here
+            update = {'id': row['id']}
+            for column in COMPRESSED_TEXT_COLUMNS['resumes']:
+                stored = row.get(column)
+                if not stored or (is_encoded(stored) and dictionary_id(stored) == current):
+                    continue
+                new = codec.encode(codec.decode(stored), current)
+                if new != stored:
+                    update[column] = new
+                    before += len(stored.encode('utf-8'))
+                    after += len(new.encode('utf-8'))
+            if len(update) > 1:
+                updates.append(update)
+        repo.update_resumes(updates, stored=True)
+        rewritten += len(updates)
+        print(f"Compressed {rewritten} resumes so far")
+        if len(page) < batch_size:
+            break
+    return rewritten, before, after
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage compressed resume text storage.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    train = sub.add_parser('train', help="train a new dictionary from recent resumes")
+    train.add_argument('--samples', type=int, default=2000)
+    train.add_argument('--size', type=int, default=112640, help="dictionary size in bytes")
+    compress = sub.add_parser('compress', help="rewrite stored text with the current dictionary")
+    compress.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from repository import create_repository
+
+    if zstandard is None:
+        print("The zstandard package is not installed.")
+        return 1
+    repo = create_repository()
+    if repo is None:
+        print("Database not connected.")
+        return 1
+    codec = repo.text_codec
+    if args.command == 'train':
+        train_dictionary(repo, codec, args.samples, args.size)
+        return 0
+    codec.compress = True
+    rewritten, before, after = compress_existing(repo, codec, args.batch_size)
+    print(f"Rewrote {rewritten} resumes: {before / (1024 * 1024):.1f} MB -> {after / (1024 * 1024):.1f} MB of text")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
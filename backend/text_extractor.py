@@ -1,18 +1,25 @@
+import io
 import os
+from contextlib import nullcontext
 from PyPDF2 import PdfReader
 from docx import Document
 
+from metrics import timed_stage
+
+@timed_stage('pdf_extract')
 def extract_text_from_pdf(pdf_path):
+    # Accepts a path or a binary file object (archive members are never written to disk)
     text = ""
     try:
-        with open(pdf_path, 'rb') as file:
+        with (open(pdf_path, 'rb') if isinstance(pdf_path, str) else nullcontext(pdf_path)) as file:
             reader = PdfReader(file)
             for page in reader.pages:
                 text += page.extract_text() or ""
     except Exception as e:
-        print(f"Error extracting text from PDF {pdf_path}: {e}")
+        print(f"Error extracting text from PDF {getattr(pdf_path, 'name', pdf_path)}: {e}")
     return text
 
+@timed_stage('docx_extract')
 def extract_text_from_docx(docx_path):
     text = ""
     try:
@@ -20,9 +27,21 @@ def extract_text_from_docx(docx_path):
         for paragraph in doc.paragraphs:
             text += paragraph.text + "\n"
     except Exception as e:
-        print(f"Error extracting text from DOCX {docx_path}: {e}")
+        print(f"Error extracting text from DOCX {getattr(docx_path, 'name', docx_path)}: {e}")
     return text
 
+def extract_text_from_bytes(data, filename):
+    # In-memory variant of extract_text_from_file, picking the parser by filename
+    file_extension = os.path.splitext(filename)[1].lower()
+    stream = io.BytesIO(data)
+    stream.name = filename
+    if file_extension == '.pdf':
+        return extract_text_from_pdf(stream)
+    elif file_extension == '.docx':
+        return extract_text_from_docx(stream)
+    else:
+        return ""
+
 def extract_text_from_file(filepath):
     file_extension = os.path.splitext(filepath)[1].lower()
     if file_extension == '.pdf':
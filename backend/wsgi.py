@@ -0,0 +1,62 @@
+# wsgi.py
+# Production entry point:  gunicorn -c gunicorn.conf.py wsgi:app
+#
+# gunicorn.conf.py sets preload_app, so this module is imported once in the master.
+# Everything read-only (MiniLM weights, NLTK corpora, skill and category tables) is loaded
+# here, before the fork, and then frozen out of the garbage collector so workers keep
+# sharing those pages copy-on-write instead of each holding a private copy.
+import gc
+import os
+
+import text_processor
+import resume_matcher
+import app as app_module
+from app import app
+from embedding_service import EmbeddingServiceError, FallbackEncoder
+
+
+def warm_up():
+    # Keep torch single-threaded in the master: an OpenMP pool started before fork is not
+    # usable in the children. Workers pick their own thread count in post_fork.
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    # NLTK loads the punkt tokenizer and WordNet lazily on first use; force both now
+    sample = text_processor.preprocess_text("Warm-up run: senior python developers managing cloud deployments.")
+    text_processor.extract_skills_from_text(sample)
+    text_processor.categorize_resume(sample)
+
+    if isinstance(resume_matcher.model, FallbackEncoder):
+        # Workers use the embedding sidecar; only check that it answers
+        try:
+            resume_matcher.model.client.encode(["warm up"])
+        except EmbeddingServiceError as e:
+            print(f"{e}. Workers will encode in-process until it is reachable.")
+        finally:
+            resume_matcher.model.client.close()
+    elif resume_matcher.model is not None:
+        resume_matcher.model.eval()
+        resume_matcher.model.encode(["warm up"], show_progress_bar=False)
+
+    # Build the search indexes before forking so workers share it and only catch up on
+    # what was uploaded since
+    for index in (app_module.search_index, app_module.skill_index, app_module.dedup_index):
+        if index is None:
+            continue
+        try:
+            index.refresh(force=True)
+        except Exception as e:
+            print(f"{index.label} warm-up failed, it will load on first query: {e}")
+
+    print(f"Preloaded models and corpora in master process {os.getpid()}")
+
+
+warm_up()
+
+# Move everything allocated so far into the permanent generation. Without this, the
+# first GC pass in each worker writes to every object header and un-shares the pages.
+gc.collect()
+gc.freeze()
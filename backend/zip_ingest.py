@@ -0,0 +1,102 @@
+# zip_ingest.py
+# Reading resume archives for /api/upload_resumes/zip.
+#
+# The archive is spooled to one temp file (a ZIP's directory is at the end, so it has to
+# be seekable), then members are decompressed one at a time into memory and handed to
+# the caller; nothing is extracted to disk. Zip-bomb limits are checked against the
+# central directory before anything is decompressed, and reads are capped so a member
+# whose header lies about its size cannot exceed them either.
+import os
+import zipfile
+
+ZIP_MAX_ARCHIVE_BYTES = int(os.environ.get("ZIP_MAX_ARCHIVE_BYTES", 512 * 1024 * 1024))
+ZIP_MAX_MEMBERS = int(os.environ.get("ZIP_MAX_MEMBERS", 5000))
+ZIP_MAX_MEMBER_BYTES = int(os.environ.get("ZIP_MAX_MEMBER_BYTES", 20 * 1024 * 1024))
+ZIP_MAX_TOTAL_BYTES = int(os.environ.get("ZIP_MAX_TOTAL_BYTES", 2 * 1024 * 1024 * 1024))
+# Uncompressed / compressed size; PDFs and DOCX files are already compressed, so a real
+# resume rarely gets past 10
+ZIP_MAX_RATIO = float(os.environ.get("ZIP_MAX_RATIO", 100))
+
+RESUME_EXTENSIONS = {'.pdf', '.docx'}
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class ArchiveError(Exception):
+    # The archive as a whole is rejected; `status` is the HTTP status to answer with
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def spool(stream, dest, max_bytes=ZIP_MAX_ARCHIVE_BYTES):
+    # Copy a request body into `dest`, refusing anything over max_bytes
+    written = 0
+    while True:
+        chunk = stream.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            break
+        written += len(chunk)
+        if written > max_bytes:
+            raise ArchiveError(f"Archive is larger than {max_bytes} bytes", 413)
+        dest.write(chunk)
+    dest.flush()
+    dest.seek(0)
+    return written
+
+
+def open_archive(fileobj, max_members=ZIP_MAX_MEMBERS, max_total_bytes=ZIP_MAX_TOTAL_BYTES):
+    # Returns (zipfile, member infos). Directories are dropped.
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, ValueError) as e:
+        raise ArchiveError(f"Not a valid ZIP archive: {e}")
+    infos = [info for info in archive.infolist() if not info.is_dir()]
+    if len(infos) > max_members:
+        archive.close()
+        raise ArchiveError(f"Archive has {len(infos)} files; the limit is {max_members}", 413)
+    declared = sum(info.file_size for info in infos)
+    if declared > max_total_bytes:
+        archive.close()
+        raise ArchiveError(f"Archive expands to {declared} bytes; the limit is {max_total_bytes}", 413)
+    return archive, infos
+
+
+def skip_reason(info, max_member_bytes=ZIP_MAX_MEMBER_BYTES, max_ratio=ZIP_MAX_RATIO):
+    # Why a member will not be read, judged from its directory entry alone; None if it will
+    name = info.filename
+    base = os.path.basename(name)
+    if name.startswith('__MACOSX/') or base.startswith('.'):
+        return 'hidden or metadata file'
+    if os.path.splitext(base)[1].lower() not in RESUME_EXTENSIONS:
+        return 'unsupported file type'
+    if info.flag_bits & 0x1:
+        return 'encrypted'
+    if info.file_size > max_member_bytes:
+        return f'larger than {max_member_bytes} bytes'
+    if info.file_size > max_ratio * max(info.compress_size, 1):
+        return f'compression ratio above {max_ratio:g}'
+    return None
+
+
+def iter_members(archive, infos, max_member_bytes=ZIP_MAX_MEMBER_BYTES, max_ratio=ZIP_MAX_RATIO):
+    """
+    Yield (info, data, reason) for every member, in archive order. `data` is the
+    decompressed bytes, or None with `reason` saying why the member was skipped.
+    """
+    for info in infos:
+        reason = skip_reason(info, max_member_bytes, max_ratio)
+        if reason:
+            yield info, None, reason
+            continue
+        try:
+            with archive.open(info) as member:
+                data = member.read(max_member_bytes + 1)
+        except (zipfile.BadZipFile, NotImplementedError, RuntimeError, OSError, EOFError) as e:
+            # Corrupt data, CRC mismatch, or a compression method zipfile cannot read
+            yield info, None, f'unreadable: {e}'
+            continue
+        if len(data) > max_member_bytes:
+            yield info, None, f'larger than {max_member_bytes} bytes'
+            continue
+        yield info, data, None
+